@@ -1,27 +1,35 @@
 import argparse
+import multiprocessing
 import sys
 
 from PySide6.QtWidgets import QApplication
 
-from src.gui.main_window import run_app
+from src.gui.main_window import run_app, run_cache_maintenance
 
 
-def parse_cli_args(argv: list[str]) -> tuple[bool, str | None, list[str]]:
+def parse_cli_args(argv: list[str]) -> tuple[bool, str | None, bool, list[str]]:
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--debug", action="store_true")
     parser.add_argument("--lang", type=str, default=None)
+    parser.add_argument("--cache-maintenance", action="store_true")
     parsed, qt_args = parser.parse_known_args(argv[1:])
 
     app_argv = [argv[0], *qt_args]
-    return parsed.debug, parsed.lang, app_argv
+    return parsed.debug, parsed.lang, parsed.cache_maintenance, app_argv
 
 
 def main():
-    debug, lang, app_argv = parse_cli_args(sys.argv)
+    debug, lang, cache_maintenance, app_argv = parse_cli_args(sys.argv)
+
+    if cache_maintenance:
+        # キャッシュの状態を表示して整理するだけ（ウィンドウは開かない）
+        sys.exit(run_cache_maintenance(debug=debug, lang=lang))
 
     app = QApplication(app_argv)
     sys.exit(run_app(app, debug=debug, lang=lang))
 
 
 if __name__ == "__main__":
+    # 実行ファイル化した場合でもSWF並列スキャンのワーカープロセスを起動できるように
+    multiprocessing.freeze_support()
     main()
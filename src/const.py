@@ -36,7 +36,17 @@ TEMPLATE_PRESET_FILE = DATA_DIR / "template_preset.yml"
 # デフォルトプリセットファイル
 DEFAULT_PRESET_FILE = PRESETS_DIR / "default.yml"
 # キャッシュファイル
-CACHE_FILE = DATA_DIR / "cache.yml"
+CACHE_FILE = DATA_DIR / "cache.sqlite3"
+# 1.0系のキャッシュファイル（見つかれば CACHE_FILE へ移行する）
+LEGACY_CACHE_FILE = DATA_DIR / "cache.yml"
+# 直近のスキャン結果のスナップショット（起動時にフォント一覧をすぐ表示するため）
+LIBRARY_SNAPSHOT_FILE = DATA_DIR / "library_snapshot.json"
+# キャッシュのジャーナルがこの件数を超えたら本体へまとめる
+CACHE_JOURNAL_COMPACT_THRESHOLD = 500
+# 現在のフォルダ以外（過去に使ったライブラリフォルダ）のキャッシュエントリの上限
+CACHE_MAX_INACTIVE_ENTRIES = 20000
+# ライブラリフォルダのスキャン日時を記録し直す間隔(秒)。古いフォルダの判定にはこの程度の粗さで足りる
+CACHE_ROOT_TOUCH_INTERVAL = 60 * 60
 
 # スカイリムにおける各種ディレクトリ名
 # インタフェースディレクトリ名
@@ -53,6 +63,26 @@ ALLOW_MAPPING_CATEGORY = [
     "mcm",
     "custom",
 ]
+# validNameChars の収録チェック対象外とするマッピングカテゴリ
+# 記号・ルーン文字などの特殊フォントは通常の文字を収録していないため除外する。
+VALIDNAMECHARS_CHECK_EXCLUDE_CATEGORY = ["special"]
+# フォント一覧の収録率フィルタで「収録している」とみなす割合
+COVERAGE_FILTER_THRESHOLD = 0.99
+# 並列スキャン時に1プロセスへまとめて渡すSWFの件数
+SCAN_CHUNK_SIZE = 8
+# 解析中に次のSWFを先読みするスレッド数（1プロセスあたり）
+SCAN_READAHEAD_THREADS = 2
+# 先読みでSWF1件あたりに読む先頭部分の上限。これより後ろは解析中に必要な分だけ読む
+SCAN_READAHEAD_HEAD_SIZE = 1024 * 1024
+# 先読みしてメモリに置いておくデータの上限（1プロセスあたり）
+SCAN_READAHEAD_MAX_BYTES = 8 * 1024 * 1024
+# スキャン中にフォント一覧へまとめて追加するSWFの件数
+SCAN_PROGRESS_BATCH_SIZE = 16
+# スキャン時に中へ入らないディレクトリ名（settings.scan_skip_heavy_dirs が有効な場合）
+# MO2 の mods フォルダやゲームの Data フォルダを指定されても、大量のファイルを辿らないようにする
+SCAN_HEAVY_DIR_NAMES = ["meshes", "textures", "sound", "scripts"]
+# SWFフォルダの監視で、最後の変更からこの時間(ms)待ってから読み込む
+WATCH_DEBOUNCE_MS = 500
 
 # サンプル画像拡張子
 SAMPLE_IMG_EXT = [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"]
@@ -1,18 +1,70 @@
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List
 
+from const import (
+    SCAN_CHUNK_SIZE,
+    SCAN_HEAVY_DIR_NAMES,
+    VALIDNAMECHARS_CHECK_EXCLUDE_CATEGORY,
+)
 from modules.generator import preset_generator
-from modules.swf_parser import swf_parser
+from modules.glyph_coverage import CoverageMatrix, iter_code_points, text_to_coverage
+from modules.swf_archive import stat_swf, swf_exists
+from modules.swf_finder import ScanDiff, ScanRules, SwfTreeScanner, hash_file
+from modules.swf_parser import (
+    coverage_of,
+    find_cached_fonts,
+    font_names_of,
+    fonts_from_cache_entry,
+    parse_and_hash_swf_file,
+    parse_and_hash_swf_files,
+    parse_swf_fonts,
+)
+from modules.swf_prefetch import SwfPrefetcher
 from utils.dprint import dprint
 from utils.i18n import tr
 
 
+class ScanProgress:
+    """MainController.iter_scan() の進捗カウンター"""
+
+    def __init__(self):
+        # スキャン対象のSWF数（ディレクトリの走査中は見つかるたびに増える）
+        self.total = 0
+        # 処理済みのSWF数（= cached + parsed）
+        self.done = 0
+        # キャッシュから読み込んだSWF数（移動・名前変更を内容ハッシュで見つけたものを含む）
+        self.cached = 0
+        # 解析したSWF数
+        self.parsed = 0
+        # フォントが見つかったSWF数
+        self.found = 0
+
+
 class MainController:
-    def __init__(self, settings, preset, cache, debug: bool = False):
+    def __init__(self, settings, preset, cache, debug: bool = False, snapshot=None):
         self.settings = settings
         self.preset = preset
         self.cache = cache
         self.debug = debug
+        # 直近のスキャン結果を保存する LibrarySnapshot（None なら保存しない）
+        self.snapshot = snapshot
+        # 直近のスキャン結果から作ったフォントx文字ブロックの収録率行列
+        self.coverage_matrix = CoverageMatrix([])
+        # SWFディレクトリ -> 前回の走査結果を覚えている SwfTreeScanner
+        self._tree_scanners = {}
+        # 直近に最後まで走査できたスキャンの、その前のスキャンからの差分
+        self.last_scan_diff = ScanDiff()
+        # ライブラリフォルダ -> 直近に最後までスキャンしたときの結果（フォントが見つかったもの）
+        self.root_results = {}
+        # root_results がスナップショットに保存した内容から変わったか
+        self._snapshot_dirty = False
+        # パス -> resolve() した絶対パス（ライブラリフォルダの判定で毎回 resolve しないため）
+        self._resolved_dirs = {}
 
     def _get_swf_base_dir(self) -> Path:
         """settings.swf_dir を基準ディレクトリとして返す。"""
@@ -25,10 +77,67 @@ class MainController:
         return base_dir
 
     def to_relative_swf_path(self, swf_path: str | Path) -> str:
-        """絶対SWFパスを settings.swf_dir 基準の相対パスへ変換する。"""
+        """絶対SWFパスを settings.swf_dir 基準の相対パスへ変換する。
+
+        使用中ではない別のライブラリフォルダのSWFは絶対パスのまま返す。
+        """
         base_dir = self._get_swf_base_dir()
         source_path = Path(swf_path).resolve()
-        return source_path.relative_to(base_dir).as_posix()
+        try:
+            return source_path.relative_to(base_dir).as_posix()
+        except ValueError:
+            if self.library_root_of(source_path) is None:
+                raise
+            return source_path.as_posix()
+
+    def display_swf_path(self, swf_path: str | Path) -> str:
+        """フォント一覧に表示するSWFのパスを返す。
+
+        使用中のフォルダのSWFは相対パス、別のライブラリフォルダのSWFは
+        「フォルダ名: 相対パス」。どちらでもなければ ValueError。
+        """
+        base_dir = self._get_swf_base_dir()
+        source_path = Path(swf_path).resolve()
+        if source_path.is_relative_to(base_dir):
+            return source_path.relative_to(base_dir).as_posix()
+        root = self.library_root_of(source_path)
+        if root is None:
+            raise ValueError(tr("errors.mapping_swf_outside_base"))
+        return f"{root.name}: {source_path.relative_to(root).as_posix()}"
+
+    @staticmethod
+    def _dir_key(dir_path: str | Path) -> str:
+        """フォルダを区別するキー（OSごとの大文字小文字の扱いを吸収する）"""
+        return os.path.normcase(os.path.abspath(dir_path))
+
+    def _resolve_dir(self, dir_path: str | Path) -> Path:
+        resolved = self._resolved_dirs.get(str(dir_path))
+        if resolved is None:
+            resolved = self._resolved_dirs[str(dir_path)] = Path(dir_path).resolve()
+        return resolved
+
+    def library_roots(self) -> List[Path]:
+        """存在するライブラリフォルダ（settings.swf_dirs）を、使用中の swf_dir を先頭にして返す。"""
+        swf_dirs = getattr(self.settings, "swf_dirs", None) or []
+        dirs = [self.settings.swf_dir, *swf_dirs]
+        roots = []
+        keys = set()
+        for dir_path in dirs:
+            if not dir_path:
+                continue
+            key = self._dir_key(dir_path)
+            if key not in keys and Path(dir_path).is_dir():
+                keys.add(key)
+                roots.append(Path(dir_path))
+        return roots
+
+    def library_root_of(self, swf_path: Path) -> Path | None:
+        """swf_path(resolve 済みの絶対パス)を含むライブラリフォルダの絶対パスを返す。無ければ None。"""
+        for root in self.library_roots():
+            resolved = self._resolve_dir(root)
+            if swf_path.is_relative_to(resolved):
+                return resolved
+        return None
 
     def resolve_absolute_swf_path(self, swf_path: str | Path) -> Path:
         """相対/絶対SWFパスを絶対パスへ解決する。"""
@@ -39,91 +148,821 @@ class MainController:
         base_dir = self._get_swf_base_dir()
         return (base_dir / target_path).resolve()
 
-    def scan_swf_directory(self, swf_dir_path: Path) -> List[Dict]:
-        """SWFディレクトリをスキャンし、UI表示用の結果を返す。
+    def _scan_workers(self) -> int:
+        """settings.scan_workers から実際に使うワーカー数を決める。0 は CPU 数に合わせる。"""
+        workers = getattr(self.settings, "scan_workers", 1)
+        if not workers or workers < 1:
+            workers = os.cpu_count() or 1
+        return workers
+
+    def _hash_swf_contents(self) -> bool:
+        """settings.hash_swf_contents を返す。False なら内容ハッシュを計算しない。"""
+        return bool(getattr(self.settings, "hash_swf_contents", True))
+
+    def _iter_parse_swf_files(
+        self,
+        swf_paths: List[Path],
+        workers: int,
+        known_hashes: List[str | None] | None = None,
+    ):
+        """キャッシュに無いSWFを解析し、swf_paths と同じ順で parse_and_hash_swf_file() の結果を返す。
 
-        Returns list of dicts: {"swf_path": Path, "font_names": List[str]}
+        workers が 2 以上かつ件数が十分にあれば SCAN_CHUNK_SIZE 件ずつプロセスプールに分配する。
+        1 の場合はデバッグしやすいようにこのスレッドで順番に解析する。
+        どちらの場合も SwfPrefetcher で次のSWFを先読みし、読み込みの待ち時間と解析を重ねる。
+        known_hashes は swf_paths と同じ順の計算済みの内容ハッシュ（無ければ None）。
+        計算済みのSWFはハッシュを計算し直さない。
+        途中で close() された場合は、まだ始まっていない解析と先読みを取り消す。
         """
-        scan_results = []
+        with_hash = self._hash_swf_contents()
+        if known_hashes is None:
+            known_hashes = [None] * len(swf_paths)
+        if workers <= 1 or len(swf_paths) <= SCAN_CHUNK_SIZE:
+            for (swf_path, prefetched), known_hash in zip(
+                SwfPrefetcher(swf_paths), known_hashes
+            ):
+                font_infos, content_hash, error = parse_and_hash_swf_file(
+                    swf_path, self.debug, with_hash and not known_hash, prefetched
+                )
+                yield font_infos, known_hash or content_hash, error
+            return
+
+        starts = range(0, len(swf_paths), SCAN_CHUNK_SIZE)
+        workers = min(workers, len(starts))
+        dprint(
+            f"{len(swf_paths)} 件のSWFを {workers} プロセスで解析します。", self.debug
+        )
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            for results in executor.map(
+                parse_and_hash_swf_files,
+                [swf_paths[i : i + SCAN_CHUNK_SIZE] for i in starts],
+                repeat(self.debug),
+                repeat(with_hash),
+                [known_hashes[i : i + SCAN_CHUNK_SIZE] for i in starts],
+            ):
+                yield from results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_scan(
+        self,
+        swf_dir_path: Path,
+        cancel_event: threading.Event | None = None,
+        progress: "ScanProgress | None" = None,
+        workers: int | None = None,
+    ) -> Iterator[Dict]:
+        """SWFディレクトリをスキャンし、1ファイル処理するごとにUI表示向けの結果を返す。
+
+        結果は normalize_scan_results_for_ui() と同じ形式（swf_path は絶対パス文字列）。
+        フォントが見つからなかったSWFも font_names が空の結果として返す。
+        キャッシュ済みのSWFは走査しながらすぐに返し、解析が必要なSWFは走査の後に
+        解析し終えたものから返す（ファイル名順ではない）。
+
+        cancel_event がセットされるか、呼び出し側が途中で反復をやめると、
+        まだ始まっていない解析を取り消して終了する。
+        キャッシュはファイル単位で更新するので途中で止めても壊れない。
+        progress を渡すと、件数のカウンターを更新しながら進む。
+        """
+        settings_base, base_dir = self._scan_base_dirs(swf_dir_path)
+        for result in self._iter_scan_raw(
+            swf_dir_path, cancel_event, progress, workers
+        ):
+            normalized = self._normalize_scan_result(result, settings_base, base_dir)
+            if normalized is not None:
+                yield normalized
+
+    def _iter_scan_raw(
+        self,
+        swf_dir_path: Path,
+        cancel_event: threading.Event | None = None,
+        progress: "ScanProgress | None" = None,
+        workers: int | None = None,
+    ) -> Iterator[Dict]:
+        """iter_scan() の本体。swf_path は Path のまま返す。"""
+        if progress is None:
+            progress = ScanProgress()
+        if workers is None:
+            workers = self._scan_workers()
+
+        def cancelled() -> bool:
+            if cancel_event is not None and cancel_event.is_set():
+                dprint(
+                    f"スキャンを中断しました: {progress.done}/{progress.total}",
+                    self.debug,
+                )
+                return True
+            return False
+
+        # キャッシュ済み（移動・名前変更を含む）のものは走査しながら返し、
+        # 解析が必要なものだけを後の解析に回す
+        misses = []
+        seen = []
+        scanner = self._tree_scanner(swf_dir_path)
+        for swf_path, st in scanner.iter_files():
+            progress.total += 1
+            seen.append(swf_path)
+            hit, known_hash = self._find_cached_swf(swf_path, swf_dir_path, st)
+            if hit is None:
+                misses.append((swf_path, st, known_hash))
+            else:
+                yield self._finish_scan_result(
+                    swf_path, swf_dir_path, st, *hit, False, progress
+                )
+            # キャッシュが空で全件が解析待ちでも、走査の途中で止められるようにする
+            if cancelled():
+                return
+
+        # 最後まで走査できたので、見つからなかったSWFのエントリを消す
+        self.last_scan_diff = scanner.diff
+        dprint(f"前回のスキャンからの差分: {scanner.diff}", self.debug)
+        self._prune_cache(swf_dir_path, seen)
+
+        if not misses or cancelled():
+            return
+
+        parsed_misses = self._iter_parse_swf_files(
+            [p for p, _, _ in misses], workers, [h for _, _, h in misses]
+        )
+        try:
+            for (swf_path, st, _), (font_infos, content_hash, error) in zip(
+                misses, parsed_misses
+            ):
+                yield self._finish_scan_result(
+                    swf_path,
+                    swf_dir_path,
+                    st,
+                    font_infos,
+                    content_hash,
+                    error,
+                    True,
+                    progress,
+                )
+                if cancelled():
+                    break
+        finally:
+            parsed_misses.close()
+
+    def iter_scan_preset_swfs(
+        self,
+        cancel_event: threading.Event | None = None,
+        progress: "ScanProgress | None" = None,
+        workers: int | None = None,
+    ) -> Iterator[Dict]:
+        """プリセットのマッピングが参照しているSWFだけをスキャンし、UI向けの結果を返す。
+
+        起動直後にプリセットの確認と出力ができるよう、ライブラリ全体のスキャンより先に呼ぶ。
+        結果の形式とキャッシュの扱いは iter_scan_roots() と同じ（"root" 付き）。
+        キャッシュ済みのSWFを先に返し、残りは解析し終えたものから返す。
+        見つからないSWFやライブラリフォルダの外にあるSWFは飛ばす。
+        """
+        if progress is None:
+            progress = ScanProgress()
+        if workers is None:
+            workers = self._scan_workers()
+        roots = [(root, self._resolve_dir(root)) for root in self.library_roots()]
 
-        for swf_path in swf_dir_path.rglob("*.swf"):
-            font_names = swf_parser(
-                swf_path=swf_path, cache=self.cache.data, debug=self.debug
+        def cancelled() -> bool:
+            return cancel_event is not None and cancel_event.is_set()
+
+        def finish(swf_path, root, st, hit, parsed) -> Dict | None:
+            result = self._finish_scan_result(
+                swf_path, root, st, *hit, parsed, progress
+            )
+            normalized = self._normalize_scan_result(
+                result, *self._scan_base_dirs(root)
+            )
+            if normalized is not None:
+                normalized["root"] = str(root)
+            return normalized
+
+        misses = []
+        for rel_swf_path in self.preset.get_mapping_swf_paths():
+            try:
+                swf_path = self.resolve_absolute_swf_path(rel_swf_path)
+                st = stat_swf(swf_path)
+            except (ValueError, OSError):
+                continue
+            root = next(
+                (root for root, resolved in roots if swf_path.is_relative_to(resolved)),
+                None,
             )
-            if font_names:
+            if root is None:
+                continue
+            progress.total += 1
+            hit, known_hash = self._find_cached_swf(swf_path, root, st)
+            if hit is None:
+                misses.append((swf_path, root, st, known_hash))
+                continue
+            result = finish(swf_path, root, st, hit, False)
+            if result is not None:
+                yield result
+            if cancelled():
+                return
+
+        if not misses:
+            return
+        parsed_misses = self._iter_parse_swf_files(
+            [p for p, _, _, _ in misses], workers, [h for _, _, _, h in misses]
+        )
+        try:
+            for (swf_path, root, st, _), hit in zip(misses, parsed_misses):
+                result = finish(swf_path, root, st, hit, True)
+                if result is not None:
+                    yield result
+                if cancelled():
+                    break
+        finally:
+            parsed_misses.close()
+
+    def iter_scan_roots(
+        self,
+        roots: List[Path] | None = None,
+        cancel_event: threading.Event | None = None,
+        progress: "ScanProgress | None" = None,
+        workers: int | None = None,
+        skip_paths: set[str] | None = None,
+    ) -> Iterator[Dict]:
+        """複数のライブラリフォルダを並行してスキャンし、処理した順にUI向けの結果を返す。
+
+        roots を省略した場合は library_roots()。フォルダごとのスレッドで iter_scan() を回し、
+        プロセスプールのワーカー数はフォルダの数で分ける。
+        結果には "root"（ライブラリフォルダのパス文字列）を付ける。
+        最後までスキャンしたフォルダの結果は root_results に残し、library_results() で使う。
+        progress は全フォルダの合計。cancel_event と途中でやめた場合の扱いは iter_scan() と同じ。
+        skip_paths の swf_path の結果は、iter_scan_preset_swfs() などで返し済みとして返さない
+        （root_results には含める）。
+        """
+        if roots is None:
+            roots = self.library_roots()
+        if not roots:
+            return
+        if progress is None:
+            progress = ScanProgress()
+        if workers is None:
+            workers = self._scan_workers()
+        root_workers = max(workers // len(roots), 1)
+        stop_event = threading.Event()
+        results = queue.Queue()
+        finished = object()
+        progresses = [ScanProgress() for _ in roots]
+
+        def scan(root: Path, root_progress: ScanProgress):
+            try:
+                for result in self.iter_scan(
+                    root, stop_event, root_progress, root_workers
+                ):
+                    results.put((root, result))
+            except Exception as e:
+                results.put((root, e))
+            finally:
+                results.put((root, finished))
+
+        threads = [
+            threading.Thread(target=scan, args=args, daemon=True)
+            for args in zip(roots, progresses)
+        ]
+        found = {self._dir_key(root): [] for root in roots}
+        completed = []
+        error = None
+        for thread in threads:
+            thread.start()
+        try:
+            running = len(threads)
+            while running:
+                if cancel_event is not None and cancel_event.is_set():
+                    stop_event.set()
                 try:
-                    # cache has `update` method that records relative path and font names
-                    self.cache.update(
-                        swf_path=swf_path, font_names=font_names, swf_dir=swf_dir_path
-                    )
-                except Exception:
-                    # if cache API differs, ignore to avoid crashing UI
-                    pass
-                scan_results.append({"swf_path": swf_path, "font_names": font_names})
+                    root, result = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if result is finished:
+                    running -= 1
+                    if not stop_event.is_set():
+                        completed.append(self._dir_key(root))
+                    continue
+                if isinstance(result, Exception):
+                    error = error or result
+                    stop_event.set()
+                    continue
+                for name in ("total", "done", "cached", "parsed", "found"):
+                    setattr(progress, name, sum(getattr(p, name) for p in progresses))
+                result["root"] = str(root)
+                if result["font_names"]:
+                    found[self._dir_key(root)].append(result)
+                if skip_paths and result["swf_path"] in skip_paths:
+                    continue
+                yield result
+        finally:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+            for key in completed:
+                self._set_root_results(key, found[key])
+        if error is not None:
+            raise error
+
+    def library_results(self) -> List[Dict]:
+        """全ライブラリフォルダの直近のスキャン結果（フォントが見つかったもの）を返す。
+
+        このセッションで最後までスキャンしていないフォルダは、キャッシュの記録から作る
+        （ディスクは見ない）。使用中のフォルダを切り替えたときに、走査し直さずに使う。
+        """
+        entries = []
+        for root in self.library_roots():
+            key = self._dir_key(root)
+            if key not in self.root_results:
+                self._set_root_results(key, self._results_from_cache(root))
+            entries.extend(self.root_results[key])
+        return entries
+
+    def restore_library_snapshot(self) -> bool:
+        """保存したスナップショットから、全ライブラリフォルダの結果を root_results に入れる。
+
+        ディスクもキャッシュも見ないので、ライブラリの大きさによらずすぐに終わる。
+        スナップショットに無いフォルダが1つでもあれば何もせず False を返す。
+        """
+        roots = self.library_roots()
+        if self.snapshot is None or not roots:
+            return False
+        saved = {
+            self._dir_key(root): entries
+            for root, entries in self.snapshot.load().items()
+        }
+        if any(self._dir_key(root) not in saved for root in roots):
+            return False
+        for root in roots:
+            self.root_results[self._dir_key(root)] = [
+                {**entry, "root": str(root)} for entry in saved[self._dir_key(root)]
+            ]
+        self._snapshot_dirty = False
+        return True
+
+    def save_library_snapshot(self) -> bool:
+        """root_results にあるライブラリフォルダの結果をスナップショットに保存する。
+
+        前回の保存（または読み込み）から root_results が変わっていなければ書き込まない。
+        """
+        if self.snapshot is None:
+            return False
+        if not self._snapshot_dirty:
+            return True
+        saved = self.snapshot.save(
+            {
+                str(root): self.root_results[self._dir_key(root)]
+                for root in self.library_roots()
+                if self._dir_key(root) in self.root_results
+            }
+        )
+        if saved:
+            self._snapshot_dirty = False
+        return saved
+
+    def _set_root_results(self, key: str, results: List[Dict]):
+        """root_results を置き換える。内容が変わった場合だけスナップショットを保存し直す対象にする
+
+        スキャンの順番は毎回同じとは限らないので、SWFのパスごとに比べる。
+        """
+        previous = self.root_results.get(key)
+        if previous is None or {r["swf_path"]: r for r in previous} != {
+            r["swf_path"]: r for r in results
+        }:
+            self._snapshot_dirty = True
+        self.root_results[key] = results
+
+    def library_changes(self, previous: List[Dict]) -> tuple[List[str], List[Dict]]:
+        """表示中の結果 previous から library_results() への差分を返す。
+
+        スナップショットから表示した一覧を、照合のスキャン後に差分だけ直すために使う。
+        Returns: scan_changes() と同じ (取り除くSWFのパス, 追加・変更されたSWFの結果)
+        """
+        before = {entry["swf_path"]: entry for entry in previous}
+        after = {entry["swf_path"]: entry for entry in self.library_results()}
+        stale = [path for path, entry in before.items() if after.get(path) != entry]
+        updated = [entry for path, entry in after.items() if before.get(path) != entry]
+        return stale, updated
+
+    def _results_from_cache(self, root: Path) -> List[Dict]:
+        """キャッシュに記録された root のSWFのうち、フォントがあるものをUI向けの結果にする。"""
+        base_dir = self._resolve_dir(root)
+        results = []
+        for entry in self.cache.entries_for_root(root):
+            if (
+                not entry.get("font_names")
+                or "fonts" not in entry
+                or "coverage" not in entry
+            ):
+                continue
+            font_infos = fonts_from_cache_entry(entry)
+            results.append(
+                {
+                    "swf_path": str(base_dir / entry["swf_path"]),
+                    "font_names": font_names_of(font_infos),
+                    "fonts": [f.to_dict() for f in font_infos],
+                    "coverage": coverage_of(font_infos),
+                    "root": str(root),
+                }
+            )
+        return results
+
+    def scan_changes(
+        self, swf_dir_path: Path, changed_paths: Iterable[str] | None = None
+    ) -> tuple[List[str], List[Dict]]:
+        """前回の走査からの差分だけを処理する（ファイル監視から呼ぶ）。
+
+        ディレクトリの走査は SwfTreeScanner の結果を使い回し、解析するのは
+        追加・変更されたSWFだけ。消えたSWFはキャッシュからも削除する。
+        changed_paths（ファイル監視が変更を報告したパス）を渡すと、それ以外のディレクトリや
+        SWFは stat もし直さない。
+        差分は last_scan_diff に入り、root_results にも反映する。
+
+        Returns: (UIから取り除くSWFの絶対パス文字列のリスト, 追加・変更されたSWFのUI向けの結果)
+        取り除くパスには変更されたSWFも含む（結果で置き換えるため）。
+        """
+        scanner = self._tree_scanner(swf_dir_path)
+        stats = dict(scanner.iter_files(changed_paths))
+        diff = scanner.diff
+        self.last_scan_diff = diff
+        if not diff:
+            return [], []
+        dprint(f"監視中のフォルダの変更: {diff}", self.debug)
+        self.cache.remove_paths(swf_dir_path, diff.removed)
+
+        settings_base, base_dir = self._scan_base_dirs(swf_dir_path)
+        stale = []
+        for swf_path in diff.removed + diff.changed:
+            normalized = self._normalize_scan_result(
+                {"swf_path": swf_path}, settings_base, base_dir
+            )
+            if normalized is not None:
+                stale.append(normalized["swf_path"])
+
+        progress = ScanProgress()
+        updated = []
+        for swf_path in diff.added + diff.changed:
+            st = stats[swf_path]
+            hit, known_hash = self._find_cached_swf(swf_path, swf_dir_path, st)
+            parsed = hit is None
+            if parsed:
+                hit = self._parse_swf(swf_path, known_hash)
+            result = self._finish_scan_result(
+                swf_path, swf_dir_path, st, *hit, parsed, progress
+            )
+            normalized = self._normalize_scan_result(result, settings_base, base_dir)
+            if normalized is not None:
+                normalized["root"] = str(swf_dir_path)
+                updated.append(normalized)
+
+        results = self.root_results.get(self._dir_key(swf_dir_path))
+        if results is not None:
+            removed = set(stale)
+            results[:] = [r for r in results if r["swf_path"] not in removed]
+            results.extend(r for r in updated if r["font_names"])
+            self._snapshot_dirty = True
+        return stale, updated
+
+    def watch_paths(self, swf_dir_path: Path) -> List[str]:
+        """直近の走査で見つけたディレクトリとSWFのパス（ファイル監視の対象）を返す。"""
+        return self._tree_scanner(swf_dir_path).watch_paths()
+
+    def _find_cached_swf(
+        self, swf_path: Path, swf_dir_path: Path, st: os.stat_result
+    ) -> tuple[tuple | None, str | None]:
+        """キャッシュを探し、(キャッシュの結果, 探すときに計算した内容ハッシュ) を返す。
+
+        キャッシュの結果は (FontInfo のリスト, 内容ハッシュ, エラー理由)。無ければ None。
+        そのまま使えるエントリの内容ハッシュは None。移動・名前変更されたSWFは
+        内容ハッシュから以前の解析結果を探す。
+        見つからなかったときに計算済みの内容ハッシュは、解析で計算し直さないよう返す。
+        """
+        font_infos = find_cached_fonts(
+            swf_path, self.cache, self.debug, swf_dir_path, st
+        )
+        if font_infos is not None:
+            return (font_infos, None, ""), None
+        return self._find_moved_swf(swf_path, st)
+
+    def _parse_swf(self, swf_path: Path, known_hash: str | None = None) -> tuple:
+        """1件を解析し、(FontInfo のリスト, 内容ハッシュ, エラー理由) を返す。
+
+        known_hash（_find_cached_swf() で計算済みの内容ハッシュ）があれば計算し直さない。
+        """
+        font_infos, content_hash, error = parse_and_hash_swf_file(
+            swf_path, self.debug, self._hash_swf_contents() and not known_hash
+        )
+        return font_infos, known_hash or content_hash, error
+
+    def _scan_rules(self) -> ScanRules:
+        """settings の scan_* からスキャン対象の条件を作る。"""
+        settings = self.settings
+        skip_heavy_dirs = getattr(settings, "scan_skip_heavy_dirs", True)
+        return ScanRules(
+            include=getattr(settings, "scan_include", ()),
+            exclude=getattr(settings, "scan_exclude", ()),
+            max_depth=getattr(settings, "scan_max_depth", 0),
+            min_size=getattr(settings, "scan_min_file_size", 0),
+            max_size=getattr(settings, "scan_max_file_size", 0),
+            skip_dir_names=SCAN_HEAVY_DIR_NAMES if skip_heavy_dirs else (),
+        )
+
+    def _tree_scanner(self, swf_dir_path: Path) -> SwfTreeScanner:
+        """swf_dir_path 用の SwfTreeScanner を返す（2回目以降は変わっていないディレクトリを読み直さない）
 
-        # SWFファイル名でソート
+        スキャン対象の条件が変わっていたら、前回の走査結果は使わない。
+        """
+        key = os.path.normcase(os.path.abspath(swf_dir_path))
+        rules = self._scan_rules()
+        scanner = self._tree_scanners.get(key)
+        if scanner is None or scanner.rules != rules:
+            scanner = self._tree_scanners[key] = SwfTreeScanner(swf_dir_path, rules)
+        return scanner
+
+    def _prune_cache(self, swf_dir_path: Path, seen: List[Path]):
+        """スキャンで見つからなかったSWFと、使われていないフォルダの古いエントリを削除する"""
+        pruned = self.cache.prune_missing(swf_dir_path, seen)
+        self.cache.touch_root(swf_dir_path)
+        evicted = self.cache.evict_inactive(
+            swf_dir_path, keep_dirs=self.library_roots()
+        )
+        if pruned or evicted:
+            dprint(
+                f"キャッシュから削除しました: 見つからないSWF {pruned} 件 / 古いフォルダ {evicted} 件",
+                self.debug,
+            )
+
+    def _finish_scan_result(
+        self,
+        swf_path: Path,
+        swf_dir_path: Path,
+        st: os.stat_result,
+        font_infos: List,
+        content_hash: str | None,
+        error: str | None,
+        parsed: bool,
+        progress: ScanProgress,
+    ) -> Dict:
+        """1ファイル分の結果をキャッシュへ反映し、進捗を数えてスキャン結果を返す。
+
+        content_hash が None ならキャッシュをそのまま使った結果（移動したSWFは
+        内容ハッシュ付きで新しいパスのエントリを作る）。
+        """
+        result = self._record_scan_result(
+            swf_path,
+            swf_dir_path,
+            font_infos,
+            st,
+            content_hash is None,
+            content_hash,
+            error,
+        )
+        progress.done += 1
+        if parsed:
+            progress.parsed += 1
+        else:
+            progress.cached += 1
+        if result["font_names"]:
+            progress.found += 1
+        return result
+
+    def scan_swf_directory(
+        self,
+        swf_dir_path: Path,
+        workers: int | None = None,
+        progress_callback: Callable[[int, int, Dict | None], None] | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> List[Dict]:
+        """SWFディレクトリをスキャンし、フォントが見つかったSWFの結果をまとめて返す。
+
+        キャッシュに無いSWFの解析は workers(省略時は settings.scan_workers)個の
+        プロセスに分配する。workers=1 なら従来どおりこのスレッドで順番に解析する。
+        結果とキャッシュの更新はどちらの場合も同じになる。
+
+        progress_callback は1ファイル処理するごとに (処理済み件数, 全件数, 結果) で呼ばれる。
+        フォントが見つからなかったSWFの結果は None。
+        cancel_event がセットされたら、処理中のファイルを終えた時点で打ち切り、
+        それまでの結果を返す。
+        結果を1件ずつ使いたい場合は iter_scan() を使うこと。
+
+        Returns list of dicts:
+            {"swf_path": Path, "font_names": List[str], "fonts": List[Dict],
+             "coverage": Dict[str, int]}
+        fonts は FontInfo.to_dict() のリスト。coverage はフォント名 -> 収録文字のビット集合。
+        """
+        progress = ScanProgress()
+        scan_results = []
+        for result in self._iter_scan_raw(
+            swf_dir_path, cancel_event, progress, workers
+        ):
+            if result["font_names"]:
+                scan_results.append(result)
+            if progress_callback:
+                progress_callback(
+                    progress.done,
+                    progress.total,
+                    result if result["font_names"] else None,
+                )
+
+        # SWFファイル名でソート（同名はパス順）
         return sorted(
             scan_results,
-            key=lambda x: str(Path(x.get("swf_path", "")).name),
+            key=lambda x: (
+                str(Path(x.get("swf_path", "")).name),
+                str(x.get("swf_path", "")),
+            ),
+        )
+
+    def _find_moved_swf(
+        self, swf_path: Path, st: os.stat_result
+    ) -> tuple[tuple | None, str | None]:
+        """内容ハッシュが一致するキャッシュエントリを探し、_find_cached_swf() と同じ形で返す。
+
+        一致すれば ((FontInfo のリスト, ハッシュ, エラー理由), ハッシュ)。
+        一致しなければ (None, 計算したハッシュ)。
+        同じサイズのエントリが無い場合や settings.hash_swf_contents が False の場合は、
+        ハッシュを計算せずに (None, None) を返す。
+        """
+        if not self._hash_swf_contents() or not self.cache.has_hash_for_size(
+            st.st_size
+        ):
+            return None, None
+        try:
+            content_hash = hash_file(swf_path)
+        except OSError:
+            return None, None
+        entry = self.cache.find_by_hash(content_hash)
+        if entry is None or "fonts" not in entry or "coverage" not in entry:
+            return None, content_hash
+        dprint(
+            f"移動前のキャッシュを使用: {entry.get('swf_path')} -> {swf_path.name}",
+            self.debug,
         )
+        hit = fonts_from_cache_entry(entry), content_hash, entry.get("error", "")
+        return hit, content_hash
+
+    def _record_scan_result(
+        self,
+        swf_path: Path,
+        swf_dir_path: Path,
+        font_infos: List,
+        st: os.stat_result | None = None,
+        from_cache: bool = False,
+        content_hash: str | None = None,
+        error: str | None = "",
+    ) -> Dict:
+        """1ファイル分の解析結果をキャッシュへ反映し、スキャン結果の辞書を返す。
+
+        キャッシュから読み込んだ結果は、サイズと更新日時(ns)だけを記録し直す。
+        content_hash は解析したファイルの内容ハッシュ、error は解析に失敗した理由。
+        フォントが見つからなかったSWFや解析に失敗したSWFも、次回解析し直さないよう記録する。
+        その場合は font_names が空の結果を返す。
+        error が None（ファイルを読めなかった一時的な失敗）なら記録せず、次回読み直す。
+        """
+        font_names = font_names_of(font_infos)
+        fonts = [f.to_dict() for f in font_infos]
+        coverage = coverage_of(font_infos)
+        try:
+            if from_cache:
+                self.cache.refresh_stat(swf_path, swf_dir_path, st)
+            elif error is None:
+                dprint(f"読み込めなかったため記録しません: {swf_path}", self.debug)
+            else:
+                # cache has `update` method that records relative path and font names
+                self.cache.update(
+                    swf_path=swf_path,
+                    font_names=font_names,
+                    swf_dir=swf_dir_path,
+                    fonts=fonts,
+                    coverage=coverage,
+                    st=st,
+                    content_hash=content_hash,
+                    error=error,
+                )
+        except Exception:
+            # if cache API differs, ignore to avoid crashing UI
+            pass
+        return {
+            "swf_path": swf_path,
+            "font_names": font_names,
+            "fonts": fonts,
+            "coverage": coverage,
+        }
 
     def normalize_scan_results_for_ui(
         self, scan_results: List[Dict], swf_dir_path: Path
     ) -> List[Dict]:
         """スキャン結果をUI表示向けに正規化し、絶対パスで返す。"""
+        settings_base, base_dir = self._scan_base_dirs(swf_dir_path)
         normalized = []
+        for item in scan_results:
+            entry = self._normalize_scan_result(item, settings_base, base_dir)
+            if entry is not None:
+                normalized.append(entry)
+        return normalized
+
+    def _scan_base_dirs(self, swf_dir_path: Path) -> tuple[Path | None, Path]:
+        """(settings.swf_dir の絶対パス, swf_dir_path の絶対パス) を返す。
+
+        スキャン中は変わらないので、1回のスキャンにつき1度だけ解決する。
+        settings.swf_dir が未設定か不正なら前者は None。
+        swf_dir_path が使用中ではない別のライブラリフォルダの場合も、
+        結果をそのフォルダの絶対パスのまま返すよう前者は None。
+        """
+        try:
+            settings_base = self._get_swf_base_dir()
+        except ValueError:
+            settings_base = None
         base_dir = Path(swf_dir_path).resolve()
+        if (
+            settings_base is not None
+            and base_dir != settings_base
+            and self._dir_key(swf_dir_path)
+            in {self._dir_key(root) for root in self.library_roots()}
+        ):
+            settings_base = None
+        return settings_base, base_dir
 
-        for item in scan_results:
-            swf_path = item.get("swf_path")
-            if not swf_path:
-                continue
+    def _normalize_scan_result(
+        self, item: Dict, settings_base: Path | None, base_dir: Path
+    ) -> Dict | None:
+        """スキャン結果1件をUI表示向けに正規化する。どちらの基準にも収まらなければ None。
 
-            abs_path = Path(swf_path).resolve()
-            try:
-                rel_path = self.to_relative_swf_path(abs_path)
-            except Exception:
-                try:
-                    rel_path = str(abs_path.relative_to(base_dir))
-                except Exception:
-                    continue
+        パスは settings.swf_dir 基準の相対パスを経由して絶対パスにする
+        （settings.swf_dir の外なら swf_dir_path 基準）。
+        """
+        swf_path = item.get("swf_path")
+        if not swf_path:
+            return None
 
+        abs_path = Path(swf_path).resolve()
+        if settings_base is not None and abs_path.is_relative_to(settings_base):
+            ui_abs_path = abs_path
+        else:
             try:
-                ui_abs_path = self.resolve_absolute_swf_path(rel_path)
-            except Exception:
+                rel_path = abs_path.relative_to(base_dir)
+            except ValueError:
+                return None
+            if settings_base is not None:
+                ui_abs_path = (settings_base / rel_path).resolve()
+            else:
                 ui_abs_path = abs_path
 
-            normalized.append(
-                {
-                    "swf_path": str(ui_abs_path),
-                    "font_names": item.get("font_names", []) or [],
-                }
-            )
+        return {
+            "swf_path": str(ui_abs_path),
+            "font_names": item.get("font_names", []) or [],
+            "fonts": item.get("fonts", []) or [],
+            "coverage": item.get("coverage", {}) or {},
+        }
 
-        return normalized
+    def update_coverage_matrix(self, entries: List[Dict]) -> CoverageMatrix:
+        """UI向けに正規化したスキャン結果から収録率行列を作り直す。
+
+        行のキーは (swf_path(絶対パス文字列), font_name)。
+        """
+        rows = []
+        for entry in entries:
+            swf_path = str(entry.get("swf_path", ""))
+            for font_name, coverage in (entry.get("coverage") or {}).items():
+                rows.append(((swf_path, font_name), coverage))
+        self.coverage_matrix = CoverageMatrix(rows)
+        return self.coverage_matrix
+
+    def fonts_covering_block(self, block: str, threshold: float) -> set:
+        """指定した文字ブロックの収録率が threshold 以上の (swf_path, font_name) を返す。"""
+        return set(self.coverage_matrix.fonts_covering(block, threshold))
+
+    def rank_fonts_by_text(self, text: str) -> list:
+        """text の文字の収録率が高い順に ((swf_path, font_name), 収録率) を返す。"""
+        return self.coverage_matrix.rank_by_text(text)
 
     def process_single_swf(self, swf_path: Path) -> Dict:
         """単一のSWFファイルをスキャンし、フォント情報を返す。
 
-        Returns: {"swf_path": Path, "font_names": List[str]}
+        Returns: {"swf_path": Path, "font_names": List[str], "fonts": List[Dict],
+                  "coverage": Dict[str, int]}
         ファイルが存在しないか解析に失敗した場合も、空のfont_namesで返す.
         """
-        if not swf_path.exists():
+        if not swf_exists(swf_path):
             dprint(tr("errors.file_not_found", path=swf_path), self.debug)
-            return {"swf_path": swf_path, "font_names": []}
+            return {"swf_path": swf_path, "font_names": [], "fonts": [], "coverage": {}}
 
         try:
-            font_names = swf_parser(
-                swf_path=swf_path, cache=self.cache.data, debug=self.debug
+            try:
+                swf_dir = self._get_swf_base_dir()
+            except ValueError:
+                swf_dir = None
+            font_infos = parse_swf_fonts(
+                swf_path=swf_path, cache=self.cache, debug=self.debug, swf_dir=swf_dir
             )
-            # font_namesがNoneまたは空の場合も、辞書形式で返す（常にデータ構造を統一）
+            # font_namesが空の場合も、辞書形式で返す（常にデータ構造を統一）
             return {
                 "swf_path": swf_path,
-                "font_names": font_names if font_names else [],
+                "font_names": font_names_of(font_infos),
+                "fonts": [f.to_dict() for f in font_infos],
+                "coverage": coverage_of(font_infos),
             }
         except Exception as e:
             print(tr("errors.single_swf_scan_failed", path=swf_path, detail=e))
-            return {"swf_path": swf_path, "font_names": []}
+            return {"swf_path": swf_path, "font_names": [], "fonts": [], "coverage": {}}
 
     def validate_required_mappings(self) -> list:
         """必須マッピング(require)でフォント未指定の map_name を返す"""
@@ -196,12 +1035,85 @@ class MainController:
                 not_found.append((m.get("map_name"), f_name))
         return not_found
 
-    def generate_preset(self, output_dir: Path, use_fallback: bool = False):
+    def _get_font_coverage(self, swf_path: str, font_name: str) -> int | None:
+        """マッピングのSWF(相対パス)とフォント名から収録文字のビット集合を返す。
+
+        キャッシュに無ければその場で解析してキャッシュへ反映する。取得できなければ None。
+        """
+        try:
+            abs_path = self.resolve_absolute_swf_path(swf_path)
+            # 別のライブラリフォルダのSWFは、そのフォルダのキャッシュで引く
+            base_dir = self.library_root_of(abs_path) or self._get_swf_base_dir()
+        except ValueError:
+            return None
+
+        try:
+            st = stat_swf(abs_path)
+        except OSError:
+            # SWFが見つからなければ、記録済みの収録文字をそのまま使う
+            return self.cache.get_coverage(abs_path, base_dir, font_name)
+
+        # 置き換えられたSWFの古い収録文字を返さないよう、サイズと更新日時を確かめてから使う
+        hit, known_hash = self._find_cached_swf(abs_path, base_dir, st)
+        if hit is not None and hit[1] is None:
+            return coverage_of(hit[0]).get(font_name)
+        # スキャン時と同じく、移動したSWFは以前の結果を使い、
+        # フォントが無いSWFや解析に失敗したSWFも記録する
+        if hit is None:
+            hit = self._parse_swf(abs_path, known_hash)
+        font_infos, content_hash, error = hit
+        self._record_scan_result(
+            abs_path, base_dir, font_infos, st, False, content_hash, error
+        )
+        return coverage_of(font_infos).get(font_name)
+
+    def find_uncovered_validnamechars(self) -> list:
+        """validnamechars のうち、割り当てフォントに収録されていない文字を map_name ごとに返す。
+
+        Returns: [(map_name, font_name, missing_chars), ...]
+        収録文字が取得できないフォントや、VALIDNAMECHARS_CHECK_EXCLUDE_CATEGORY のマッピングは対象外。
+        """
+        required = text_to_coverage(self.preset.validnamechars or "")
+        if not required or not self.settings.swf_dir:
+            return []
+
+        # 同じフォントを複数のマップで使い回すことが多いので、SWF+フォント名単位で覚えておく
+        coverage_by_font = {}
+        uncovered = []
+        for m in self.preset.mappings:
+            if m.get("category") in VALIDNAMECHARS_CHECK_EXCLUDE_CATEGORY:
+                continue
+            font_name = m.get("font_name")
+            swf_path = m.get("swf_path")
+            if not font_name or not swf_path:
+                continue
+
+            key = (swf_path, font_name)
+            if key not in coverage_by_font:
+                coverage_by_font[key] = self._get_font_coverage(swf_path, font_name)
+            coverage = coverage_by_font[key]
+            if coverage is None:
+                continue
+
+            missing = required & ~coverage
+            if missing:
+                missing_chars = "".join(chr(c) for c in iter_code_points(missing))
+                uncovered.append((m.get("map_name"), font_name, missing_chars))
+        return uncovered
+
+    def generate_preset(
+        self,
+        output_dir: Path,
+        use_fallback: bool = False,
+        uncovered: list | None = None,
+    ):
         """プリセットを指定フォルダに出力するコア処理。
 
         Args:
             output_dir: 出力先ディレクトリ
             use_fallback: Trueの場合、フォント指定が空でも fonts_core.swf を使用して出力
+            uncovered: 呼び出し側で find_uncovered_validnamechars() を実行済みならその結果。
+                None の場合はここで確認する
 
         Returns:
             Path: 生成されたfontconfig.txtのパス
@@ -225,6 +1137,20 @@ class MainController:
                     )
                 )
 
+        # validNameChars の文字が割り当てフォントに収録されているか確認（警告のみ）
+        if uncovered is None:
+            uncovered = self.find_uncovered_validnamechars()
+        for map_name, font_name, missing_chars in uncovered:
+            print(
+                tr(
+                    "errors.validnamechars_uncovered",
+                    map_name=map_name,
+                    font_name=font_name,
+                    count=len(missing_chars),
+                    chars=missing_chars,
+                )
+            )
+
         self.preset.save()
 
         # 生成処理（IOや重い処理を含む）
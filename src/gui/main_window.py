@@ -1,13 +1,15 @@
 import os
 import shutil
+import threading
 import time
 from pathlib import Path
 
 import yaml
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QGuiApplication, QPixmap
+from PySide6.QtCore import QFileSystemWatcher, Qt, QThread, QTimer, Signal
+from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import (
     QApplication,
+    QCheckBox,
     QComboBox,
     QDialog,
     QFileDialog,
@@ -33,19 +35,26 @@ from PySide6.QtWidgets import (
 from const import (
     ALLOW_MAPPING_CATEGORY,
     CACHE_FILE,
+    COVERAGE_FILTER_THRESHOLD,
     DEFAULT_PRESET_FILE,
     ENCODE,
+    LEGACY_CACHE_FILE,
+    LIBRARY_SNAPSHOT_FILE,
     MAIN_WINDOW_TITLE,
     PRESETS_DIR,
+    SCAN_PROGRESS_BATCH_SIZE,
     SETTINGS_FILE,
     SKYRIM_CORE_FONT_SWF,
     SKYRIM_CORE_FONT_SWF_IMAGE_DIR,
+    WATCH_DEBOUNCE_MS,
 )
 from models.cache import Cache
+from models.library_snapshot import LibrarySnapshot
 from models.preset import Preset
 from models.settings import Settings
-from src.gui.main_controller import MainController
+from src.gui.main_controller import MainController, ScanProgress
 from src.modules.find_preview_image import find_preview_image
+from src.modules.glyph_coverage import coverage_blocks
 from utils.dprint import dprint
 from utils.i18n import set_language, tr
 
@@ -114,9 +123,140 @@ class PreviewImageDialog(QDialog):
         self.image_label.setPixmap(scaled)
 
 
+class SwfScanThread(QThread):
+    """SWFフォルダのスキャンをGUIスレッドの外で行うスレッド
+
+    preset_first なら最初にプリセットが参照するSWFだけをスキャンして batch_ready ですぐに送り、
+    preset_ready を出してから、残りのライブラリフォルダ全体をスキャンする。
+    複数のライブラリフォルダは並行してスキャンする。
+    スキャン結果はUI向けに正規化し、SCAN_PROGRESS_BATCH_SIZE 件ごとに
+    batch_ready で送る。progress は (処理済みファイル数, 全ファイル数)。
+    """
+
+    batch_ready = Signal(object)
+    preset_ready = Signal()
+    progress = Signal(int, int)
+
+    def __init__(
+        self,
+        controller: MainController,
+        roots: list[Path],
+        parent=None,
+        preset_first: bool = True,
+    ):
+        super().__init__(parent)
+        self.controller = controller
+        self.roots = roots
+        self.preset_first = preset_first
+        self.cancel_event = threading.Event()
+        self.error: Exception | None = None
+        self.elapsed_ms = 0.0
+        self._batch = []
+
+    def cancel(self):
+        """処理中のファイルを終えたところでスキャンを止める"""
+        self.cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self):
+        scan_start = time.perf_counter()
+        progress = ScanProgress()
+        try:
+            # プリセットが参照するSWFは、全体のスキャンを待たずに送る
+            published = set()
+            if self.preset_first:
+                for entry in self.controller.iter_scan_preset_swfs(
+                    cancel_event=self.cancel_event, progress=progress
+                ):
+                    published.add(entry["swf_path"])
+                    if entry["font_names"]:
+                        self._batch.append(entry)
+                    self.progress.emit(progress.done, progress.total)
+                self._flush()
+                self.preset_ready.emit()
+
+            for entry in self.controller.iter_scan_roots(
+                self.roots,
+                cancel_event=self.cancel_event,
+                progress=progress,
+                skip_paths=published,
+            ):
+                if entry["font_names"]:
+                    self._batch.append(entry)
+                if len(self._batch) >= SCAN_PROGRESS_BATCH_SIZE:
+                    self._flush()
+                self.progress.emit(progress.done, progress.total)
+        except Exception as e:
+            self.error = e
+            import traceback
+
+            traceback.print_exc()
+        finally:
+            self._flush()
+            self.elapsed_ms = (time.perf_counter() - scan_start) * 1000
+
+    def _flush(self):
+        if self._batch:
+            self.batch_ready.emit(self._batch)
+            self._batch = []
+
+
+class SwfWatchScanThread(QThread):
+    """ファイル監視が拾った変更をGUIスレッドの外でスキャン結果に反映するスレッド
+
+    各ライブラリフォルダで MainController.scan_changes() を呼び、変更が報告されたパスだけを調べる。
+    終わると stale（取り除くSWFのパス）と updated（追加・変更されたSWFの結果）に入る。
+    """
+
+    def __init__(
+        self,
+        controller: MainController,
+        roots: list[Path],
+        changed_paths: set[str],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.controller = controller
+        self.roots = roots
+        self.changed_paths = changed_paths
+        self.error: Exception | None = None
+        self.stale: list[str] = []
+        self.updated: list[dict] = []
+
+    def run(self):
+        try:
+            for root in self.roots:
+                stale, updated = self.controller.scan_changes(root, self.changed_paths)
+                self.stale.extend(stale)
+                self.updated.extend(updated)
+        except Exception as e:
+            self.error = e
+
+
+def _copy_if_changed(source: Path, target: Path):
+    """target が source と同じサイズ・更新日時なら何もせず、違えば copy2 でコピーする"""
+    try:
+        source_st = source.stat()
+        target_st = target.stat()
+        if source_st.st_size == target_st.st_size and int(source_st.st_mtime) == int(
+            target_st.st_mtime
+        ):
+            return
+    except OSError:
+        pass
+    shutil.copy2(source, target)
+
+
 class MainWindow(QMainWindow):
     def __init__(
-        self, settings: Settings, preset: Preset, cache: Cache, debug: bool = False
+        self,
+        settings: Settings,
+        preset: Preset,
+        cache: Cache,
+        debug: bool = False,
+        snapshot: LibrarySnapshot | None = None,
     ):
         super().__init__()
         self.settings = settings
@@ -129,8 +269,24 @@ class MainWindow(QMainWindow):
             preset=preset,
             cache=cache,
             debug=self.debug,
+            snapshot=snapshot,
         )
         self.scanned_swf_entries = []
+        # バックグラウンドで実行中のSWFスキャン
+        self.scan_thread: SwfScanThread | None = None
+        # スナップショットをディスクと照合しているスレッド（照合中は scan_thread と同じ）
+        self.snapshot_verify_thread: SwfScanThread | None = None
+        # SWFフォルダの監視。変更が続く間は読み込まず、落ち着いてから差分だけを反映する
+        self.swf_dir_watcher = QFileSystemWatcher(self)
+        self.swf_dir_watcher.directoryChanged.connect(self.on_swf_dir_changed)
+        self.swf_dir_watcher.fileChanged.connect(self.on_swf_dir_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DEBOUNCE_MS)
+        self.watch_timer.timeout.connect(self.on_watch_timeout)
+        # 監視が変更を報告したパス（まとめて反映するまでためておく）
+        self.watch_changed_paths: set[str] = set()
+        self.watch_thread: SwfWatchScanThread | None = None
         self._pending_mapping_swf_paths = {}
         self.current_preview_image_path: Path | None = None
         self.startup_aborted = False
@@ -213,21 +369,25 @@ class MainWindow(QMainWindow):
             )
             self.settings.swf_dir = ""
             self.settings.save()
-            self.label_swf_dir_path.setText(
-                self.tr("swf_dir.current", value=self.tr("labels.unset"))
-            )
-            self.button_load_swf_dir.setEnabled(False)
+            self.refresh_swf_dir_combo()
             return
 
-        self.label_swf_dir_path.setText(self.tr("swf_dir.current", value=str(swf_dir)))
-        self.button_load_swf_dir.setEnabled(True)
+        self.refresh_swf_dir_combo()
         if not self.ensure_system_fonts_core(swf_dir):
             self.startup_aborted = True
             return
-        self.refresh_font_names_list(swf_dir)
+        if self.controller.restore_library_snapshot():
+            # 前回のスキャン結果ですぐに一覧を作り、ディスクとの照合は裏で行う
+            self.show_library_results()
+            self.verify_library_snapshot()
+            return
+        self.refresh_font_names_list()
 
     def ensure_system_fonts_core(self, swf_dir: Path) -> bool:
-        """SWFフォルダ内の system に必須アセットを配置する。"""
+        """SWFフォルダ内の system に必須アセットを配置する。
+
+        配置済みで変わっていないファイルはコピーし直さない。
+        """
         target_core = swf_dir / "system" / "fonts_core.swf"
         target_system_dir = target_core.parent
 
@@ -255,11 +415,11 @@ class MainWindow(QMainWindow):
 
         try:
             target_system_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(SKYRIM_CORE_FONT_SWF, target_core)
+            _copy_if_changed(SKYRIM_CORE_FONT_SWF, target_core)
 
             for sample_file in SKYRIM_CORE_FONT_SWF_IMAGE_DIR.iterdir():
                 if sample_file.is_file():
-                    shutil.copy2(sample_file, target_system_dir / sample_file.name)
+                    _copy_if_changed(sample_file, target_system_dir / sample_file.name)
 
             return True
         except Exception as e:
@@ -280,17 +440,11 @@ class MainWindow(QMainWindow):
         """SWFフォルダ選択レイアウトのセットアップ"""
         hboxlayout_swf_dir = QHBoxLayout()
 
-        # SWFフォルダのパス表示ラベル
-        self.label_swf_dir_path = QLabel()
-        swf_dir = Path(self.settings.swf_dir) if self.settings.swf_dir else None
-        # SWFフォルダが設定されていて、かつ存在しているか。
-        if swf_dir and swf_dir.exists():
-            # resolveしなくても、もともと絶対パスで入ってる。
-            self.label_swf_dir_path.setText(self.tr("swf_dir.current", value=swf_dir))
-        else:
-            self.label_swf_dir_path.setText(
-                self.tr("swf_dir.current", value=self.tr("labels.unset"))
-            )
+        # 使用中のSWFフォルダ（ライブラリフォルダ）の選択。切り替えても走査し直さない
+        label_swf_dir = QLabel(self.tr("swf_dir.label"))
+        self.combo_swf_dir = QComboBox()
+        self.combo_swf_dir.setToolTip(self.tr("tooltip.swf_dir"))
+        self.combo_swf_dir.activated.connect(self.on_swf_dir_activated)
 
         # SWFフォルダ閲覧ボタン
         button_browse_swf_dir = QPushButton(self.tr("buttons.open_folder"))
@@ -299,17 +453,105 @@ class MainWindow(QMainWindow):
         # SWFフォルダ読み込みボタン
         self.button_load_swf_dir = QPushButton(self.tr("buttons.load"))
         self.button_load_swf_dir.clicked.connect(self.on_load_swf_dir_clicked)
-        self.button_load_swf_dir.setEnabled(bool(self.settings.swf_dir))
+
+        # SWFフォルダを一覧から外すボタン
+        self.button_remove_swf_dir = QPushButton(self.tr("buttons.remove_folder"))
+        self.button_remove_swf_dir.clicked.connect(self.on_remove_swf_dir_clicked)
+        self.refresh_swf_dir_combo()
+
+        # SWFフォルダ監視チェックボックス
+        self.checkbox_watch_swf_dir = QCheckBox(self.tr("swf_dir.watch"))
+        self.checkbox_watch_swf_dir.setToolTip(self.tr("tooltip.watch_swf_dir"))
+        self.checkbox_watch_swf_dir.setChecked(self.settings.watch_swf_dir)
+        self.checkbox_watch_swf_dir.toggled.connect(self.on_watch_swf_dir_toggled)
 
         # レイアウトへ各種部品の挿入
-        hboxlayout_swf_dir.addWidget(self.label_swf_dir_path, stretch=1)
+        hboxlayout_swf_dir.addWidget(label_swf_dir)
+        hboxlayout_swf_dir.addWidget(self.combo_swf_dir, stretch=1)
+        hboxlayout_swf_dir.addWidget(self.checkbox_watch_swf_dir)
         hboxlayout_swf_dir.addWidget(button_browse_swf_dir)
+        hboxlayout_swf_dir.addWidget(self.button_remove_swf_dir)
         hboxlayout_swf_dir.addWidget(self.button_load_swf_dir)
 
         layout.addLayout(hboxlayout_swf_dir)
 
+    def refresh_swf_dir_combo(self):
+        """ライブラリフォルダの選択肢を settings.swf_dirs に合わせ、使用中のフォルダを選ぶ"""
+        self.combo_swf_dir.blockSignals(True)
+        self.combo_swf_dir.clear()
+        for swf_dir in self.settings.swf_dirs:
+            self.combo_swf_dir.addItem(swf_dir, swf_dir)
+        if self.settings.swf_dir:
+            self.combo_swf_dir.setCurrentIndex(
+                self.combo_swf_dir.findData(self.settings.swf_dir)
+            )
+        else:
+            self.combo_swf_dir.setPlaceholderText(self.tr("labels.unset"))
+            self.combo_swf_dir.setCurrentIndex(-1)
+        self.combo_swf_dir.blockSignals(False)
+        self.button_load_swf_dir.setEnabled(bool(self.settings.swf_dir))
+        self.button_remove_swf_dir.setEnabled(bool(self.settings.swf_dir))
+
+    def on_swf_dir_activated(self, index: int):
+        """使用中のライブラリフォルダを切り替える。前回のスキャン結果をそのまま使い、走査し直さない"""
+        swf_dir = self.combo_swf_dir.itemData(index)
+        if not swf_dir or swf_dir == self.settings.swf_dir:
+            return
+        if not Path(swf_dir).is_dir():
+            QMessageBox.warning(
+                self,
+                self.tr("common.error"),
+                self.tr("errors.folder_not_found"),
+            )
+            self.refresh_swf_dir_combo()
+            return
+        if self.is_refreshing_font_list():
+            self.refresh_swf_dir_combo()
+            return
+        # 照合は切り替え後の一覧に対してやり直す
+        verifying = self.stop_snapshot_verification()
+        self.settings.swf_dir = swf_dir
+        self.settings.save()
+        self.refresh_swf_dir_combo()
+        self.show_library_results()
+        if verifying:
+            self.verify_library_snapshot()
+
+    def on_remove_swf_dir_clicked(self):
+        """使用中のライブラリフォルダを一覧から外し、残りのフォルダの先頭を使う"""
+        if not self.settings.swf_dir:
+            return
+        if self.is_refreshing_font_list():
+            return
+        verifying = self.stop_snapshot_verification()
+        remaining = [d for d in self.settings.swf_dirs if d != self.settings.swf_dir]
+        self.settings.swf_dirs = remaining
+        self.settings.swf_dir = remaining[0] if remaining else ""
+        self.settings.save()
+        self.refresh_swf_dir_combo()
+        self.show_library_results()
+        if verifying:
+            self.verify_library_snapshot()
+
+    def show_library_results(self):
+        """全ライブラリフォルダの直近のスキャン結果をフォント一覧とマッピングの候補に反映する
+
+        ディスクは走査しない（フォルダを切り替えたときに一覧をすぐ作り直すため）。
+        """
+        # 監視で拾った変更は root_results に入るので、反映中なら終わるのを待つだけでよい
+        self.wait_for_watch_scan()
+        self.scanned_swf_entries = self.controller.library_results()
+        self.scanned_swf_entries.sort(
+            key=lambda x: (Path(x["swf_path"]).name, x["swf_path"])
+        )
+        self.controller.update_coverage_matrix(self.scanned_swf_entries)
+        self.refresh_ui_from_scan_results()
+        self.update_swf_dir_watch()
+
     def on_browse_swf_dir_clicked(self):
         """SWFフォルダ閲覧ボタン押下時のアクション"""
+        if self.is_refreshing_font_list():
+            return
         if self.settings.swf_dir:
             reply = QMessageBox.warning(
                 self,
@@ -328,11 +570,11 @@ class MainWindow(QMainWindow):
             p = Path(dir_path)
             if not self.ensure_system_fonts_core(p):
                 return
+            # 選んだフォルダをライブラリフォルダに加えて使用中にする
             self.settings.swf_dir = str(p)
             self.settings.save()
-            self.label_swf_dir_path.setText(self.tr("swf_dir.current", value=str(p)))
-            self.button_load_swf_dir.setEnabled(True)  # ボタンを有効化
-            self.refresh_font_names_list(p)
+            self.refresh_swf_dir_combo()
+            self.refresh_font_names_list()
 
     def on_load_swf_dir_clicked(self):
         """SWFフォルダ読み込みボタン押下時のアクション"""
@@ -341,7 +583,7 @@ class MainWindow(QMainWindow):
         if swf_dir and swf_dir.exists():
             if not self.ensure_system_fonts_core(swf_dir):
                 return
-            self.refresh_font_names_list(swf_dir)
+            self.refresh_font_names_list()
             # QMessageBox.information(self, "完了", "フォルダの内容を読み込みました。")
         else:
             QMessageBox.warning(
@@ -350,51 +592,291 @@ class MainWindow(QMainWindow):
                 self.tr("errors.folder_not_found"),
             )
 
-    def refresh_font_names_list(self, swf_dir_path: Path):
-        """フォント名一覧を更新する（シンプル実装版）"""
+    def refresh_font_names_list(self):
+        """全ライブラリフォルダをスキャンしてフォント名一覧を更新する
+
+        スキャンは SwfScanThread で行い、見つかったフォントから順にリストへ追加する。
+        キャンセルした場合は、それまでに読み込んだ分だけを反映する。
+        スナップショットの照合中なら、照合をやめてスキャンし直す。
+        """
+        self.stop_snapshot_verification()
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        # スキャン中の変更はスキャン結果に含まれるので、監視は終わってから張り直す
+        self.stop_swf_dir_watch()
+        self.wait_for_watch_scan()
+
         # フォント名一覧更新処理中ダイアログを表示
         message = self.tr("progress.refresh_font_list.message")
-        progress = QProgressDialog(message, None, 0, 0, self)
+        progress = QProgressDialog(message, self.tr("buttons.cancel"), 0, 0, self)
         progress.setWindowTitle(self.tr("progress.working"))
         progress.setWindowModality(Qt.WindowModal)
+        progress.setAutoReset(False)
+        progress.setAutoClose(False)
+        progress.setMinimumDuration(0)
+
+        # 1. 一覧をクリアしてスキャン開始
+        self.scanned_swf_entries = []
+        self.list_widget_font_names.clear()
+
+        thread = SwfScanThread(self.controller, self.controller.library_roots(), self)
+        thread.batch_ready.connect(self.on_scan_batch_ready)
+        thread.preset_ready.connect(lambda: self.on_scan_preset_ready(progress))
+        thread.progress.connect(
+            lambda done, total: self.on_scan_progress(progress, done, total)
+        )
+        thread.finished.connect(lambda: self.on_scan_finished(thread, progress))
+        progress.canceled.connect(thread.cancel)
+        self.scan_thread = thread
         progress.show()
-        QGuiApplication.processEvents()
+        thread.start()
 
-        try:
-            # 1. フォルダスキャン実行
-            scan_start = time.perf_counter()
-            raw_list = self.controller.scan_swf_directory(swf_dir_path)
-            scan_elapsed_ms = (time.perf_counter() - scan_start) * 1000
-
-            # 2. UI表示向けにパスを正規化（Controllerに委譲）
-            new_list = self.controller.normalize_scan_results_for_ui(
-                raw_list, swf_dir_path
+    def verify_library_snapshot(self):
+        """スナップショットから表示した一覧を、バックグラウンドでディスクと照合する
+
+        進捗ダイアログは出さず、スキャンの間も操作できる。
+        終わったら変わったSWFだけを一覧に反映する。
+        """
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        self.stop_swf_dir_watch()
+        self.wait_for_watch_scan()
+        thread = SwfScanThread(
+            self.controller, self.controller.library_roots(), self, preset_first=False
+        )
+        thread.finished.connect(lambda: self.on_snapshot_verified(thread))
+        self.scan_thread = thread
+        self.snapshot_verify_thread = thread
+        thread.start()
+
+    def is_refreshing_font_list(self) -> bool:
+        """進捗ダイアログを出してスキャン中か（スナップショットの照合中は含まない）"""
+        return (
+            self.scan_thread is not None
+            and self.scan_thread.isRunning()
+            and self.scan_thread is not self.snapshot_verify_thread
+        )
+
+    def stop_snapshot_verification(self) -> bool:
+        """スナップショットの照合中であればキャンセルして終了を待つ。照合中だったら True
+
+        照合を終えたライブラリフォルダの結果はコントローラーに残るので、やり直しても読み直さない。
+        """
+        thread = self.snapshot_verify_thread
+        if thread is None or not thread.isRunning():
+            return False
+        thread.cancel()
+        thread.wait()
+        if self.scan_thread is thread:
+            self.scan_thread = None
+        self.snapshot_verify_thread = None
+        return True
+
+    def on_snapshot_verified(self, thread: SwfScanThread):
+        """スナップショットの照合が終わった。変わったSWFだけを一覧に反映する"""
+        if self.scan_thread is thread:
+            self.scan_thread = None
+        if self.snapshot_verify_thread is thread:
+            self.snapshot_verify_thread = None
+        if thread.is_cancelled():
+            # フォルダの切り替えやスキャンのために止めた。後始末は止めた側で行う
+            return
+        if thread.error:
+            print(f"{self.tr('errors.refresh_font_list_failed')} {thread.error}")
+        else:
+            stale, updated = self.controller.library_changes(self.scanned_swf_entries)
+            dprint(
+                self.tr(
+                    "debug.snapshot_verified",
+                    stale=len(stale),
+                    updated=len(updated),
+                    elapsed_ms=f"{thread.elapsed_ms:.1f}",
+                ),
+                self.debug,
             )
+            if stale or updated:
+                self.apply_scan_changes(stale, updated)
+            self.controller.save_library_snapshot()
+        self.cache.compact_if_needed()
+        self.update_swf_dir_watch()
+
+    def on_scan_progress(self, progress: QProgressDialog, done: int, total: int):
+        """スキャンの進捗をダイアログに反映する"""
+        if progress.wasCanceled():
+            return
+        progress.setMaximum(total)
+        progress.setValue(done)
+        progress.setLabelText(
+            self.tr("progress.refresh_font_list.message")
+            + self.tr("progress.refresh_font_list.count", done=done, total=total)
+        )
 
-            # 3. 保存と反映
-            self.scanned_swf_entries = new_list
-            self.cache.save()
+    def on_scan_batch_ready(self, entries: list):
+        """スキャン途中の結果をフォント一覧の末尾に追加する"""
+        self.scanned_swf_entries.extend(entries)
+        swf_to_fonts, _ = self.group_scan_entries(entries)
+        self.add_font_list_items(swf_to_fonts)
+        self.apply_font_list_filter(self.lineedit_font_search.text())
+
+    def on_scan_preset_ready(self, progress: QProgressDialog):
+        """プリセットが参照するSWFを読み終えた
+
+        見つかったフォントをマッピングの候補に反映し、進捗ダイアログをモードレスにして、
+        残りのスキャン中もプリセットの確認や出力をできるようにする。
+        """
+        _, all_fonts = self.group_scan_entries(self.scanned_swf_entries)
+        self.update_combos_with_detected(sorted(all_fonts))
+        if progress.isVisible() and not progress.wasCanceled():
+            # 表示中のダイアログはモーダル設定を変えられないので、一度隠してから出し直す
+            progress.hide()
+            progress.setWindowModality(Qt.NonModal)
+            progress.show()
+
+    def on_scan_finished(self, thread: SwfScanThread, progress: QProgressDialog):
+        """スキャン終了（完了・キャンセル・失敗）時の後処理"""
+        progress.close()
+        self.scan_thread = None
+        try:
+            # 2. 保存と反映。キャンセル時も読み込めた分はキャッシュに残す
+            # （変更はジャーナルに記録済み。たまっていれば本体へまとめる）
+            self.scanned_swf_entries.sort(
+                key=lambda x: (Path(x["swf_path"]).name, x["swf_path"])
+            )
+            self.controller.update_coverage_matrix(self.scanned_swf_entries)
+            self.cache.compact_if_needed()
+            self.controller.save_library_snapshot()
             dprint(
                 self.tr(
-                    "debug.scan_completed",
+                    (
+                        "debug.scan_cancelled"
+                        if thread.is_cancelled()
+                        else "debug.scan_completed"
+                    ),
                     file_count=len(self.scanned_swf_entries),
-                    elapsed_ms=f"{scan_elapsed_ms:.1f}",
+                    elapsed_ms=f"{thread.elapsed_ms:.1f}",
                 ),
                 self.debug,
             )
 
             # UI反映
             self.refresh_ui_from_scan_results()
-
+            self.update_swf_dir_watch()
         except Exception as e:
+            thread.error = thread.error or e
+
+        if thread.error:
             msg = self.tr("errors.refresh_font_list_failed")
-            print(f"{msg} {e}")
-            import traceback
+            print(f"{msg} {thread.error}")
+            QMessageBox.critical(
+                self, self.tr("common.error"), f"{msg}\n{thread.error}"
+            )
 
-            traceback.print_exc()
-            QMessageBox.critical(self, self.tr("common.error"), f"{msg}\n{e}")
-        finally:
-            progress.close()
+    def on_watch_swf_dir_toggled(self, checked: bool):
+        """SWFフォルダ監視チェックボックス切り替え時のアクション"""
+        self.settings.watch_swf_dir = checked
+        self.settings.save()
+        self.update_swf_dir_watch()
+
+    def stop_swf_dir_watch(self):
+        """SWFフォルダの監視をやめる"""
+        self.watch_timer.stop()
+        watched = self.swf_dir_watcher.directories() + self.swf_dir_watcher.files()
+        if watched:
+            self.swf_dir_watcher.removePaths(watched)
+
+    def update_swf_dir_watch(self):
+        """監視が有効なら、全ライブラリフォルダで直近の走査で見つけたディレクトリとSWFを監視対象にし直す"""
+        self.stop_swf_dir_watch()
+        if not self.settings.watch_swf_dir or not self.settings.swf_dir:
+            return
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        paths = [
+            path
+            for root in self.controller.library_roots()
+            for path in self.controller.watch_paths(root)
+        ]
+        if paths:
+            # 監視できなかったパス（OSの上限など）は、そのディレクトリの変更を拾えないだけなので無視する
+            self.swf_dir_watcher.addPaths(paths)
+
+    def on_swf_dir_changed(self, path: str):
+        """監視中のフォルダ/SWFが変わった。続けて変わる間は待つ"""
+        self.watch_changed_paths.add(path)
+        self.watch_timer.start()
+
+    def on_watch_timeout(self):
+        """変更が落ち着いたら、変更が報告されたパスだけを SwfWatchScanThread で調べ直す"""
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            return
+        if self.watch_thread is not None:
+            # 反映中の変更が終わってから続きを調べる（on_watch_scan_finished）
+            return
+        roots = self.controller.library_roots()
+        if not roots:
+            self.stop_swf_dir_watch()
+            return
+        thread = SwfWatchScanThread(
+            self.controller, roots, self.watch_changed_paths, self
+        )
+        self.watch_changed_paths = set()
+        thread.finished.connect(lambda: self.on_watch_scan_finished(thread))
+        self.watch_thread = thread
+        thread.start()
+
+    def on_watch_scan_finished(self, thread: SwfWatchScanThread):
+        """追加・変更・削除されたSWFだけをフォント一覧に反映する"""
+        if self.watch_thread is not thread:
+            # 一覧を作り直すために待った（結果は root_results から反映済み）
+            return
+        self.watch_thread = None
+        if thread.error:
+            print(f"{self.tr('errors.refresh_font_list_failed')} {thread.error}")
+            return
+        if thread.stale or thread.updated:
+            self.apply_scan_changes(thread.stale, thread.updated)
+            self.cache.compact_if_needed()
+        # 新しくできたディレクトリやSWFも監視する
+        self.update_swf_dir_watch()
+        if self.watch_changed_paths:
+            # 調べている間に報告された変更
+            self.watch_timer.start()
+
+    def wait_for_watch_scan(self):
+        """監視で拾った変更を反映中であれば終わるのを待つ
+
+        一覧への反映は呼び出し側で行う（一覧を作り直す・スキャンし直す前に呼ぶ）。
+        """
+        thread = self.watch_thread
+        if thread is not None:
+            self.watch_thread = None
+            thread.wait()
+
+    def apply_scan_changes(self, stale: list, updated: list):
+        """スキャン結果の一部を差し替えて、フォント一覧とマッピングの候補に反映する
+
+        stale のパスのSWFを取り除き、updated のうちフォントが見つかったものを加える。
+        """
+        removed = set(stale)
+        self.scanned_swf_entries = [
+            entry
+            for entry in self.scanned_swf_entries
+            if entry["swf_path"] not in removed
+        ]
+        self.scanned_swf_entries.extend(e for e in updated if e["font_names"])
+        self.scanned_swf_entries.sort(
+            key=lambda x: (Path(x["swf_path"]).name, x["swf_path"])
+        )
+        self.controller.update_coverage_matrix(self.scanned_swf_entries)
+        self.refresh_ui_from_scan_results()
+
+    def wait_for_scan(self):
+        """スキャン中であればキャンセルして終了を待つ"""
+        self.wait_for_watch_scan()
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            self.scan_thread.cancel()
+            self.scan_thread.wait()
+            QApplication.processEvents()
 
     def setup_preset_selection(self, layout):
         """プリセット選択レイアウトのセットアップ"""
@@ -474,6 +956,23 @@ class MainWindow(QMainWindow):
         self.lineedit_font_search.textChanged.connect(self.on_font_search_text_changed)
         left_layout.addWidget(self.lineedit_font_search)
 
+        # 収録率フィルタ
+        self.combo_coverage_filter = QComboBox()
+        self.combo_coverage_filter.addItem(self.tr("font_list.coverage_filter.all"), "")
+        for block in coverage_blocks():
+            self.combo_coverage_filter.addItem(
+                self.tr(
+                    "font_list.coverage_filter.block",
+                    block=self.tr(f"font_list.coverage_block.{block}"),
+                    percent=f"{COVERAGE_FILTER_THRESHOLD:.0%}",
+                ),
+                block,
+            )
+        self.combo_coverage_filter.currentIndexChanged.connect(
+            lambda _: self.apply_font_list_filter(self.lineedit_font_search.text())
+        )
+        left_layout.addWidget(self.combo_coverage_filter)
+
         # フォントリスト
         self.list_widget_font_names = QListWidget()
         # 項目が選択されたらプレビューを更新するシグナルを接続
@@ -686,10 +1185,27 @@ class MainWindow(QMainWindow):
             return
 
         # SWFファイル名ごとにフォント名をグループ化
+        swf_to_fonts, all_fonts = self.group_scan_entries(self.scanned_swf_entries)
+
+        # UI反映: 階層構造で表示
+        self.list_widget_font_names.clear()
+        self.add_font_list_items(swf_to_fonts)
+
+        # コンボボックスの更新には全フォント名のフラットリストを渡す
+        self.update_combos_with_detected(sorted(all_fonts))
+
+        # 検索フィルターを再適用
+        self.apply_font_list_filter(self.lineedit_font_search.text())
+
+    def group_scan_entries(self, entries: list) -> tuple[dict, list]:
+        """スキャン結果をSWFの表示パスごとにまとめる
+
+        Returns: (表示パス -> {"fonts", "swf_path", "font_infos"}, 全フォント名のリスト)
+        """
         swf_to_fonts = {}
         all_fonts = []
 
-        for entry in self.scanned_swf_entries:
+        for entry in entries:
             if not isinstance(entry, dict):
                 continue
             swf_path_str = entry.get("swf_path", "")
@@ -698,7 +1214,7 @@ class MainWindow(QMainWindow):
 
             try:
                 swf_abs_path = self.controller.resolve_absolute_swf_path(swf_path_str)
-                swf_display_path = self.controller.to_relative_swf_path(swf_abs_path)
+                swf_display_path = self.controller.display_swf_path(swf_abs_path)
             except Exception:
                 swf_display_path = Path(swf_path_str).name
 
@@ -706,8 +1222,16 @@ class MainWindow(QMainWindow):
                 swf_to_fonts[swf_display_path] = {
                     "fonts": [],
                     "swf_path": swf_path_str,
+                    "font_infos": {},
                 }
 
+            # フォントごとの詳細情報（ツールチップ表示用）
+            for info in entry.get("fonts", []) or []:
+                if isinstance(info, dict) and info.get("name"):
+                    swf_to_fonts[swf_display_path]["font_infos"].setdefault(
+                        info["name"], info
+                    )
+
             # 【データ構造の柔軟な吸収】font_names (リスト) と font_name (文字列) の両方に対応
             fonts = entry.get("font_names", [entry.get("font_name")])
             # Noneを除去してリスト化
@@ -721,8 +1245,10 @@ class MainWindow(QMainWindow):
                 if font_name not in all_fonts:
                     all_fonts.append(font_name)
 
-        # UI反映: 階層構造で表示
-        self.list_widget_font_names.clear()
+        return swf_to_fonts, all_fonts
+
+    def add_font_list_items(self, swf_to_fonts: dict):
+        """group_scan_entries() の結果をフォント一覧の末尾に追加する"""
         for swf_display_path in sorted(swf_to_fonts.keys()):
             # SWFファイル名を追加（選択不可）
             swf_item = QListWidgetItem(f"{SWF_FILE_LINE_PREFIX}{swf_display_path}")
@@ -736,13 +1262,39 @@ class MainWindow(QMainWindow):
                     Qt.UserRole,
                     swf_to_fonts[swf_display_path]["swf_path"],
                 )
+                font_info = swf_to_fonts[swf_display_path]["font_infos"].get(font_name)
+                if font_info:
+                    font_item.setToolTip(
+                        self.format_font_info_tooltip(
+                            font_info,
+                            self.controller.coverage_matrix.row(
+                                (swf_to_fonts[swf_display_path]["swf_path"], font_name)
+                            ),
+                        )
+                    )
                 self.list_widget_font_names.addItem(font_item)
 
-        # コンボボックスの更新には全フォント名のフラットリストを渡す
-        self.update_combos_with_detected(sorted(all_fonts))
-
-        # 検索フィルターを再適用
-        self.apply_font_list_filter(self.lineedit_font_search.text())
+    def format_font_info_tooltip(
+        self, font_info: dict, coverage_ratios: dict | None = None
+    ) -> str:
+        """キャッシュ済みのフォント情報からツールチップ文字列を生成する。"""
+        text = self.tr(
+            "font_list.font_info_tooltip",
+            font_id=font_info.get("font_id", ""),
+            display_name=font_info.get("display_name") or "-",
+            bold=font_info.get("bold", False),
+            italic=font_info.get("italic", False),
+            small_text=font_info.get("small_text", False),
+            language_code=font_info.get("language_code", 0),
+            glyph_count=font_info.get("glyph_count", 0),
+            copyright=font_info.get("copyright") or "-",
+        )
+        if coverage_ratios:
+            text += "\n" + " / ".join(
+                f"{self.tr(f'font_list.coverage_block.{block}')}: {ratio:.1%}"
+                for block, ratio in coverage_ratios.items()
+            )
+        return text
 
     def on_font_search_text_changed(self, text: str):
         """フォント名検索の入力変更時にリストを絞り込む"""
@@ -751,6 +1303,14 @@ class MainWindow(QMainWindow):
     def apply_font_list_filter(self, search_text: str):
         """フォント名リストを検索文字列でフィルタする。"""
         keyword = (search_text or "").strip().lower()
+        # 収録率フィルタ（選択中の文字ブロックを一定以上収録しているフォントのみ表示）
+        coverage_block = self.combo_coverage_filter.currentData()
+        covering = None
+        if coverage_block:
+            covering = self.controller.fonts_covering_block(
+                coverage_block, COVERAGE_FILTER_THRESHOLD
+            )
+        filtering = bool(keyword) or covering is not None
 
         current_swf_item = None
         current_swf_name = ""
@@ -763,7 +1323,7 @@ class MainWindow(QMainWindow):
 
             if item_text.startswith(SWF_FILE_LINE_PREFIX):
                 if current_swf_item is not None:
-                    if keyword:
+                    if filtering:
                         current_swf_item.setHidden(not current_swf_has_visible_font)
                     else:
                         current_swf_item.setHidden(False)
@@ -786,12 +1346,14 @@ class MainWindow(QMainWindow):
                 or current_swf_name_matches
                 or (keyword in font_name.lower())
             )
+            if is_match and covering is not None:
+                is_match = (str(item.data(Qt.UserRole)), font_name) in covering
             item.setHidden(not is_match)
             if is_match:
                 current_swf_has_visible_font = True
 
         if current_swf_item is not None:
-            if keyword:
+            if filtering:
                 current_swf_item.setHidden(not current_swf_has_visible_font)
             else:
                 current_swf_item.setHidden(False)
@@ -1070,12 +1632,18 @@ class MainWindow(QMainWindow):
 
         try:
             swf_abs = self.controller.resolve_absolute_swf_path(found_swf_path)
-            swf_display = self.controller.to_relative_swf_path(swf_abs)
+            swf_display = self.controller.display_swf_path(swf_abs)
         except Exception:
             swf_display = Path(found_swf_path).name
 
         return f"{font_name} ({swf_display})"
 
+    def format_missing_chars(self, missing_chars: str, limit: int = 30) -> str:
+        """未収録文字をダイアログ表示用に先頭 limit 文字までに切り詰める。"""
+        if len(missing_chars) <= limit:
+            return missing_chars
+        return f"{missing_chars[:limit]}…"
+
     def setup_validnamechars_input(self, layout):
         """validNameChars入力レイアウトのセットアップ"""
         hboxlayout_validnamechars = QHBoxLayout()
@@ -1143,6 +1711,33 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.No:
                 return
 
+        # バリデーション（validNameChars が割り当てフォントに収録されているか）
+        uncovered = self.controller.find_uncovered_validnamechars()
+        if uncovered:
+            warning_msg = self.tr(
+                "dialog.validnamechars_uncovered.message_header"
+            ) + "\n".join(
+                [
+                    self.tr(
+                        "dialog.validnamechars_uncovered.line",
+                        map_name=map_name,
+                        font_name=font_name,
+                        count=len(missing_chars),
+                        chars=self.format_missing_chars(missing_chars),
+                    )
+                    for map_name, font_name, missing_chars in uncovered
+                ]
+            )
+            reply = QMessageBox.warning(
+                self,
+                self.tr("dialog.validnamechars_uncovered.title"),
+                warning_msg,
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No,
+            )
+            if reply == QMessageBox.No:
+                return
+
         # 出力先選択
         initial_dir = str(self.settings.output_dir) if self.settings.output_dir else "."
         selected_dir = QFileDialog.getExistingDirectory(
@@ -1190,7 +1785,9 @@ class MainWindow(QMainWindow):
                     )
                     return
 
-            out_file = self.controller.generate_preset(Path(selected_dir), use_fallback)
+            out_file = self.controller.generate_preset(
+                Path(selected_dir), use_fallback, uncovered
+            )
             dprint(self.tr("debug.generate_success", output=out_file), self.debug)
 
             msg_box = QMessageBox(self)
@@ -1245,7 +1842,6 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """閉じる時の保存確認"""
-
         if self.preset_is_dirty:
             reply = QMessageBox.question(
                 self,
@@ -1265,6 +1861,15 @@ class MainWindow(QMainWindow):
         else:
             event.accept()
 
+        # 終了時はスキャンを止め、キャッシュのジャーナルを本体へまとめておく
+        # （閉じるのをやめた場合は、スキャンもスナップショットの照合もそのまま続ける）
+        if event.isAccepted():
+            self.wait_for_scan()
+            self.stop_swf_dir_watch()
+            self.cache.save()
+            # 監視で反映した変更も含めて、次回の起動用に保存する
+            self.controller.save_library_snapshot()
+
     def check_environment(self):
         """環境チェック"""
         # FFDecが存在するか
@@ -1279,6 +1884,32 @@ class MainWindow(QMainWindow):
         return True
 
 
+def run_cache_maintenance(debug: bool = False, lang: str | None = None) -> int:
+    """キャッシュの状態を表示し、古いエントリの削除とジャーナルのまとめを行う。
+
+    `main.py --cache-maintenance` から呼ばれる。ウィンドウは開かない。
+    """
+    settings = Settings(Path(SETTINGS_FILE))
+    set_language(lang or settings.lang)
+    cache = Cache(Path(CACHE_FILE), legacy_path=Path(LEGACY_CACHE_FILE))
+    active_dir = Path(settings.swf_dir) if settings.swf_dir else None
+
+    def print_report(header_key: str):
+        print(tr(header_key))
+        print(tr("cache_maintenance.report", **cache.report(active_dir)))
+
+    print_report("cache_maintenance.before")
+    # 登録済みのライブラリフォルダはどれも使用中として扱う
+    evicted = cache.compact(
+        active_dir, keep_dirs=[Path(d) for d in settings.swf_dirs if d]
+    )
+    if evicted < 0:
+        return 1
+    print(tr("cache_maintenance.evicted", count=evicted))
+    print_report("cache_maintenance.after")
+    return 0
+
+
 def run_app(app: QApplication = None, debug: bool = False, lang: str | None = None):
     """アプリケーションを起動するユーティリティ。
 
@@ -1440,11 +2071,15 @@ def run_app(app: QApplication = None, debug: bool = False, lang: str | None = No
         preset_path = DEFAULT_PRESET_FILE
 
     # 3. プリセットとキャッシュを読み込み
+    # （キャッシュの中身は初めて使うときに読む。起動直後の一覧はスナップショットから作る）
     preset = Preset(preset_path)
-    cache = Cache(Path(CACHE_FILE))
+    cache = Cache(Path(CACHE_FILE), legacy_path=Path(LEGACY_CACHE_FILE))
+    snapshot = LibrarySnapshot(Path(LIBRARY_SNAPSHOT_FILE))
 
     # 4. ウィンドウを生成して表示
-    window = MainWindow(settings=settings, preset=preset, cache=cache, debug=debug)
+    window = MainWindow(
+        settings=settings, preset=preset, cache=cache, debug=debug, snapshot=snapshot
+    )
     if window.startup_aborted:
         return 1
     window.show()
@@ -1,79 +1,659 @@
-from datetime import datetime
+import json
+import os
+import threading
+import time
 from pathlib import Path
-
-import yaml
+from typing import Iterable
 
 from src.const import (
+    CACHE_JOURNAL_COMPACT_THRESHOLD,
+    CACHE_MAX_INACTIVE_ENTRIES,
+    CACHE_ROOT_TOUCH_INTERVAL,
     ENCODE,
-    TIME_FORMAT,
 )
+from src.models.cache_backend import (
+    ROOT_KEY_SEPARATOR,
+    CacheBackend,
+    YamlCacheBackend,
+    backend_for,
+)
+from src.modules.glyph_coverage import decode_coverage, encode_coverage, missing_chars
+from src.modules.swf_archive import stat_swf
 
 
 class Cache:
-    def __init__(self, cache_path: Path):
-        self.cache_path = cache_path
-        self.load()
+    def __init__(
+        self,
+        cache_path: Path,
+        backend: CacheBackend | None = None,
+        legacy_path: Path | None = None,
+    ):
+        """
+        cache_path の拡張子で保存形式を選ぶ（.yml は YAML、それ以外は SQLite）。
+        backend を渡した場合はそちらを使う。
+        legacy_path に旧形式の cache.yml を渡すと、cache_path が無いときに一度だけ移行する。
+
+        読み込みは data などに初めて触れたときに行う。
+        更新内容はまず「cache_path + .journal」に追記し、save() で本体へまとめて書き込む。
+        途中で異常終了しても、次回の読み込み時にジャーナルから復元される。
+        """
+        self.cache_path = Path(cache_path)
+        self.backend = backend or backend_for(self.cache_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self._data = None
+        # エントリのキー -> エントリ の索引（data と同じ dict を指す）
+        # キーはライブラリフォルダごとに分ける（_partition_key() を参照）
+        self._index = {}
+        # 内容ハッシュ -> エントリ の索引（移動・名前変更されたSWFの再利用に使う）
+        self._hash_index = {}
+        # 内容ハッシュを持つエントリのファイルサイズ（ハッシュを計算する価値があるかの判定用）
+        self._hashed_sizes = set()
+        # 前回の保存から変更のあったエントリのキー
+        self._dirty = set()
+        # 前回の保存から削除したエントリのキー
+        self._removed = set()
+        # ライブラリフォルダ(正規化した絶対パス) -> 最終使用日時（古いものから削除するため）
+        self._roots = {}
+        self._roots_dirty = False
+        # swf_dir -> 正規化した絶対パス（resolve の結果を使い回す）
+        self._root_keys = {}
+        # True なら次の保存で全体を書き直す
+        self._full_rewrite = False
+        self._load_lock = threading.Lock()
+        # 複数のライブラリフォルダを並行してスキャンするときに、索引の更新が重ならないようにする
+        self._lock = threading.RLock()
+        # 追記専用のジャーナル（本体へ書き込むまでの変更履歴）
+        self.journal_path = self.cache_path.with_name(self.cache_path.name + ".journal")
+        self._journal = None
+        self._journal_count = 0
+        self._journal_lock = threading.Lock()
+
+    @property
+    def data(self) -> list:
+        """キャッシュのエントリ一覧（保存される形式そのまま）"""
+        self._ensure_loaded()
+        return self._data
+
+    def _ensure_loaded(self):
+        """まだ読み込んでいなければ読み込む（GUIとスキャンスレッドのどちらからでも可）"""
+        if self._data is None:
+            with self._load_lock:
+                if self._data is None:
+                    self.load()
+
+    @data.setter
+    def data(self, value: list):
+        # 丸ごと差し替えられた場合は索引を作り直し、次の保存で全体を書き直す
+        self._set_data(value)
+        self._full_rewrite = True
+
+    def _set_data(self, value: list):
+        index = {}
+        self._hash_index = {}
+        self._hashed_sizes = set()
+        for entry in value:
+            if isinstance(entry, dict) and entry.get("swf_path"):
+                # 重複したエントリがある場合は先頭を使う
+                index.setdefault(self._entry_key(entry), entry)
+                self._add_to_hash_index(entry)
+        self._index = index
+        self._dirty = set()
+        self._removed = set()
+        self._data = value
+
+    @staticmethod
+    def _normalize_key(swf_path: str) -> str:
+        """索引のキー。OSごとの大文字小文字の扱いと区切り文字の違いを吸収する"""
+        return os.path.normcase(str(swf_path)).replace("\\", "/")
+
+    @classmethod
+    def _partition_key(cls, root: str | None, rel_path: str) -> str:
+        """索引のキー。ライブラリフォルダ(root)ごとに分け、記録が無い古いエントリは swf_path だけ
+
+        別のライブラリフォルダに同じ相対パスのSWFがあっても、互いのエントリを上書きしない。
+        """
+        key = cls._normalize_key(rel_path)
+        return key if root is None else f"{root}{ROOT_KEY_SEPARATOR}{key}"
+
+    @classmethod
+    def _entry_key(cls, entry: dict) -> str:
+        return cls._partition_key(entry.get("root"), entry["swf_path"])
+
+    def _lookup_key(self, swf_path: Path, swf_dir: Path) -> str:
+        """swf_dir にある swf_path のエントリのキーを返す
+
+        ライブラリフォルダの記録が無い古いエントリがあればそのキーを、
+        どちらも無ければ swf_dir のキーを返す。
+        """
+        rel_path = self._to_rel_path(swf_path, swf_dir)
+        key = self._partition_key(self._root_key(swf_dir), rel_path)
+        if key not in self._index:
+            legacy_key = self._normalize_key(rel_path)
+            legacy = self._index.get(legacy_key)
+            if legacy is not None and legacy.get("root") is None:
+                return legacy_key
+        return key
+
+    def _rekey(self, key: str, entry: dict) -> str:
+        """root を記録した古いエントリを、ライブラリフォルダ付きのキーへ移して新しいキーを返す"""
+        new_key = self._entry_key(entry)
+        if new_key != key:
+            del self._index[key]
+            self._index[new_key] = entry
+            self._dirty.discard(key)
+            self._removed.add(key)
+            self._append_journal(key, None)
+        return new_key
+
+    def _root_key(self, swf_dir: Path) -> str:
+        """エントリの root に記録する、ライブラリフォルダの正規化した絶対パス"""
+        root = self._root_keys.get(str(swf_dir))
+        if root is None:
+            try:
+                resolved = Path(swf_dir).resolve()
+            except OSError:
+                resolved = Path(swf_dir)
+            root = self._normalize_key(resolved)
+            self._root_keys[str(swf_dir)] = root
+        return root
+
+    def _add_to_hash_index(self, entry: dict):
+        if entry.get("hash"):
+            self._hash_index[entry["hash"]] = entry
+            if "size" in entry:
+                self._hashed_sizes.add(entry["size"])
+
+    def has_hash_for_size(self, size: int) -> bool:
+        """同じサイズで内容ハッシュを持つエントリがあるか
+
+        無ければ、そのファイルのハッシュを計算しても既存の解析結果は見つからない。
+        """
+        self._ensure_loaded()
+        return size in self._hashed_sizes
+
+    def find_by_hash(self, content_hash: str) -> dict | None:
+        """内容ハッシュが一致するエントリを返す。無ければ None"""
+        self._ensure_loaded()
+        entry = self._hash_index.get(content_hash)
+        # エントリの内容が後から変わっていれば使わない
+        if entry is None or entry.get("hash") != content_hash:
+            return None
+        return entry
+
+    def get_entry(self, swf_path: Path, swf_dir: Path | None = None) -> dict | None:
+        """swf_path のキャッシュエントリを返す。無ければ None
+
+        swf_dir を渡した場合は swf_dir のエントリを swf_dir からの相対パスで引く。
+        """
+        self._ensure_loaded()
+        if swf_dir is None:
+            return self._index.get(self._normalize_key(swf_path))
+        return self._index.get(self._lookup_key(swf_path, swf_dir))
 
     def load(self):
-        """YAMLファイルからキャッシュを読み込む"""
-        self.data = []
-        if self.cache_path.exists():
+        """保存先からキャッシュを読み込む。旧形式の cache.yml しか無ければ移行する"""
+        self._set_data([])
+        self._full_rewrite = False
+        self._journal_count = 0
+        self._roots = {}
+        self._roots_dirty = False
+        if not self.backend.exists() and self._migrate_legacy():
+            return
+        if self.backend.exists():
             try:
-                with open(self.cache_path, "r", encoding=ENCODE) as f:
-                    loaded_data = yaml.safe_load(f) or []
-                    if isinstance(loaded_data, list):
-                        self.data = loaded_data
+                self._set_data(self.backend.load())
+                self._roots = self.backend.load_roots()
             except Exception as e:
                 print(f"キャッシュの読み込みに失敗しました: {e}")
+        self._replay_journal()
 
-    def save(self):
-        """YAMLファイルにキャッシュを保存する"""
-        try:
-            # 親ディレクトリがなければ作成
-            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_path, "w", encoding=ENCODE) as f:
-                # Dumper を指定して、アンカー/エイリアスを無効化する
-                class NoAliasDumper(yaml.SafeDumper):
-                    def ignore_aliases(self, data):
-                        return True
-
-                yaml.dump(
-                    self.data,
-                    f,
-                    Dumper=NoAliasDumper,
-                    allow_unicode=True,
-                    sort_keys=False,
-                )
-        except Exception as e:
-            print(f"キャッシュの保存に失敗しました: {e}")
+    def _replay_journal(self):
+        """前回本体へ書き込めなかったジャーナルの内容を反映する
 
-    def update(self, swf_path: Path, font_names: list, swf_dir: Path):
-        """解析したフォント名とそのフォントSWFパスをキャッシュに保存/更新する"""
-        # 絶対パスをswf_dirからの相対パスに変換して保存することで、環境が変わってもキャッシュが有効になるようにする
+        ここではジャーナルへ書き込まない（読みながら追記すると終わらなくなる）。
+        """
+        if not self.journal_path.exists():
+            return
+        valid_size = 0
         try:
-            rel_path = str(swf_path.relative_to(swf_dir))
-        except ValueError:
-            rel_path = str(swf_path)
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line.decode(ENCODE))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        # 書き込み途中で終了した行。以降は信用しない
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+                    self._apply_journal_record(record)
+                    valid_size += len(line)
+            # 途中で切れた行を残すと、次の追記がその行に続いてしまうので切り詰める
+            if valid_size != self.journal_path.stat().st_size:
+                os.truncate(self.journal_path, valid_size)
+        except OSError as e:
+            print(f"キャッシュの読み込みに失敗しました: {e}")
+
+    def _apply_journal_record(self, record: dict):
+        key = record["key"]
+        entry = record["entry"]
+        if entry is None:
+            # 削除したエントリ
+            self._remove_keys([key], journal=False)
+            self._journal_count += 1
+            return
+        existing = self._index.get(key)
+        if existing is not None:
+            # 索引と data が同じ dict を指しているので、中身だけを差し替える
+            existing.clear()
+            existing.update(entry)
+            entry = existing
+        else:
+            self._data.append(entry)
+            self._index[key] = entry
+        self._add_to_hash_index(entry)
+        self._dirty.add(key)
+        self._journal_count += 1
 
-        modified_date = datetime.fromtimestamp(swf_path.stat().st_mtime).strftime(
-            TIME_FORMAT
+    def _append_journal(self, key: str, entry: dict | None):
+        """変更したエントリをジャーナルに追記する（スキャンスレッドからも呼ばれる）
+
+        entry が None なら、そのキーのエントリを削除したことを記録する。
+        """
+        line = json.dumps({"key": key, "entry": entry}, ensure_ascii=False)
+        with self._journal_lock:
+            try:
+                if self._journal is None:
+                    self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._journal = open(self.journal_path, "a", encoding=ENCODE)
+                self._journal.write(line + "\n")
+                self._journal.flush()
+            except OSError as e:
+                print(f"キャッシュの保存に失敗しました: {e}")
+                return
+            self._journal_count += 1
+
+    def _clear_journal(self):
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_count = 0
+
+    def _migrate_legacy(self) -> bool:
+        """旧形式の cache.yml を読み込んで現在の保存先へ書き出す。移行したら True"""
+        if not self.legacy_path or not self.legacy_path.exists():
+            return False
+        if self.legacy_path.resolve() == self.cache_path.resolve():
+            return False
+        try:
+            self._set_data(YamlCacheBackend(self.legacy_path).load())
+        except Exception as e:
+            print(f"キャッシュの読み込みに失敗しました: {e}")
+            return False
+        self._full_rewrite = True
+        if not self.save():
+            return True
+        # 移行元は念のため残しておき、次回以降は読まない
+        self.legacy_path.replace(
+            self.legacy_path.with_name(self.legacy_path.name + ".migrated")
         )
+        print(f"キャッシュを {self.cache_path.name} に移行しました。")
+        return True
+
+    def compact_if_needed(
+        self, threshold: int = CACHE_JOURNAL_COMPACT_THRESHOLD
+    ) -> bool:
+        """ジャーナルが threshold 件以上たまっていれば save() で本体へまとめる"""
+        if self._journal_count < threshold:
+            return True
+        return self.save()
+
+    def save(self) -> bool:
+        """ジャーナルにたまった変更を本体へ書き込み、ジャーナルを空にする（コンパクション）
+
+        前回の保存から変更のあったエントリだけを書き込む。
+        変更が無ければ何もしない。保存できたら True を返す。
+        """
+        if self._data is None:
+            # 一度も読み込んでいなければ変更も無い
+            return True
+        entries_changed = self._full_rewrite or self._dirty or self._removed
+        if not entries_changed and not self._roots_dirty:
+            return True
+        # YAML は差分を書けないので常に全体を書き出す
+        full = self._full_rewrite or isinstance(self.backend, YamlCacheBackend)
+        with self._lock:
+            if full:
+                items = list(self._index.items())
+            else:
+                items = [(key, self._index[key]) for key in self._dirty]
+            try:
+                if entries_changed:
+                    self.backend.save(items, full=full, removed=self._removed)
+                if self._roots_dirty:
+                    self.backend.save_roots(self._roots)
+            except Exception as e:
+                print(f"キャッシュの保存に失敗しました: {e}")
+                return False
+            self._dirty = set()
+            self._removed = set()
+            self._full_rewrite = False
+            self._roots_dirty = False
+            self._clear_journal()
+        return True
+
+    def update(
+        self,
+        swf_path: Path,
+        font_names: list,
+        swf_dir: Path,
+        fonts: list | None = None,
+        coverage: dict | None = None,
+        st: os.stat_result | None = None,
+        content_hash: str | None = None,
+        error: str = "",
+    ):
+        """解析したフォント名とそのフォントSWFパスをキャッシュに保存/更新する
+
+        fonts には FontInfo.to_dict() のリストを渡す（太字/斜体/グリフ数などの詳細情報）。
+        coverage には フォント名 -> 収録文字のビット集合(int) を渡す。
+        st には走査時に取得済みの os.stat() の結果を渡せる（無ければここで stat する）。
+        content_hash にはファイル内容のハッシュを渡す。None なら既存の値を残す。
+        font_names が空（フォントを含まないSWF）でも記録し、次回以降の解析を省く。
+        error には解析に失敗した理由を渡す（失敗していなければ空文字列）。
+        アーカイブ内のSWF（st が CRC-32 を持つ）は crc も記録する。
+        内容が変わらない場合は保存対象にしない。
+        """
+        rel_path = self._to_rel_path(swf_path, swf_dir)
+        root = self._root_key(swf_dir)
+        encoded_coverage = {
+            name: encode_coverage(bits) for name, bits in (coverage or {}).items()
+        }
+        if st is None:
+            st = stat_swf(swf_path)
+        crc = getattr(st, "crc", None)
 
         # キャッシュ内に同じswf_pathがあれば更新、なければ追加
-        found = False
-        for entry in self.data:
-            if entry["swf_path"] == rel_path:
-                entry["modified_date"] = modified_date
-                entry["font_names"] = font_names
-                found = True
-                break
-
-        if not found:
-            self.data.append(
-                {
+        self._ensure_loaded()
+        with self._lock:
+            key = self._lookup_key(swf_path, swf_dir)
+            entry = self._index.get(key)
+            if entry is not None:
+                new_values = {
+                    "root": root,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "font_names": font_names,
+                    "fonts": fonts or [],
+                    "coverage": encoded_coverage,
+                }
+                if content_hash is not None:
+                    new_values["hash"] = content_hash
+                if crc is not None:
+                    new_values["crc"] = crc
+                if (
+                    all(entry.get(k) == v for k, v in new_values.items())
+                    and entry.get("error", "") == error
+                    and "modified_date" not in entry
+                ):
+                    return
+                entry.update(new_values)
+                # 秒単位の更新日時(旧形式)は size/mtime_ns に置き換える
+                entry.pop("modified_date", None)
+                if error:
+                    entry["error"] = error
+                else:
+                    entry.pop("error", None)
+                key = self._rekey(key, entry)
+            else:
+                entry = {
                     "swf_path": rel_path,
-                    "modified_date": modified_date,
+                    "root": root,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
                     "font_names": font_names,
-                    "hash": "",
+                    "fonts": fonts or [],
+                    "coverage": encoded_coverage,
+                    "hash": content_hash or "",
                 }
-            )
+                if crc is not None:
+                    entry["crc"] = crc
+                if error:
+                    entry["error"] = error
+                self._data.append(entry)
+                self._index[key] = entry
+            self._add_to_hash_index(entry)
+            self._dirty.add(key)
+            self._append_journal(key, entry)
+
+    def refresh_stat(self, swf_path: Path, swf_dir: Path, st: os.stat_result):
+        """キャッシュを使ったエントリのサイズと更新日時(ns)とライブラリフォルダを記録し直す
+
+        旧形式（modified_date のみ、root 無し）のエントリを新しい形式に置き換えるために使う。
+        既に一致していれば何もしない。
+        """
+        self._ensure_loaded()
+        with self._lock:
+            key = self._lookup_key(swf_path, swf_dir)
+            entry = self._index.get(key)
+            if entry is None:
+                return
+            root = self._root_key(swf_dir)
+            crc = getattr(st, "crc", None)
+            if (
+                entry.get("size") == st.st_size
+                and entry.get("mtime_ns") == st.st_mtime_ns
+                and entry.get("root") == root
+                and entry.get("crc") == crc
+                and "modified_date" not in entry
+            ):
+                return
+            entry["root"] = root
+            entry["size"] = st.st_size
+            entry["mtime_ns"] = st.st_mtime_ns
+            if crc is not None:
+                entry["crc"] = crc
+            else:
+                entry.pop("crc", None)
+            entry.pop("modified_date", None)
+            key = self._rekey(key, entry)
+            self._dirty.add(key)
+            self._append_journal(key, entry)
+
+    def _remove_keys(self, keys: Iterable[str], journal: bool = True) -> int:
+        """キーのエントリを削除し、削除した件数を返す"""
+        with self._lock:
+            removed = 0
+            for key in keys:
+                entry = self._index.pop(key, None)
+                if entry is None:
+                    continue
+                if entry.get("hash") and self._hash_index.get(entry["hash"]) is entry:
+                    del self._hash_index[entry["hash"]]
+                self._dirty.discard(key)
+                self._removed.add(key)
+                if journal:
+                    self._append_journal(key, None)
+                removed += 1
+            if removed:
+                # 索引に残っているものだけにする（重複していたエントリもここで消える）
+                live = {id(entry) for entry in self._index.values()}
+                self._data = [entry for entry in self._data if id(entry) in live]
+            return removed
+
+    def prune_missing(self, swf_dir: Path, seen_paths: Iterable[Path]) -> int:
+        """swf_dir のスキャンで見つからなかったエントリを削除し、削除した件数を返す
+
+        seen_paths には swf_dir を最後まで走査して見つかったSWFのパスを渡す。
+        別のライブラリフォルダのエントリや、フォルダの記録が無い古いエントリは残す。
+        """
+        self._ensure_loaded()
+        with self._lock:
+            root = self._root_key(swf_dir)
+            seen = {
+                self._partition_key(root, self._to_rel_path(p, swf_dir))
+                for p in seen_paths
+            }
+            stale = [
+                key
+                for key, entry in self._index.items()
+                if entry.get("root") == root and key not in seen
+            ]
+            return self._remove_keys(stale)
+
+    def remove_paths(self, swf_dir: Path, swf_paths: Iterable[Path]) -> int:
+        """swf_paths のエントリを削除し、削除した件数を返す"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._remove_keys([self._lookup_key(p, swf_dir) for p in swf_paths])
+
+    def entries_for_root(self, swf_dir: Path) -> list[dict]:
+        """swf_dir のキャッシュエントリを返す（ディスクを見ずに前回のスキャン結果を復元するため）"""
+        self._ensure_loaded()
+        root = self._root_key(swf_dir)
+        with self._lock:
+            return [e for e in self._index.values() if e.get("root") == root]
+
+    def touch_root(self, swf_dir: Path):
+        """swf_dir をスキャンしたことを記録する（使われていないフォルダの判定に使う）
+
+        前回の記録から CACHE_ROOT_TOUCH_INTERVAL 秒経っていなければ記録し直さない
+        （変更の無いスキャンのたびにフォルダの一覧を書き込まないため）。
+        """
+        self._ensure_loaded()
+        key = self._root_key(swf_dir)
+        now = time.time()
+        with self._lock:
+            last = self._roots.get(key)
+            if last is not None and now - last < CACHE_ROOT_TOUCH_INTERVAL:
+                return
+            self._roots[key] = now
+            self._roots_dirty = True
+
+    def evict_inactive(
+        self,
+        active_dir: Path | None,
+        max_entries: int = CACHE_MAX_INACTIVE_ENTRIES,
+        keep_dirs: Iterable[Path] = (),
+    ) -> int:
+        """active_dir と keep_dirs 以外のライブラリフォルダのエントリを max_entries 件までに減らす
+
+        最後にスキャンしてから時間が経っているフォルダのものから削除する
+        （フォルダの記録が無い古いエントリが最初）。削除した件数を返す。
+        """
+        self._ensure_loaded()
+        with self._lock:
+            active = {self._root_key(d) for d in (active_dir, *keep_dirs) if d}
+            keys_by_root = {}
+            for key, entry in self._index.items():
+                root = entry.get("root")
+                if root is None or root not in active:
+                    keys_by_root.setdefault(root, []).append(key)
+            excess = sum(len(keys) for keys in keys_by_root.values()) - max_entries
+            if excess <= 0:
+                return 0
+
+            stale = []
+            for root in sorted(
+                keys_by_root,
+                key=lambda r: -1.0 if r is None else self._roots.get(r, 0.0),
+            ):
+                stale.extend(keys_by_root[root][: excess - len(stale)])
+                if len(stale) >= excess:
+                    break
+            removed = self._remove_keys(stale)
+
+            # エントリが無くなったフォルダの記録も消す
+            remaining = {entry.get("root") for entry in self._index.values()}
+            for root in list(self._roots):
+                if root not in active and root not in remaining:
+                    del self._roots[root]
+                    self._roots_dirty = True
+            return removed
+
+    def report(self, active_dir: Path | None = None) -> dict:
+        """キャッシュの状態を集計して返す（メンテナンス用）
+
+        Returns: {"entries": 全件数, "active": active_dir のエントリ数,
+                  "inactive": それ以外, "roots": ライブラリフォルダ数,
+                  "fontless": フォントが無いSWF数, "errors": 解析に失敗したSWF数,
+                  "journal": 本体へまとめていない変更の件数, "file_size": 保存先の合計バイト数}
+        """
+        self._ensure_loaded()
+        active = self._root_key(active_dir) if active_dir else None
+        with self._lock:
+            entries = list(self._index.values())
+        roots = {entry.get("root") for entry in entries} - {None}
+        active_count = sum(
+            1 for entry in entries if active and entry.get("root") == active
+        )
+        file_size = 0
+        for path in (self.cache_path, self.journal_path):
+            try:
+                file_size += path.stat().st_size
+            except OSError:
+                pass
+        return {
+            "entries": len(entries),
+            "active": active_count,
+            "inactive": len(entries) - active_count,
+            "roots": len(roots),
+            "fontless": sum(
+                1 for e in entries if not e.get("font_names") and not e.get("error")
+            ),
+            "errors": sum(1 for e in entries if e.get("error")),
+            "journal": self._journal_count,
+            "file_size": file_size,
+        }
+
+    def compact(
+        self,
+        active_dir: Path | None = None,
+        max_inactive: int = CACHE_MAX_INACTIVE_ENTRIES,
+        keep_dirs: Iterable[Path] = (),
+    ) -> int:
+        """使われていないフォルダのエントリを減らし、ジャーナルを本体へまとめて保存先を詰める
+
+        keep_dirs のフォルダのエントリは active_dir と同じく減らさない。
+        削除した件数を返す。保存に失敗した場合は -1。
+        """
+        evicted = self.evict_inactive(active_dir, max_inactive, keep_dirs)
+        if not self.save():
+            return -1
+        try:
+            self.backend.vacuum()
+        except Exception as e:
+            print(f"キャッシュの最適化に失敗しました: {e}")
+        return evicted
+
+    def _to_rel_path(self, swf_path: Path, swf_dir: Path) -> str:
+        # 絶対パスをswf_dirからの相対パスに変換して保存することで、環境が変わってもキャッシュが有効になるようにする
+        try:
+            return str(swf_path.relative_to(swf_dir))
+        except ValueError:
+            pass
+        # シンボリックリンクや相対指定の違いを吸収してもう一度試す
+        try:
+            return str(Path(swf_path).resolve().relative_to(Path(swf_dir).resolve()))
+        except (ValueError, OSError):
+            return str(swf_path)
+
+    def get_coverage(self, swf_path: Path, swf_dir: Path, font_name: str) -> int | None:
+        """キャッシュ済みのフォントの収録文字（ビット集合）を返す。未解析なら None"""
+        entry = self.get_entry(swf_path, swf_dir)
+        if entry is None:
+            return None
+        encoded = (entry.get("coverage") or {}).get(font_name)
+        if encoded is None:
+            return None
+        return decode_coverage(encoded)
+
+    def missing_chars(
+        self, swf_path: Path, swf_dir: Path, font_name: str, text: str
+    ) -> str | None:
+        """text のうち指定フォントに収録されていない文字を返す。未解析なら None"""
+        coverage = self.get_coverage(swf_path, swf_dir, font_name)
+        if coverage is None:
+            return None
+        return missing_chars(coverage, text)
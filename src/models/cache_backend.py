@@ -0,0 +1,179 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import yaml
+
+from src.const import ENCODE
+
+# エントリのキーで、ライブラリフォルダ(root)と swf_path を区切る文字
+ROOT_KEY_SEPARATOR = "|"
+
+# PyYAML が libyaml 付きでビルドされていれば C 実装を使う
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class CacheBackend:
+    """キャッシュエントリの保存先
+
+    エントリは (キー, エントリの辞書) の組で受け渡す。キーは Cache が正規化した swf_path で、
+    ライブラリフォルダ(root)を記録したエントリは「root|swf_path」。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> list[dict]:
+        """保存されている全エントリを保存順に返す"""
+        raise NotImplementedError
+
+    def save(self, items: list[tuple[str, dict]], full: bool, removed=()):
+        """エントリを保存する
+
+        full=True なら items で全体を置き換える。
+        full=False なら items を追加/更新し、removed のキーを削除する。
+        """
+        raise NotImplementedError
+
+    def load_roots(self) -> dict[str, float]:
+        """ライブラリフォルダごとの最終使用日時(UNIX時間)を返す。保存できない形式なら空"""
+        return {}
+
+    def save_roots(self, roots: dict[str, float]):
+        """ライブラリフォルダごとの最終使用日時を保存する（全体を置き換える）"""
+
+    def vacuum(self):
+        """削除したエントリの分だけ保存先を小さくする。できない形式なら何もしない"""
+
+
+class YamlCacheBackend(CacheBackend):
+    """cache.yml 形式（1.0系の形式）。差分保存はできないため常に全体を書き出す"""
+
+    def load(self) -> list[dict]:
+        with open(self.path, "r", encoding=ENCODE) as f:
+            loaded_data = yaml.load(f, Loader=_YamlLoader) or []
+        return loaded_data if isinstance(loaded_data, list) else []
+
+    def save(self, items: list[tuple[str, dict]], full: bool, removed=()):
+        # 親ディレクトリがなければ作成
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding=ENCODE) as f:
+            # Dumper を指定して、アンカー/エイリアスを無効化する
+            class NoAliasDumper(yaml.SafeDumper):
+                def ignore_aliases(self, data):
+                    return True
+
+            yaml.dump(
+                [entry for _, entry in items],
+                f,
+                Dumper=NoAliasDumper,
+                allow_unicode=True,
+                sort_keys=False,
+            )
+
+
+class SqliteCacheBackend(CacheBackend):
+    """SQLite 形式。1エントリ1行で、変更のあった行だけを書き込む"""
+
+    # スキーマを変えたら上げること
+    SCHEMA_VERSION = 3
+
+    def _connect(self) -> sqlite3.Connection:
+        # スキャンスレッドからも使うので、接続は操作ごとに開いて閉じる
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            if version not in (1, 2):
+                conn.execute("DROP TABLE IF EXISTS entries")
+                conn.execute(
+                    "CREATE TABLE entries (key TEXT PRIMARY KEY, entry TEXT NOT NULL)"
+                )
+            else:
+                self._migrate_keys(conn)
+            # 1 からはエントリを残したまま roots を追加する
+            if version != 2:
+                conn.execute("DROP TABLE IF EXISTS roots")
+                conn.execute(
+                    "CREATE TABLE roots (root TEXT PRIMARY KEY, last_used REAL NOT NULL)"
+                )
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.commit()
+        return conn
+
+    @staticmethod
+    def _migrate_keys(conn: sqlite3.Connection):
+        """2 までのキー(swf_path のみ)を、root を記録したエントリだけ「root|swf_path」にする"""
+        rows = conn.execute("SELECT key, entry FROM entries").fetchall()
+        conn.executemany(
+            "UPDATE entries SET key = ? WHERE key = ?",
+            (
+                (f"{root}{ROOT_KEY_SEPARATOR}{key}", key)
+                for key, entry in rows
+                if (root := json.loads(entry).get("root"))
+            ),
+        )
+
+    def load(self) -> list[dict]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT entry FROM entries ORDER BY rowid").fetchall()
+        finally:
+            conn.close()
+        return [json.loads(entry) for (entry,) in rows]
+
+    def save(self, items: list[tuple[str, dict]], full: bool, removed=()):
+        conn = self._connect()
+        try:
+            with conn:
+                if full:
+                    conn.execute("DELETE FROM entries")
+                conn.executemany(
+                    "DELETE FROM entries WHERE key = ?", ((key,) for key in removed)
+                )
+                conn.executemany(
+                    "INSERT INTO entries (key, entry) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET entry = excluded.entry",
+                    (
+                        (key, json.dumps(entry, ensure_ascii=False))
+                        for key, entry in items
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def load_roots(self) -> dict[str, float]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT root, last_used FROM roots").fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def save_roots(self, roots: dict[str, float]):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM roots")
+                conn.executemany(
+                    "INSERT INTO roots (root, last_used) VALUES (?, ?)", roots.items()
+                )
+        finally:
+            conn.close()
+
+    def vacuum(self):
+        conn = self._connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+
+def backend_for(path: Path) -> CacheBackend:
+    """拡張子から保存形式を選ぶ。.yml/.yaml は YAML、それ以外は SQLite"""
+    if Path(path).suffix.lower() in (".yml", ".yaml"):
+        return YamlCacheBackend(path)
+    return SqliteCacheBackend(path)
@@ -0,0 +1,95 @@
+import json
+import os
+import zlib
+from pathlib import Path
+
+from src.const import ENCODE
+from src.modules.glyph_coverage import decode_coverage, encode_coverage
+
+# スナップショットの形式のバージョン（合わないファイルは読み込まない）
+SNAPSHOT_VERSION = 1
+
+
+class LibrarySnapshot:
+    """
+    直近のスキャン結果（UI向けに正規化し、フォントが見つかったSWF）をライブラリフォルダごとに保存する。
+
+    起動時にディスクを走査せずにフォント一覧を作るために使う。
+    ディスクと照合するまでは古い可能性がある。
+    収録文字のビット集合は encode_coverage() で圧縮して保存する。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> dict[str, list[dict]]:
+        """ライブラリフォルダのパス文字列 -> スキャン結果のリスト を返す。
+
+        ファイルが無い・読めない・形式が違う場合は空の辞書。
+        """
+        try:
+            with open(self.path, "r", encoding=ENCODE) as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+                return {}
+            return {
+                root: [
+                    {
+                        "swf_path": entry["swf_path"],
+                        "font_names": entry["font_names"],
+                        "fonts": entry["fonts"],
+                        "coverage": {
+                            name: decode_coverage(text)
+                            for name, text in entry["coverage"].items()
+                        },
+                        "root": root,
+                    }
+                    for entry in entries
+                ]
+                for root, entries in data["roots"].items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (
+            OSError,
+            ValueError,
+            KeyError,
+            TypeError,
+            AttributeError,
+            zlib.error,
+        ) as e:
+            print(f"ライブラリのスナップショットを読み込めませんでした: {e}")
+            return {}
+
+    def save(self, roots: dict[str, list[dict]]) -> bool:
+        """ライブラリフォルダのパス文字列 -> スキャン結果のリスト を保存する。保存できたら True
+
+        途中で異常終了しても前回のファイルが壊れないよう、一時ファイルに書いてから置き換える。
+        """
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "roots": {
+                root: [
+                    {
+                        "swf_path": entry["swf_path"],
+                        "font_names": entry["font_names"],
+                        "fonts": entry["fonts"],
+                        "coverage": {
+                            name: encode_coverage(bits)
+                            for name, bits in entry["coverage"].items()
+                        },
+                    }
+                    for entry in entries
+                ]
+                for root, entries in roots.items()
+            },
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding=ENCODE) as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"ライブラリのスナップショットを保存できませんでした: {e}")
+            return False
+        return True
@@ -131,8 +131,29 @@ class Settings:
     def swf_dir(self, value):
         """swf_dir を設定する
 
-        swf_dir は絶対パスで渡すこと（例: "C:/path/to/swf"）。"""
+        swf_dir は絶対パスで渡すこと（例: "C:/path/to/swf"）。swf_dirs に無ければ追加する。"""
         self.data["swf_dir"] = value
+        if value and value not in self._string_list("swf_dirs"):
+            self.data["swf_dirs"] = [*self._string_list("swf_dirs"), value]
+
+    @property
+    def swf_dirs(self):
+        """swf_dirs を返す
+
+        ライブラリフォルダ（フォントSWFを読み込むフォルダ）の絶対パスのリスト。
+        使用中の swf_dir は必ず含む。存在しない場合は空のリストを返す。
+        """
+        dirs = self._string_list("swf_dirs")
+        if self.swf_dir and self.swf_dir not in dirs:
+            dirs.insert(0, self.swf_dir)
+        return dirs
+
+    @swf_dirs.setter
+    def swf_dirs(self, value):
+        """swf_dirs を設定する
+
+        swf_dirs は絶対パスのリストで渡すこと。"""
+        self.data["swf_dirs"] = list(value)
 
     @property
     def output_dir(self):
@@ -163,3 +184,146 @@ class Settings:
 
         lang は言語コードで渡すこと（例: "ja-jp"）。"""
         self.data["lang"] = value
+
+    @property
+    def scan_workers(self):
+        """scan_workers を返す
+
+        SWFスキャン時に解析を分配するプロセス数。0 は CPU 数に合わせ、1 は並列化せずに順番に解析する。
+        存在しない場合や不正な値の場合は 0 を返す。
+        """
+        return self._non_negative_int("scan_workers")
+
+    @scan_workers.setter
+    def scan_workers(self, value):
+        """scan_workers を設定する"""
+        self.data["scan_workers"] = int(value)
+
+    @property
+    def hash_swf_contents(self):
+        """hash_swf_contents を返す
+
+        True なら解析したSWFの内容ハッシュを記録し、移動・名前変更されたSWFの再解析を省く。
+        ハッシュの計算でファイル全体を読むため、ネットワーク上のフォルダなどで初回スキャンが遅い場合は False にする。
+        存在しない場合は True を返す。
+        """
+        return bool(self.data.get("hash_swf_contents", True))
+
+    @hash_swf_contents.setter
+    def hash_swf_contents(self, value):
+        """hash_swf_contents を設定する"""
+        self.data["hash_swf_contents"] = bool(value)
+
+    @property
+    def watch_swf_dir(self):
+        """watch_swf_dir を返す
+
+        True なら swf_dir の変更を監視し、追加・変更・削除されたSWFだけをフォント一覧に反映する。
+        存在しない場合は False を返す。
+        """
+        return bool(self.data.get("watch_swf_dir", False))
+
+    @watch_swf_dir.setter
+    def watch_swf_dir(self, value):
+        """watch_swf_dir を設定する"""
+        self.data["watch_swf_dir"] = bool(value)
+
+    @property
+    def scan_include(self):
+        """scan_include を返す
+
+        スキャン対象にするSWFのグロブパターンのリスト（例: ["interface/*.swf"]）。
+        "/" を含むパターンは swf_dir からの相対パスと、含まないものはファイル名と照合する。
+        空の場合は全てのSWFが対象。
+        """
+        return self._string_list("scan_include")
+
+    @scan_include.setter
+    def scan_include(self, value):
+        """scan_include を設定する"""
+        self.data["scan_include"] = list(value)
+
+    @property
+    def scan_exclude(self):
+        """scan_exclude を返す
+
+        スキャンしないディレクトリやSWFのグロブパターンのリスト（例: ["*_backup", "old/*"]）。
+        照合の仕方は scan_include と同じ。除外したディレクトリの中には入らない。
+        """
+        return self._string_list("scan_exclude")
+
+    @scan_exclude.setter
+    def scan_exclude(self, value):
+        """scan_exclude を設定する"""
+        self.data["scan_exclude"] = list(value)
+
+    @property
+    def scan_max_depth(self):
+        """scan_max_depth を返す
+
+        swf_dir から何階層下のディレクトリまでスキャンするか。0 は無制限。
+        存在しない場合や不正な値の場合は 0 を返す。
+        """
+        return self._non_negative_int("scan_max_depth")
+
+    @scan_max_depth.setter
+    def scan_max_depth(self, value):
+        """scan_max_depth を設定する"""
+        self.data["scan_max_depth"] = int(value)
+
+    @property
+    def scan_min_file_size(self):
+        """scan_min_file_size を返す
+
+        スキャン対象にするSWFの最小ファイルサイズ(バイト)。存在しない場合や不正な値の場合は 0 を返す。
+        """
+        return self._non_negative_int("scan_min_file_size")
+
+    @scan_min_file_size.setter
+    def scan_min_file_size(self, value):
+        """scan_min_file_size を設定する"""
+        self.data["scan_min_file_size"] = int(value)
+
+    @property
+    def scan_max_file_size(self):
+        """scan_max_file_size を返す
+
+        スキャン対象にするSWFの最大ファイルサイズ(バイト)。0 は上限なし。
+        存在しない場合や不正な値の場合は 0 を返す。
+        """
+        return self._non_negative_int("scan_max_file_size")
+
+    @scan_max_file_size.setter
+    def scan_max_file_size(self, value):
+        """scan_max_file_size を設定する"""
+        self.data["scan_max_file_size"] = int(value)
+
+    @property
+    def scan_skip_heavy_dirs(self):
+        """scan_skip_heavy_dirs を返す
+
+        True なら meshes / textures / sound / scripts などSWFを置かないディレクトリに入らない。
+        存在しない場合は True を返す。
+        """
+        return bool(self.data.get("scan_skip_heavy_dirs", True))
+
+    @scan_skip_heavy_dirs.setter
+    def scan_skip_heavy_dirs(self, value):
+        """scan_skip_heavy_dirs を設定する"""
+        self.data["scan_skip_heavy_dirs"] = bool(value)
+
+    def _string_list(self, key: str) -> list:
+        """文字列のリストの設定値を返す。1つだけ文字列で書かれていてもリストにする"""
+        value = self.data.get(key) or []
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return []
+        return [str(v) for v in value if v]
+
+    def _non_negative_int(self, key: str) -> int:
+        """0以上の整数の設定値を返す。存在しない場合や不正な値の場合は 0"""
+        try:
+            return max(int(self.data.get(key, 0)), 0)
+        except (TypeError, ValueError):
+            return 0
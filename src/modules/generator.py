@@ -1,8 +1,8 @@
-import shutil
 from pathlib import Path
 
 from const import SKYRIM_FONTCONFIG_ENCODE, SKYRIM_INTERFACE_DIR_NAME
 from models.preset import Preset
+from modules.swf_archive import copy_swf, swf_exists
 
 
 def preset_generator(
@@ -87,9 +87,10 @@ def preset_generator(
 
     # --- 4. SWFファイルの物理コピー実行 ---
     for src_file, swf_name in copy_tasks:
-        if src_file.exists():
+        # .zip 内のSWFは展開せずにメンバーを書き出す
+        if swf_exists(src_file):
             dest_file = interface_out / swf_name
-            shutil.copy2(src_file, dest_file)
+            copy_swf(src_file, dest_file)
             print(f"✅ SWFをコピーしました (再帰対応): {swf_name}")
         else:
             print(f"⚠️ 警告: ファイルが元の場所に見つかりません: {src_file}")
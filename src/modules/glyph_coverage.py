@@ -0,0 +1,179 @@
+import base64
+import functools
+import sys
+import zlib
+from array import array
+
+
+def codes_to_coverage(code_table: bytes, wide_codes: bool = True) -> int:
+    """
+    DefineFontのCodeTable（UI16またはUI8の並び）をカバレッジのビット集合に変換する。
+
+    ビット集合は int で表し、コードポイント c を含む場合に (1 << c) のビットが立つ。
+    """
+    if wide_codes:
+        codes = array("H")
+        codes.frombytes(code_table[: len(code_table) // 2 * 2])
+        # SWFはリトルエンディアン
+        if sys.byteorder == "big":
+            codes.byteswap()
+    else:
+        codes = code_table
+
+    if not codes:
+        return 0
+    bits = bytearray(max(codes) // 8 + 1)
+    for code in codes:
+        bits[code >> 3] |= 1 << (code & 7)
+    return int.from_bytes(bits, "little")
+
+
+def text_to_coverage(text: str) -> int:
+    """文字列に含まれる文字をカバレッジのビット集合に変換する。"""
+    if not text:
+        return 0
+    code_points = {ord(c) for c in text}
+    bits = bytearray(max(code_points) // 8 + 1)
+    for code in code_points:
+        bits[code >> 3] |= 1 << (code & 7)
+    return int.from_bytes(bits, "little")
+
+
+def iter_code_points(coverage: int):
+    """ビット集合に含まれるコードポイントを昇順に返す。"""
+    code = 0
+    while coverage:
+        # 下位の0ビットをまとめて読み飛ばす
+        skip = (coverage & -coverage).bit_length() - 1
+        code += skip
+        coverage >>= skip
+        yield code
+        coverage >>= 1
+        code += 1
+
+
+def missing_chars(coverage: int, text: str) -> str:
+    """text のうち coverage に含まれない文字を、重複なしでコードポイント順に返す。"""
+    missing = text_to_coverage(text) & ~coverage
+    return "".join(chr(c) for c in iter_code_points(missing))
+
+
+def covers(coverage: int, text: str) -> bool:
+    """text の全ての文字が coverage に含まれるか"""
+    return not (text_to_coverage(text) & ~coverage)
+
+
+def encode_coverage(coverage: int) -> str:
+    """キャッシュ保存用にビット集合を圧縮して文字列化する。"""
+    raw = coverage.to_bytes((coverage.bit_length() + 7) // 8, "little")
+    return base64.b64encode(zlib.compress(raw)).decode("ascii")
+
+
+def decode_coverage(text: str) -> int:
+    """encode_coverage() で文字列化したビット集合を復元する。"""
+    if not text:
+        return 0
+    return int.from_bytes(zlib.decompress(base64.b64decode(text)), "little")
+
+
+def _jis_rows_to_coverage(first_row: int, last_row: int) -> int:
+    """JIS X 0208 の区(first_row〜last_row)に含まれる文字をビット集合にする。"""
+    chars = []
+    for row in range(first_row, last_row + 1):
+        for cell in range(1, 95):
+            try:
+                chars.append(bytes([0xA0 + row, 0xA0 + cell]).decode("euc_jp"))
+            except UnicodeDecodeError:
+                continue
+    return text_to_coverage("".join(chars))
+
+
+def _range_to_coverage(first: int, last: int) -> int:
+    """コードポイント first〜last(両端含む)をビット集合にする。"""
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+@functools.cache
+def coverage_blocks() -> dict[str, int]:
+    """収録率の集計に使う文字ブロック名 -> ビット集合"""
+    return {
+        # 半角英数字・記号
+        "ascii": _range_to_coverage(0x20, 0x7E),
+        # ひらがな・カタカナ・長音
+        "kana": _range_to_coverage(0x3041, 0x3096)
+        | _range_to_coverage(0x30A1, 0x30FA)
+        | text_to_coverage("ー"),
+        # 全角英数字・記号
+        "fullwidth": _range_to_coverage(0xFF01, 0xFF5E),
+        # JIS X 0208 の記号（1〜2区）
+        "jis_symbols": _jis_rows_to_coverage(1, 2),
+        # JIS第1水準漢字（16〜47区）
+        "jis_level1": _jis_rows_to_coverage(16, 47),
+        # JIS第2水準漢字（48〜84区）
+        "jis_level2": _jis_rows_to_coverage(48, 84),
+    }
+
+
+class CoverageMatrix:
+    """
+    フォント(行) x 文字ブロック(列) の収録数の行列。
+
+    各セルはビット集合同士の AND と bit_count() で求めるため、
+    1セルあたりの計算はコードポイント数ではなく機械語ワード数に比例する。
+    """
+
+    def __init__(self, rows: list[tuple], blocks: dict[str, int] | None = None):
+        """rows には (キー, ビット集合) のリストを渡す。キーは (swf_path, font_name) など任意。"""
+        self.blocks = blocks if blocks is not None else coverage_blocks()
+        self.columns = list(self.blocks)
+        self.keys = [key for key, _ in rows]
+        self.coverages = [coverage for _, coverage in rows]
+        self._row_index = {key: i for i, key in enumerate(self.keys)}
+        self.block_sizes = [self.blocks[c].bit_count() for c in self.columns]
+        masks = [self.blocks[c] for c in self.columns]
+        self.counts = [
+            [(coverage & mask).bit_count() for mask in masks]
+            for coverage in self.coverages
+        ]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def ratios(self, block: str) -> list[float]:
+        """指定ブロックの収録率を行順に返す。"""
+        col = self.columns.index(block)
+        size = self.block_sizes[col] or 1
+        return [row[col] / size for row in self.counts]
+
+    def row(self, key) -> dict[str, float] | None:
+        """指定したフォントのブロックごとの収録率を返す。未登録なら None"""
+        i = self._row_index.get(key)
+        if i is None:
+            return None
+        return {
+            column: count / (size or 1)
+            for column, count, size in zip(
+                self.columns, self.counts[i], self.block_sizes
+            )
+        }
+
+    def fonts_covering(self, block: str, threshold: float = 0.99) -> list:
+        """指定ブロックの収録率が threshold 以上のフォントのキーを返す。"""
+        return [
+            key
+            for key, ratio in zip(self.keys, self.ratios(block))
+            if ratio >= threshold
+        ]
+
+    def rank_by_text(self, text: str) -> list[tuple]:
+        """text の文字の収録率が高い順に (キー, 収録率) を返す。"""
+        required = text_to_coverage(text)
+        size = required.bit_count()
+        if not size:
+            return [(key, 1.0) for key in self.keys]
+        ranked = [
+            (key, (coverage & required).bit_count() / size)
+            for key, coverage in zip(self.keys, self.coverages)
+        ]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked
@@ -0,0 +1,103 @@
+import os
+import shutil
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+ARCHIVE_SUFFIX = ".zip"
+
+
+class ArchiveMemberStat:
+    """
+    アーカイブ内のSWFの os.stat() 相当の情報。
+
+    st_mtime / st_mtime_ns はアーカイブに記録された更新日時（2秒単位のローカル時刻）。
+    crc はアーカイブに記録された CRC-32。通常のファイルの os.stat_result には無い。
+    """
+
+    def __init__(self, info: zipfile.ZipInfo):
+        self.st_size = info.file_size
+        self.st_mtime = time.mktime((*info.date_time, 0, 0, -1))
+        self.st_mtime_ns = int(self.st_mtime) * 1_000_000_000
+        self.crc = info.CRC
+
+
+def split_archive_path(path: Path) -> tuple[Path, str] | None:
+    """
+    「アーカイブのパス/メンバー名」形式のパスを (アーカイブのパス, メンバー名) に分ける。
+
+    メンバー名の区切りは "/"。途中に .zip のファイルが無ければ None を返す。
+    """
+    path = Path(path)
+    if ARCHIVE_SUFFIX not in os.path.normcase(str(path)):
+        return None
+    parts = path.parts
+    for i in range(len(parts) - 1, 0, -1):
+        if not os.path.normcase(parts[i - 1]).endswith(ARCHIVE_SUFFIX):
+            continue
+        archive_path = Path(*parts[:i])
+        if archive_path.is_file():
+            return archive_path, "/".join(parts[i:])
+    return None
+
+
+def iter_archive_swfs(archive_path: Path) -> Iterator[tuple[str, ArchiveMemberStat]]:
+    """アーカイブ内のSWFを (メンバー名, ArchiveMemberStat) で名前順に返す"""
+    with zipfile.ZipFile(archive_path) as zf:
+        infos = sorted(zf.infolist(), key=lambda info: info.filename)
+    for info in infos:
+        if info.is_dir() or not os.path.normcase(info.filename).endswith(".swf"):
+            continue
+        yield info.filename, ArchiveMemberStat(info)
+
+
+@contextmanager
+def open_swf(path: Path) -> Iterator[BinaryIO]:
+    """SWFをバイナリで開く。アーカイブ内のSWFなら展開せずにメンバーを読む"""
+    split = split_archive_path(path)
+    if split is None:
+        with open(path, "rb") as f:
+            yield f
+        return
+    archive_path, member = split
+    with zipfile.ZipFile(archive_path) as zf, zf.open(member) as f:
+        yield f
+
+
+def stat_swf(path: Path) -> os.stat_result | ArchiveMemberStat:
+    """SWFの os.stat() の結果を返す。アーカイブ内のSWFなら ArchiveMemberStat"""
+    split = split_archive_path(path)
+    if split is None:
+        return os.stat(path)
+    archive_path, member = split
+    try:
+        with zipfile.ZipFile(archive_path) as zf:
+            return ArchiveMemberStat(zf.getinfo(member))
+    except (KeyError, zipfile.BadZipFile) as e:
+        raise FileNotFoundError(f"{path}: {e}") from e
+
+
+def swf_exists(path: Path) -> bool:
+    """SWFが存在するか。アーカイブ内のSWFも対象"""
+    try:
+        stat_swf(path)
+    except OSError:
+        return False
+    return True
+
+
+def copy_swf(src: Path, dst: Path):
+    """
+    SWFを dst へコピーする。
+
+    アーカイブ内のSWFは展開せずにメンバーを dst へ書き出し、更新日時もアーカイブの記録に合わせる。
+    """
+    if split_archive_path(src) is None:
+        shutil.copy2(src, dst)
+        return
+    st = stat_swf(src)
+    with open_swf(src) as fsrc, open(dst, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+    os.utime(dst, (st.st_mtime, st.st_mtime))
@@ -0,0 +1,333 @@
+import hashlib
+import os
+import time
+import zipfile
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from modules.swf_archive import ARCHIVE_SUFFIX, iter_archive_swfs, open_swf
+
+SWF_SUFFIX = ".swf"
+# 内容ハッシュを計算するときの読み込み単位
+HASH_CHUNK_SIZE = 1024 * 1024
+# ディレクトリの更新日時がこれより新しい場合は、記録した一覧を信用しない
+# （一覧を取った直後の同じ時刻内の変更を見逃さないため。FAT の更新日時は2秒単位）
+DIR_MTIME_RACY_NS = 2_000_000_000
+
+
+class ScanDiff:
+    """前回のスキャンから増えた/消えた/変わったSWFのパス"""
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self) -> str:
+        return (
+            f"ScanDiff(added={len(self.added)}, removed={len(self.removed)}, "
+            f"changed={len(self.changed)})"
+        )
+
+
+class ScanRules:
+    """
+    走査するSWFの条件。除外したディレクトリの中には入らない。
+
+    include / exclude はグロブパターン。"/" を含むパターンは swf_dir からの相対パス
+    （区切りは "/"）と、含まないパターンは名前と照合する。大文字小文字は OS の規則に従う。
+    include は SWF だけに使い、空なら全てのSWFが対象。exclude はディレクトリとSWFの両方に使う。
+    max_depth は swf_dir から何階層下のディレクトリまで入るか（0 は無制限）。
+    min_size / max_size はSWFのファイルサイズ(バイト)の範囲（max_size が 0 なら上限なし）。
+    skip_dir_names の名前のディレクトリには入らない（大文字小文字は区別しない）。
+    .zip アーカイブはディレクトリと同じ条件で扱う。アーカイブ内のSWFには include / exclude と
+    サイズの条件だけを使う（相対パスは「アーカイブの相対パス/メンバー名」）。
+    """
+
+    def __init__(
+        self,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        max_depth: int = 0,
+        min_size: int = 0,
+        max_size: int = 0,
+        skip_dir_names: Iterable[str] = (),
+    ):
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.max_depth = max_depth
+        self.min_size = min_size
+        self.max_size = max_size
+        self.skip_dir_names = frozenset(name.lower() for name in skip_dir_names)
+
+    def _key(self) -> tuple:
+        return (
+            self.include,
+            self.exclude,
+            self.max_depth,
+            self.min_size,
+            self.max_size,
+            self.skip_dir_names,
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ScanRules) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    @staticmethod
+    def _matches(patterns: tuple, rel_path: str, name: str) -> bool:
+        return any(
+            fnmatch(rel_path if "/" in pattern else name, pattern)
+            for pattern in patterns
+        )
+
+    def allows_dir(self, rel_path: str, name: str, depth: int) -> bool:
+        """depth 階層目のディレクトリ rel_path に入るか"""
+        if self.max_depth and depth > self.max_depth:
+            return False
+        if name.lower() in self.skip_dir_names:
+            return False
+        return not self._matches(self.exclude, rel_path, name)
+
+    def allows_file(self, rel_path: str, name: str) -> bool:
+        """SWF rel_path が include / exclude の条件に合うか（サイズは allows_size で見る）"""
+        if self.include and not self._matches(self.include, rel_path, name):
+            return False
+        return not self._matches(self.exclude, rel_path, name)
+
+    def allows_size(self, size: int) -> bool:
+        return size >= self.min_size and (not self.max_size or size <= self.max_size)
+
+
+class SwfTreeScanner:
+    """
+    swf_dir 以下のSWFファイルを探す。前回の走査結果をディレクトリ単位で覚えておき、
+    更新日時が変わっていないディレクトリは一覧を取り直さない。
+
+    ディレクトリの更新日時は直下のファイルの追加・削除・名前変更でしか変わらないので、
+    一覧を使い回す場合も、覚えているSWFとサブディレクトリは stat し直す
+    （SWFの上書きや、より深い階層の変更を見逃さないため）。
+    SWF以外のファイル（テクスチャやメッシュなど）が多いディレクトリほど速くなる。
+    rules（ScanRules）で除外したディレクトリの中には入らない。
+
+    .zip アーカイブの中のSWFも「アーカイブのパス/メンバー名」というパスで返す
+    （stat の結果は swf_archive.ArchiveMemberStat）。アーカイブのサイズと更新日時が
+    前回と同じなら、メンバーの一覧を読み直さない。
+    """
+
+    def __init__(self, swf_dir: Path, rules: ScanRules | None = None):
+        self.swf_dir = Path(swf_dir)
+        self.rules = rules or ScanRules()
+        # ディレクトリのパス -> (更新日時(ns), 一覧を取った日時(ns), SWFの名前,
+        #                      サブディレクトリの名前, アーカイブの名前)
+        self._dirs = {}
+        # SWFのパス -> (サイズ, 更新日時(ns), CRC-32（アーカイブ内のSWFのみ。それ以外は None）)
+        self._files = {}
+        # アーカイブのパス -> (サイズ, 更新日時(ns), [(メンバー名, ArchiveMemberStat), ...])
+        self._archives = {}
+        # 直近に最後まで走査したときの差分
+        self.diff = ScanDiff()
+
+    def iter_files(
+        self, changed_paths: Iterable[str] | None = None
+    ) -> Iterator[tuple[Path, os.stat_result]]:
+        """
+        SWFファイルを再帰的に探し、(パス, os.stat() の結果) を名前順に返す。
+
+        changed_paths（ファイル監視が変更を報告したディレクトリ・SWF・アーカイブのパス）を
+        渡すと、それ以外は前回の走査から変わっていないものとして前回の結果を使い、
+        stat し直さない（前回見つけていないディレクトリは普通に走査する）。
+        このときは stat し直したSWFだけを返す。
+        最後まで反復したときだけ、ディレクトリの状態と diff を更新する。
+        """
+        reported = (
+            None
+            if changed_paths is None
+            else {os.path.normpath(p) for p in changed_paths}
+        )
+        dirs = {}
+        files = {}
+        archives = {}
+        # (ディレクトリのパス, swf_dir からの相対パス, 階層)
+        stack = [(str(self.swf_dir), "", 0)]
+        while stack:
+            dir_path, rel_dir, depth = stack.pop()
+            unchanged = (
+                reported is not None
+                and dir_path not in reported
+                and dir_path in self._dirs
+            )
+            if unchanged:
+                listing, stats = self._dirs[dir_path], {}
+            else:
+                listing, stats = self._list_dir(dir_path, rel_dir, depth)
+            if listing is None:
+                continue
+            dirs[dir_path] = listing
+            _, _, swf_names, sub_dir_names, archive_names = listing
+            for name in swf_names:
+                path = os.path.join(dir_path, name)
+                if unchanged and path not in reported and path in self._files:
+                    files[path] = self._files[path]
+                    continue
+                try:
+                    st = stats[name] if name in stats else os.stat(path)
+                except OSError:
+                    continue
+                if not self.rules.allows_size(st.st_size):
+                    continue
+                files[path] = (st.st_size, st.st_mtime_ns, None)
+                yield Path(path), st
+            for name in archive_names:
+                path = os.path.join(dir_path, name)
+                reuse = unchanged and path not in reported and path in self._archives
+                if reuse:
+                    members = self._archives[path]
+                else:
+                    members = self._list_archive(path, stats.get(name))
+                if members is None:
+                    continue
+                archives[path] = members
+                for member, st in members[2]:
+                    if not self.rules.allows_file(
+                        rel_dir + name + "/" + member, member.rsplit("/", 1)[-1]
+                    ) or not self.rules.allows_size(st.st_size):
+                        continue
+                    member_path = Path(path, member)
+                    files[str(member_path)] = (st.st_size, st.st_mtime_ns, st.crc)
+                    if not reuse:
+                        yield member_path, st
+            # 名前順に辿るよう、逆順に積む
+            stack.extend(
+                (os.path.join(dir_path, name), rel_dir + name + "/", depth + 1)
+                for name in reversed(sub_dir_names)
+            )
+
+        self.diff = ScanDiff(
+            (Path(p) for p in files if p not in self._files),
+            (Path(p) for p in self._files if p not in files),
+            (Path(p) for p, v in files.items() if self._files.get(p, v) != v),
+        )
+        self._dirs = dirs
+        self._files = files
+        self._archives = archives
+
+    def watch_paths(self) -> list[str]:
+        """直近の走査で見つけたディレクトリ・SWF・アーカイブのパスを返す（ファイル監視の対象）"""
+        return [
+            *self._dirs,
+            *self._archives,
+            *(path for path, value in self._files.items() if value[2] is None),
+        ]
+
+    def _list_archive(
+        self, archive_path: str, st: os.stat_result | None
+    ) -> tuple | None:
+        """アーカイブの (サイズ, 更新日時(ns), [(メンバー名, ArchiveMemberStat), ...]) を返す
+
+        サイズと更新日時が前回と同じなら前回の一覧を返す。読めなければ None。
+        """
+        try:
+            if st is None:
+                st = os.stat(archive_path)
+            previous = self._archives.get(archive_path)
+            if previous is not None and previous[:2] == (st.st_size, st.st_mtime_ns):
+                return previous
+            return st.st_size, st.st_mtime_ns, list(iter_archive_swfs(archive_path))
+        except (OSError, zipfile.BadZipFile):
+            return None
+
+    def _list_dir(
+        self, dir_path: str, rel_dir: str, depth: int
+    ) -> tuple[tuple | None, dict]:
+        """ディレクトリの一覧と、一覧を取り直した場合はそのときのSWFの stat を返す
+
+        一覧は (更新日時, 一覧を取った日時, SWFの名前, サブディレクトリの名前, アーカイブの名前)。
+        rel_dir は swf_dir からの相対パス（末尾に "/" を付ける）、depth はその階層。
+        一覧には rules で除外したものを含めない。
+        更新日時が前回と同じなら前回の一覧を返す。読めなければ None。
+        列挙結果の stat は Windows では追加の stat 無しで得られるので、そのまま使う。
+        """
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None, {}
+        previous = self._dirs.get(dir_path)
+        if (
+            previous is not None
+            and previous[0] == mtime_ns
+            and mtime_ns < previous[1] - DIR_MTIME_RACY_NS
+        ):
+            return previous, {}
+
+        listed_at = time.time_ns()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return None, {}
+        swf_names = []
+        sub_dir_names = []
+        archive_names = []
+        stats = {}
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.rules.allows_dir(
+                        rel_dir + entry.name, entry.name, depth + 1
+                    ):
+                        sub_dir_names.append(entry.name)
+                elif (
+                    os.path.normcase(entry.name).endswith(SWF_SUFFIX)
+                    and self.rules.allows_file(rel_dir + entry.name, entry.name)
+                    and entry.is_file()
+                ):
+                    stats[entry.name] = entry.stat()
+                    swf_names.append(entry.name)
+                elif (
+                    os.path.normcase(entry.name).endswith(ARCHIVE_SUFFIX)
+                    and self.rules.allows_dir(
+                        rel_dir + entry.name, entry.name, depth + 1
+                    )
+                    and entry.is_file()
+                ):
+                    stats[entry.name] = entry.stat()
+                    archive_names.append(entry.name)
+            except OSError:
+                continue
+        return (mtime_ns, listed_at, swf_names, sub_dir_names, archive_names), stats
+
+
+def iter_swf_files(
+    swf_dir: Path, rules: ScanRules | None = None
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """
+    swf_dir 以下のSWFファイルを再帰的に探し、(パス, os.stat() の結果) を返す。
+
+    os.scandir() でディレクトリを列挙する。拡張子の大文字小文字は OS の規則に従う。
+    シンボリックリンクのディレクトリは辿らない。rules で除外したものは返さない。
+    .zip アーカイブ内のSWFも返す（SwfTreeScanner を参照）。
+    前回の結果を使い回して再走査したい場合は SwfTreeScanner を使う。
+    """
+    return SwfTreeScanner(swf_dir, rules).iter_files()
+
+
+def hash_file(path: Path, f: BinaryIO | None = None) -> str:
+    """ファイル内容の blake2b ハッシュ（16進文字列）を返す。ファイルは分割して読み込む
+
+    アーカイブ内のSWFは展開後の内容のハッシュを返す（アーカイブへ移したSWFも同じハッシュになる）。
+    f に開いたファイル（先読み済みの PrefetchedFile など）を渡した場合は、その先頭から読む。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if f is not None:
+        f.seek(0)
+    with f or open_swf(path) as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
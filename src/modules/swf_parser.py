@@ -1,4 +1,6 @@
 import argparse
+import lzma
+import os
 import re
 import struct
 import sys
@@ -7,6 +9,10 @@ from datetime import datetime
 from pathlib import Path
 
 from const import ENCODE, SETTINGS_FILE, TIME_FORMAT
+from modules.glyph_coverage import codes_to_coverage, decode_coverage
+from modules.swf_archive import open_swf, stat_swf, swf_exists
+from modules.swf_finder import hash_file
+from modules.swf_prefetch import PrefetchedFile, SwfPrefetcher
 from utils.dprint import dprint
 
 
@@ -49,7 +55,7 @@ def action_swf_parser(swf_path: str, cache: list, debug: bool, **_):
     swf_path = Path(swf_path)
 
     print(f"swf_path: {swf_path.resolve()}")
-    if not swf_path.exists():
+    if not swf_exists(swf_path):
         raise FileExistsError(f"ファイルが存在しません。: {swf_path}")
 
     print("指定したフォントSWF内のフォント名一覧")
@@ -59,66 +65,498 @@ def action_swf_parser(swf_path: str, cache: list, debug: bool, **_):
         print(font_name)
 
 
-def swf_parser(swf_path: Path, cache: list, debug: bool = False) -> list[str]:
+# SWFタグ種別
+TAG_END = 0
+TAG_SHOW_FRAME = 1
+TAG_DEFINE_FONT = 10
+TAG_DEFINE_FONT_INFO = 13
+TAG_DEFINE_FONT2 = 48
+TAG_DEFINE_FONT_INFO2 = 62
+TAG_DEFINE_FONT3 = 75
+TAG_DEFINE_FONT_NAME = 88
+# フォント名を持つDefineFontタグ
+FONT_NAME_TAGS = (TAG_DEFINE_FONT2, TAG_DEFINE_FONT3)
+# ファイル読み込み・展開の単位（この単位でしかメモリに載せない）
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class SwfFormatError(ValueError):
+    """SWFの構造がタグ単位で解釈できない場合に送出される"""
+
+
+class SwfHeader:
+    """SWFヘッダー（圧縮解除後のフレーム情報まで）"""
+
+    __slots__ = (
+        "signature",
+        "version",
+        "file_length",
+        "frame_rect",
+        "frame_rate",
+        "frame_count",
+        "header_size",
+    )
+
+    def __init__(
+        self,
+        signature: str,
+        version: int,
+        file_length: int,
+        frame_rect: tuple,
+        frame_rate: float,
+        frame_count: int,
+        header_size: int,
+    ):
+        self.signature = signature
+        self.version = version
+        self.file_length = file_length
+        # (Xmin, Xmax, Ymin, Ymax) 単位はtwips
+        self.frame_rect = frame_rect
+        self.frame_rate = frame_rate
+        self.frame_count = frame_count
+        # 最初のタグが始まる位置
+        self.header_size = header_size
+
+
+def read_swf_header(data: bytes) -> SwfHeader:
     """
-    SWFバイナリを高速スキャンし、DefineFontタグから本物のフォント名だけを抽出します。
+    圧縮解除済みのSWFデータからヘッダーを読み取る。
+
+    [Signature:3][Version:1][FileLength:4][FrameSize:RECT][FrameRate:2][FrameCount:2]
     """
-    # 比較用に更新日時を文字列化（保存形式に合わせて相対パスで）
-    current_mtime = datetime.fromtimestamp(swf_path.stat().st_mtime).strftime(
-        TIME_FORMAT
+    if len(data) < 9 or data[:3] not in (b"FWS", b"CWS", b"ZWS"):
+        raise SwfFormatError("SWFシグネチャが不正です。")
+
+    signature = data[:3].decode("ascii")
+    version = data[3]
+    file_length = struct.unpack("<I", data[4:8])[0]
+
+    # RECT: 先頭5bitがフィールド長、続いて Xmin, Xmax, Ymin, Ymax が符号付きで並ぶ
+    nbits = data[8] >> 3
+    rect_size = (5 + nbits * 4 + 7) // 8
+    pos = 8 + rect_size
+    if pos + 4 > len(data):
+        raise SwfFormatError("SWFヘッダーが途中で途切れています。")
+
+    bits = int.from_bytes(data[8:pos], "big")
+    total_bits = rect_size * 8
+    values = []
+    for n in range(4):
+        shift = total_bits - 5 - nbits * (n + 1)
+        value = (bits >> shift) & ((1 << nbits) - 1) if nbits else 0
+        if nbits and value & (1 << (nbits - 1)):
+            value -= 1 << nbits
+        values.append(value)
+
+    # FrameRate は 8.8 固定小数点（リトルエンディアンなので小数部が先）
+    frame_rate = data[pos + 1] + data[pos] / 256
+    frame_count = struct.unpack("<H", data[pos + 2 : pos + 4])[0]
+
+    return SwfHeader(
+        signature=signature,
+        version=version,
+        file_length=file_length,
+        frame_rect=tuple(values),
+        frame_rate=frame_rate,
+        frame_count=frame_count,
+        header_size=pos + 4,
     )
 
-    for entry in cache:
-        # 1. パスが一致するか (entry["swf_path"] 自体がパス文字列)
-        # ※ 相対パスか絶対パスか、プロジェクトのルールに合わせます
-        if entry.get("swf_path") == str(swf_path) or str(swf_path).endswith(
-            entry.get("swf_path", "")
-        ):
 
-            # 2. 更新日時が一致するか
-            if entry.get("modified_date") == current_mtime:
-                dprint(f"キャッシュを使用: {swf_path.name}", debug)
-                return entry["font_names"]
+class SwfStream:
+    """
+    圧縮形式(FWS/CWS/ZWS)を問わず、展開後のSWFを先頭から順に読むストリーム。
 
-            # パスは合ってるけど日時が違う場合は、このentryは古いので無視して解析へ
-            break
+    ファイルは READ_CHUNK_SIZE ずつ読み込み、必要な分だけ展開する。
+    skip() で読み飛ばした範囲は展開しても保持しないため、メモリ使用量はファイルサイズに依存しない。
+    非圧縮(FWS)かつシーク可能なファイルでは、skip() はシークのみで読み込み自体を行わない。
+    """
 
-    try:
-        with open(swf_path, 'rb') as f:
-            raw_data = f.read()
-    except Exception as e:
-        print(f"ファイルの読み込みに失敗しました: {e}")
-        return []
+    def __init__(self, f):
+        self._file = f
+        self._buffer = bytearray()
+        self._pending = b""
+        self._decompressor = None
+        self._eof = False
+        # 展開後SWF上での現在位置
+        self._pos = 0
+        # 非圧縮時にシークで読み飛ばすためのファイルサイズ（シーク不可ならNone）
+        self._file_size = None
+
+        head = f.read(8)
+        self.signature = head[:3]
+        if self.signature == b"CWS":
+            self._decompressor = zlib.decompressobj()
+        elif self.signature == b"ZWS":
+            # [CompressedLength:4][LZMAProperties:5] の後にLZMAデータが続く
+            lzma_head = f.read(9)
+            if len(lzma_head) < 9:
+                raise SwfFormatError("LZMAヘッダーが途中で途切れています。")
+            self._decompressor = _lzma_decompressor(lzma_head[4:])
+        elif f.seekable():
+            current = f.tell()
+            self._file_size = f.seek(0, os.SEEK_END)
+            f.seek(current)
+        self._buffer += head
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int) -> bytes:
+        """size バイト読む。終端に達した場合はそれより短いデータを返す。"""
+        while len(self._buffer) < size and not self._eof:
+            self._buffer += self._next_chunk(size - len(self._buffer))
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._pos += len(data)
+        return data
+
+    def skip(self, size: int) -> int:
+        """size バイト読み飛ばし、実際に進んだバイト数を返す。"""
+        skipped = min(size, len(self._buffer))
+        del self._buffer[:skipped]
+        if self._file_size is not None and skipped < size:
+            # グリフデータなどは読み込まずにシークで飛ばす
+            current = self._file.tell()
+            target = min(current + size - skipped, self._file_size)
+            self._file.seek(target)
+            skipped += target - current
+        while skipped < size and not self._eof:
+            skipped += len(self._next_chunk(size - skipped))
+        self._pos += skipped
+        return skipped
+
+    def _next_chunk(self, max_length: int) -> bytes:
+        """展開後のデータを最大 max_length バイト（かつ READ_CHUNK_SIZE 以下）返す。"""
+        max_length = min(max_length, READ_CHUNK_SIZE)
+        if self._decompressor is None:
+            data = self._file.read(max_length)
+            if not data:
+                self._eof = True
+            return data
+
+        if isinstance(self._decompressor, lzma.LZMADecompressor):
+            data = b""
+            if self._decompressor.needs_input:
+                data = self._file.read(READ_CHUNK_SIZE)
+                if not data:
+                    self._eof = True
+                    return b""
+            out = self._decompressor.decompress(data, max_length)
+        else:
+            data = self._pending or self._file.read(READ_CHUNK_SIZE)
+            if not data:
+                self._eof = True
+                return b""
+            out = self._decompressor.decompress(data, max_length)
+            self._pending = self._decompressor.unconsumed_tail
+
+        if self._decompressor.eof:
+            self._eof = True
+        return out
+
+    def read_header(self) -> SwfHeader:
+        """ストリーム先頭からSWFヘッダーを読む。"""
+        head = self.read(9)
+        if len(head) < 9:
+            raise SwfFormatError("SWFヘッダーが途中で途切れています。")
+        nbits = head[8] >> 3
+        rect_size = (5 + nbits * 4 + 7) // 8
+        head += self.read(rect_size - 1 + 4)
+        return read_swf_header(head)
+
+
+def _lzma_decompressor(props: bytes) -> "lzma.LZMADecompressor":
+    """SWF(ZWS)のLZMAプロパティ5バイトから生LZMA1デコーダを作る。"""
+    d = props[0]
+    lc = d % 9
+    d //= 9
+    lp = d % 5
+    pb = d // 5
+    dict_size = struct.unpack("<I", props[1:5])[0]
+    return lzma.LZMADecompressor(
+        format=lzma.FORMAT_RAW,
+        filters=[
+            {
+                "id": lzma.FILTER_LZMA1,
+                "dict_size": dict_size,
+                "lc": lc,
+                "lp": lp,
+                "pb": pb,
+            }
+        ],
+    )
+
+
+def iter_swf_tags(stream: SwfStream, header: SwfHeader):
+    """
+    ヘッダー直後からタグを順に辿り、(タグ種別, 本体開始位置, 本体長) を返す。
+
+    タグ長フィールドを使って次のタグへジャンプするため、コストはタグ数に比例する。
+    呼び出し側は yield の間に stream から本体の先頭を読んでよく、残りは読み飛ばす。
+    最終フレームの ShowFrame か End タグに達した時点で打ち切る。
+    """
+    frames = 0
+    while True:
+        tag_head = stream.read(2)
+        if len(tag_head) < 2:
+            return
+        tag_header = struct.unpack("<H", tag_head)[0]
+        tag_type = tag_header >> 6
+        tag_len = tag_header & 0x3F
+        if tag_len == 0x3F:  # 長いタグ
+            long_len = stream.read(4)
+            if len(long_len) < 4:
+                raise SwfFormatError("タグ長が途中で途切れています。")
+            tag_len = struct.unpack("<I", long_len)[0]
+
+        tag_start = stream.tell()
+        yield tag_type, tag_start, tag_len
+
+        if tag_type == TAG_END:
+            return
+
+        remaining = tag_start + tag_len - stream.tell()
+        if stream.skip(remaining) < remaining:
+            raise SwfFormatError(f"タグ長がデータ範囲を超えています。: type={tag_type}")
+
+        # 全フレーム分の定義タグを読み終えたら、残りは読む必要がない
+        if tag_type == TAG_SHOW_FRAME:
+            frames += 1
+            if header.frame_count and frames >= header.frame_count:
+                return
+
+
+class FontInfo:
+    """DefineFont系タグ1つ分のフォント情報"""
+
+    __slots__ = (
+        "font_id",
+        "name",
+        "bold",
+        "italic",
+        "small_text",
+        "language_code",
+        "glyph_count",
+        "wide_codes",
+        "tag_type",
+        "tag_offset",
+        "tag_length",
+        "display_name",
+        "copyright",
+        "coverage",
+    )
+
+    def __init__(
+        self,
+        font_id: int = 0,
+        name: str = "",
+        bold: bool = False,
+        italic: bool = False,
+        small_text: bool = False,
+        language_code: int = 0,
+        glyph_count: int = 0,
+        wide_codes: bool = False,
+        tag_type: int = 0,
+        tag_offset: int = 0,
+        tag_length: int = 0,
+        display_name: str = "",
+        copyright: str = "",
+        coverage: int = 0,
+    ):
+        self.font_id = font_id
+        self.name = name
+        self.bold = bold
+        self.italic = italic
+        self.small_text = small_text
+        # 1:ラテン 2:日本語 3:韓国語 4:簡体字中国語 5:繁体字中国語 0:指定なし
+        self.language_code = language_code
+        self.glyph_count = glyph_count
+        self.wide_codes = wide_codes
+        self.tag_type = tag_type
+        # 展開後SWF上のタグ本体の位置と長さ
+        self.tag_offset = tag_offset
+        self.tag_length = tag_length
+        # DefineFontName(88) で指定された表示名と著作権表記
+        self.display_name = display_name
+        self.copyright = copyright
+        # CodeTable から得た収録文字のビット集合（glyph_coverage 参照）
+        self.coverage = coverage
+
+    def to_dict(self) -> dict:
+        """キャッシュ保存用の辞書に変換する
+
+        coverage は大きいため含めない（キャッシュには別途圧縮して保存する）。
+        """
+        return {key: getattr(self, key) for key in self.__slots__ if key != "coverage"}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FontInfo":
+        """キャッシュの辞書から復元する（未知のキーは無視）"""
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+    def __eq__(self, other):
+        if not isinstance(other, FontInfo):
+            return NotImplemented
+        return self.to_dict() == other.to_dict() and self.coverage == other.coverage
+
+    def __repr__(self):
+        return f"FontInfo(font_id={self.font_id}, name={self.name!r})"
+
+
+def _decode_string(data: bytes) -> str:
+    return data.decode(ENCODE, errors="ignore").rstrip("\0")
+
+
+def _read_define_font(stream: SwfStream, tag_type: int, length: int) -> FontInfo:
+    """DefineFont/DefineFont2/DefineFont3 タグ本体の先頭からフォント情報を読む"""
+    info = FontInfo(tag_type=tag_type, tag_offset=stream.tell(), tag_length=length)
+
+    if tag_type == TAG_DEFINE_FONT:
+        # [FontID:2][OffsetTable...] 最初のオフセット / 2 がグリフ数
+        body = stream.read(min(length, 4))
+        if len(body) >= 2:
+            info.font_id = struct.unpack("<H", body[:2])[0]
+        if len(body) >= 4:
+            info.glyph_count = struct.unpack("<H", body[2:4])[0] // 2
+        return info
+
+    # [FontID:2][Flags:1][Language:1][NameLen:1][Name:NameLen][NumGlyphs:2]
+    body = stream.read(min(length, 5))
+    if len(body) < 5:
+        return info
+    info.font_id, flags, info.language_code, name_len = struct.unpack("<HBBB", body)
+    info.bold = bool(flags & 0x01)
+    info.italic = bool(flags & 0x02)
+    info.wide_codes = bool(flags & 0x04)
+    info.small_text = bool(flags & 0x20)
+    body = stream.read(min(length - 5, name_len + 2))
+    info.name = _decode_string(body[:name_len])
+    if len(body) < name_len + 2:
+        return info
+    info.glyph_count = struct.unpack("<H", body[name_len:])[0]
+    if not info.glyph_count:
+        return info
+
+    # [OffsetTable:NumGlyphs][CodeTableOffset][GlyphShapeTable...][CodeTable:NumGlyphs]
+    # グリフ形状は読み飛ばし、CodeTableOffset から CodeTable だけを読む
+    tag_end = info.tag_offset + length
+    offset_table_pos = stream.tell()
+    offset_size = 4 if flags & 0x08 else 2
+    code_size = 2 if info.wide_codes else 1
+    code_table_offset_pos = offset_table_pos + info.glyph_count * offset_size
+    if code_table_offset_pos + offset_size > tag_end:
+        return info
+    stream.skip(code_table_offset_pos - stream.tell())
+    raw = stream.read(offset_size)
+    if len(raw) < offset_size:
+        return info
+    code_table_offset = struct.unpack("<I" if offset_size == 4 else "<H", raw)[0]
+    code_table_pos = offset_table_pos + code_table_offset
+    code_table_size = info.glyph_count * code_size
+    if code_table_pos < stream.tell() or code_table_pos + code_table_size > tag_end:
+        return info
+    stream.skip(code_table_pos - stream.tell())
+    info.coverage = codes_to_coverage(stream.read(code_table_size), info.wide_codes)
+    return info
+
+
+def _apply_define_font_info(info: FontInfo, tag_type: int, body: bytes):
+    """DefineFontInfo/DefineFontInfo2 の内容を DefineFont の情報へ反映する"""
+    # [FontID:2][NameLen:1][Name:NameLen][Flags:1][Language:1(Info2のみ)][CodeTable]
+    name_len = body[2]
+    info.name = _decode_string(body[3 : 3 + name_len])
+    if len(body) > 3 + name_len:
+        flags = body[3 + name_len]
+        info.wide_codes = bool(flags & 0x01)
+        info.bold = bool(flags & 0x02)
+        info.italic = bool(flags & 0x04)
+        info.small_text = bool(flags & 0x20)
+    code_table_pos = 4 + name_len
+    if tag_type == TAG_DEFINE_FONT_INFO2 and len(body) > 4 + name_len:
+        info.language_code = body[4 + name_len]
+        code_table_pos += 1
+    info.coverage = codes_to_coverage(body[code_table_pos:], info.wide_codes)
+
+
+def walk_fonts(stream: SwfStream) -> list[FontInfo]:
+    """ヘッダーを解釈し、タグ単位でジャンプしながら全フォントの情報を1パスで収集する"""
+    header = stream.read_header()
+    fonts = {}
+    for tag_type, _, length in iter_swf_tags(stream, header):
+        if tag_type in (TAG_DEFINE_FONT, TAG_DEFINE_FONT2, TAG_DEFINE_FONT3):
+            info = _read_define_font(stream, tag_type, length)
+            fonts[info.font_id] = info
+        elif tag_type in (TAG_DEFINE_FONT_INFO, TAG_DEFINE_FONT_INFO2):
+            # CodeTable まで含めてもグリフ数 * 2 バイト程度なので全体を読む
+            body = stream.read(length)
+            if len(body) >= 3:
+                info = fonts.get(struct.unpack("<H", body[:2])[0])
+                if info is not None:
+                    _apply_define_font_info(info, tag_type, body)
+        elif tag_type == TAG_DEFINE_FONT_NAME:
+            # [FontID:2][FontName:STRING][FontCopyright:STRING]
+            body = stream.read(min(length, READ_CHUNK_SIZE))
+            if len(body) >= 2:
+                info = fonts.get(struct.unpack("<H", body[:2])[0])
+                if info is not None:
+                    parts = body[2:].split(b"\0")
+                    info.display_name = _decode_string(parts[0])
+                    if len(parts) > 1:
+                        info.copyright = _decode_string(parts[1])
+    return list(fonts.values())
 
-    # 1. 圧縮の解除
-    if raw_data[:3] == b'CWS':
-        # Header (8byte) はそのまま、それ以降を解凍
-        try:
-            data = raw_data[:8] + zlib.decompress(raw_data[8:])
-        except Exception:
-            data = raw_data
-    else:
-        data = raw_data
 
+def walk_font_names(stream: SwfStream) -> set:
+    """ヘッダーを解釈し、タグ単位でジャンプしながらフォント名を収集する"""
+    return {info.name for info in walk_fonts(stream) if info.name}
+
+
+def read_swf_data(swf_path: Path) -> bytes:
+    """
+    SWF全体を展開して返す（ヒューリスティック走査用）。
+
+    展開途中で壊れている場合は、展開できたところまでを返す。
+    """
+    with open_swf(swf_path) as f:
+        stream = SwfStream(f)
+        data = bytearray()
+        while True:
+            try:
+                chunk = stream.read(READ_CHUNK_SIZE)
+            except (zlib.error, lzma.LZMAError):
+                break
+            if not chunk:
+                break
+            data += chunk
+    return bytes(data)
+
+
+def scan_font_names_heuristic(data: bytes) -> set:
+    """
+    タグ構造を信用せず、1バイトずつDefineFont2/3らしき箇所を探すフォールバック。
+
+    ヘッダーやタグ長が壊れたSWF向け。全バイトを走査するため非常に遅い。
+    """
     font_names = set()
     data_size = len(data)
 
-    # 2. 高速スキャン (whileループでジャンプを制御)
+    # whileループでジャンプを制御
     i = 0
     while i < data_size - 10:
         # 2バイト読んでタグヘッダーとして解釈
-        tag_header = struct.unpack('<H', data[i : i + 2])[0]
+        tag_header = struct.unpack("<H", data[i : i + 2])[0]
         tag_type = tag_header >> 6
         tag_len = tag_header & 0x3F
 
         # DefineFont2 (48) or DefineFont3 (75) をターゲットにする
-        if tag_type in (48, 75):
+        if tag_type in FONT_NAME_TAGS:
             read_pos = i + 2
             actual_len = tag_len
             if tag_len == 0x3F:  # 長いタグ
                 if read_pos + 4 > data_size:
                     break
-                actual_len = struct.unpack('<I', data[read_pos : read_pos + 4])[0]
+                actual_len = struct.unpack("<I", data[read_pos : read_pos + 4])[0]
                 read_pos += 4
 
             # --- フィルタリング条件 ---
@@ -142,10 +580,10 @@ def swf_parser(swf_path: Path, cache: list, debug: bool = False) -> list[str]:
                     name_start = read_pos + 5
                     name_end = name_start + name_len
                     name_bytes = data[name_start:name_end]
-                    font_name = name_bytes.decode(ENCODE, errors='ignore').rstrip('\0')
+                    font_name = name_bytes.decode(ENCODE, errors="ignore").rstrip("\0")
 
                     # 条件2: 英数字、スペース、ハイフン、アンダースコアのみ許可
-                    if re.match(r'^[a-zA-Z0-9][a-zA-Z0-9\s_\-]+$', font_name):
+                    if re.match(r"^[a-zA-Z0-9][a-zA-Z0-9\s_\-]+$", font_name):
                         font_names.add(font_name)
 
                         # 【重要】本物を見つけたら、そのタグの終わりまで一気にジャンプ！
@@ -158,7 +596,223 @@ def swf_parser(swf_path: Path, cache: list, debug: bool = False) -> list[str]:
         # 本物が見つからない場合は1バイトずつ進む
         i += 1
 
-    return sorted(list(font_names))
+    return font_names
+
+
+def find_cached_fonts(
+    swf_path: Path,
+    cache,
+    debug: bool = False,
+    swf_dir: Path | None = None,
+    st: os.stat_result | None = None,
+) -> list[FontInfo] | None:
+    """
+    キャッシュから swf_path のフォント情報を探す。
+
+    cache には models.cache.Cache（索引で引く）か、エントリのリストを渡す。
+    swf_dir を渡した場合は swf_dir からの相対パスで、渡さない場合は swf_path そのもので引く。
+    st には走査時に取得済みの os.stat() の結果を渡せる（無ければここで stat する）。
+    サイズと更新日時(ns)が一致し、フォント情報とカバレッジを持つエントリがあればその内容を、
+    なければ None を返す。フォントを含まない・解析に失敗したSWFのエントリなら空のリストを返す。
+    """
+    if hasattr(cache, "get_entry"):
+        entry = cache.get_entry(swf_path, swf_dir)
+    else:
+        # エントリのリストが渡された場合（コマンドラインからの実行など）は完全一致で探す
+        key = str(swf_path)
+        if swf_dir is not None and swf_path.is_relative_to(swf_dir):
+            key = str(swf_path.relative_to(swf_dir))
+        entry = next((e for e in cache if e.get("swf_path") == key), None)
+    if entry is None:
+        return None
+
+    # サイズと更新日時が一致するか
+    # フォント情報やカバレッジを持たない古いキャッシュは一度だけ解析し直す
+    if st is None:
+        st = stat_swf(swf_path)
+    if (
+        not _entry_is_fresh(entry, st)
+        or "fonts" not in entry
+        or "coverage" not in entry
+    ):
+        return None
+
+    if entry.get("error"):
+        dprint(
+            f"前回解析に失敗したSWFのためキャッシュを使用: {swf_path.name} ({entry['error']})",
+            debug,
+        )
+    else:
+        dprint(f"キャッシュを使用: {swf_path.name}", debug)
+    return fonts_from_cache_entry(entry)
+
+
+def fonts_from_cache_entry(entry: dict) -> list[FontInfo]:
+    """キャッシュエントリに保存したフォント情報とカバレッジを FontInfo に戻す"""
+    fonts = [FontInfo.from_dict(f) for f in entry["fonts"]]
+    for info in fonts:
+        info.coverage = decode_coverage(entry["coverage"].get(info.name))
+    return fonts
+
+
+def _entry_is_fresh(entry: dict, st: os.stat_result) -> bool:
+    """キャッシュエントリのサイズと更新日時が st と一致するか
+
+    アーカイブ内のSWF（st が CRC-32 を持つ）は CRC-32 も比べる。
+    """
+    crc = getattr(st, "crc", None)
+    if crc is not None and entry.get("crc") != crc:
+        return False
+    if "mtime_ns" in entry:
+        return entry.get("size") == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+    # サイズと更新日時(ns)を持たない古いエントリは、秒単位の日時文字列で判定する。
+    # 一致した場合は Cache.refresh_stat() で新しい形式に置き換えられる
+    modified_date = entry.get("modified_date")
+    return bool(modified_date) and modified_date == datetime.fromtimestamp(
+        st.st_mtime
+    ).strftime(TIME_FORMAT)
+
+
+def parse_swf_file(swf_path: Path, debug: bool = False) -> list[FontInfo]:
+    """
+    キャッシュを見ずにSWFを解析し、DefineFont系タグからフォント情報を抽出します。
+
+    タグ構造が壊れている場合のみ、バイト単位のヒューリスティック走査にフォールバックする。
+    その場合はフォント名以外の情報は得られない。
+    キャッシュ(GUIスレッド側の状態)に触れないため、ワーカープロセスからも呼び出せる。
+    """
+    return parse_swf_file_with_error(swf_path, debug)[0]
+
+
+def parse_swf_file_with_error(
+    swf_path: Path, debug: bool = False, prefetched: PrefetchedFile | None = None
+) -> tuple[list[FontInfo], str | None]:
+    """
+    parse_swf_file() と同じ解析を行い、(FontInfo のリスト, エラー理由) を返す。
+
+    タグ構造を解釈できなかった場合や解析に失敗した場合は、その理由を返す
+    （ヒューリスティック走査でフォント名が取れた場合も含む）。問題が無ければ空文字列。
+    ファイルを読めなかった場合（OSError。MO2やゲームによるロック、権限、ネットワークなど）は
+    一時的な失敗として None を返す。解析の失敗とは違い、キャッシュに記録しないこと。
+    prefetched を渡した場合は、ファイルを開く代わりに先読み済みのデータから読む。
+    """
+    try:
+        with prefetched or open_swf(swf_path) as f:
+            return walk_fonts(SwfStream(f)), ""
+    except (SwfFormatError, zlib.error, lzma.LZMAError) as e:
+        # タグ構造や圧縮が壊れている場合はヒューリスティック走査
+        dprint(
+            f"タグ構造を解釈できないため総当たりで走査します: {swf_path.name} ({e})",
+            debug,
+        )
+        reason = f"{type(e).__name__}: {e}"
+        try:
+            font_names = scan_font_names_heuristic(read_swf_data(swf_path))
+        except OSError as e:
+            print(f"ファイルの読み込みに失敗しました: {e}")
+            return [], None
+        except Exception as e:
+            print(f"ファイルの読み込みに失敗しました: {e}")
+            return [], f"{type(e).__name__}: {e}"
+        return [FontInfo(name=font_name) for font_name in sorted(font_names)], reason
+    except OSError as e:
+        print(f"ファイルの読み込みに失敗しました: {e}")
+        return [], None
+    except Exception as e:
+        print(f"ファイルの読み込みに失敗しました: {e}")
+        return [], f"{type(e).__name__}: {e}"
+
+
+def parse_and_hash_swf_file(
+    swf_path: Path,
+    debug: bool = False,
+    with_hash: bool = True,
+    prefetched: PrefetchedFile | None = None,
+) -> tuple[list[FontInfo], str, str | None]:
+    """
+    parse_swf_file_with_error() の結果に、ファイル内容のハッシュを加えて返す。
+
+    Returns: (FontInfo のリスト, 内容ハッシュ, エラー理由)
+    ワーカープロセスで解析とハッシュ計算をまとめて行うために使う。
+    ハッシュの計算ではファイル全体を読むため、解析だけなら読み飛ばせるグリフ部分も読むことになる。
+    with_hash=False ならハッシュを計算しない（空文字列を返す）。
+    ファイルを読めなかった場合のハッシュも空文字列（エラー理由は None）。
+    prefetched を渡した場合は、先読み済みのデータを解析とハッシュの計算に使う。
+    """
+    fonts, error = parse_swf_file_with_error(swf_path, debug, prefetched)
+    if not with_hash or error is None:
+        return fonts, "", error
+    try:
+        content_hash = hash_file(swf_path, prefetched)
+    except OSError:
+        content_hash = ""
+    return fonts, content_hash, error
+
+
+def parse_and_hash_swf_files(
+    swf_paths: list[Path],
+    debug: bool = False,
+    with_hash: bool = True,
+    known_hashes: list[str | None] | None = None,
+) -> list[tuple[list[FontInfo], str, str | None]]:
+    """
+    swf_paths を順に parse_and_hash_swf_file() し、結果を同じ順のリストで返す。
+
+    SwfPrefetcher で次のSWFを先読みしながら解析するため、読み込みの待ち時間と解析が重なる。
+    ワーカープロセスへ数件ずつまとめて渡し、プロセスの中でも先読みを効かせるために使う。
+    known_hashes に swf_paths と同じ順で計算済みの内容ハッシュ（無ければ None）を渡すと、
+    そのSWFはハッシュを計算し直さずにその値を返す。
+    """
+    if known_hashes is None:
+        known_hashes = [None] * len(swf_paths)
+    results = []
+    for (swf_path, prefetched), known_hash in zip(
+        SwfPrefetcher(swf_paths), known_hashes
+    ):
+        fonts, content_hash, error = parse_and_hash_swf_file(
+            swf_path, debug, with_hash and not known_hash, prefetched
+        )
+        results.append((fonts, known_hash or content_hash, error))
+    return results
+
+
+def parse_swf_fonts(
+    swf_path: Path,
+    cache,
+    debug: bool = False,
+    swf_dir: Path | None = None,
+    st: os.stat_result | None = None,
+) -> list[FontInfo]:
+    """
+    SWFのフォント情報を返します。キャッシュが有効ならそれを使い、なければ解析します。
+
+    cache, swf_dir, st は find_cached_fonts() と同じ。
+    """
+    fonts = find_cached_fonts(swf_path, cache, debug, swf_dir, st)
+    if fonts is not None:
+        return fonts
+    return parse_swf_file(swf_path, debug)
+
+
+def font_names_of(fonts: list[FontInfo]) -> list[str]:
+    """フォント情報のリストから、重複を除いたフォント名をソートして返す"""
+    return sorted({info.name for info in fonts if info.name})
+
+
+def coverage_of(fonts: list[FontInfo]) -> dict[str, int]:
+    """フォント名ごとのカバレッジを返す（同名フォントが複数あれば和集合）"""
+    coverage = {}
+    for info in fonts:
+        if info.name:
+            coverage[info.name] = coverage.get(info.name, 0) | info.coverage
+    return coverage
+
+
+def swf_parser(swf_path: Path, cache: list, debug: bool = False) -> list[str]:
+    """
+    SWFのタグ構造を辿り、DefineFontタグから本物のフォント名だけを抽出します。
+    """
+    return font_names_of(parse_swf_fonts(swf_path, cache, debug))
 
 
 # テスト用
@@ -0,0 +1,137 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from const import (
+    SCAN_READAHEAD_HEAD_SIZE,
+    SCAN_READAHEAD_MAX_BYTES,
+    SCAN_READAHEAD_THREADS,
+)
+from modules.swf_archive import open_swf, stat_swf
+
+
+class PrefetchedFile:
+    """
+    先読みした先頭部分をメモリから返し、その先は必要になったときにファイルから読むファイルオブジェクト。
+
+    SwfStream が使う read / seek / tell / seekable だけを持つ。
+    ファイル全体を先読みできていればファイルを開き直さない。
+    先頭部分より後ろはシークで読み飛ばせるため、非圧縮SWFのグリフ部分は読まずに済む。
+    """
+
+    def __init__(self, path: Path, head: bytes, size: int):
+        self.path = path
+        self.head = head
+        self.size = size
+        self._pos = 0
+        self._rest = None
+        self._stack = ExitStack()
+
+    @property
+    def complete(self) -> bool:
+        """ファイル全体を先読みできているか"""
+        return len(self.head) >= self.size
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self.head[self._pos :]
+        else:
+            data = self.head[self._pos : self._pos + size]
+            size -= len(data)
+        self._pos += len(data)
+        if size == 0 or self.complete:
+            return data
+        rest = self._open_rest().read(size)
+        self._pos += len(rest)
+        return data + rest
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.size
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self):
+        """先頭部分より後ろを読むために開いたファイルを閉じる（先頭部分はそのまま読める）"""
+        self._stack.close()
+        self._rest = None
+
+    def __enter__(self) -> "PrefetchedFile":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _open_rest(self):
+        """先頭部分より後ろを読むためにファイルを開き、現在位置へシークして返す"""
+        if self._rest is None:
+            self._rest = self._stack.enter_context(open_swf(self.path))
+        if self._rest.tell() != self._pos:
+            self._rest.seek(self._pos)
+        return self._rest
+
+
+class SwfPrefetcher:
+    """
+    SWFの先頭部分を別スレッドで先読みし、渡された順に (パス, PrefetchedFile) を返す。
+
+    呼び出し側が1件を解析している間に次のSWFの読み込みを進め、I/O待ちと解析を重ねる
+    （HDDやネットワーク上のフォルダで効く）。
+    1件あたり head_size バイトまで読み、読み終えて使われていない分も含めて
+    メモリに置く量は max_bytes まで（少なくとも1件は先読みする）。
+    読み込みに失敗したSWFは PrefetchedFile の代わりに None を返す
+    （呼び出し側で普通に開き直し、同じエラーを扱う）。
+    途中で close() された場合は、まだ始まっていない読み込みを取り消す。
+    """
+
+    def __init__(
+        self,
+        swf_paths: Iterable[Path],
+        threads: int = SCAN_READAHEAD_THREADS,
+        max_bytes: int = SCAN_READAHEAD_MAX_BYTES,
+        head_size: int = SCAN_READAHEAD_HEAD_SIZE,
+    ):
+        self.swf_paths = swf_paths
+        self.threads = max(threads, 1)
+        self.head_size = head_size
+        self.max_in_flight = max(max_bytes // max(head_size, 1), 1)
+
+    def __iter__(self) -> Iterator[tuple[Path, PrefetchedFile | None]]:
+        pending: deque[tuple[Path, Future]] = deque()
+        with ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="swf-prefetch"
+        ) as executor:
+            try:
+                for swf_path in self.swf_paths:
+                    pending.append((swf_path, executor.submit(self._read, swf_path)))
+                    if len(pending) >= self.max_in_flight:
+                        yield self._pop(pending)
+                while pending:
+                    yield self._pop(pending)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _read(self, swf_path: Path) -> PrefetchedFile:
+        size = stat_swf(swf_path).st_size
+        with open_swf(swf_path) as f:
+            head = f.read(min(size, self.head_size))
+        return PrefetchedFile(swf_path, head, size)
+
+    @staticmethod
+    def _pop(pending: deque) -> tuple[Path, PrefetchedFile | None]:
+        swf_path, future = pending.popleft()
+        try:
+            return swf_path, future.result()
+        except Exception:
+            return swf_path, None
@@ -0,0 +1,79 @@
+"""
+キャッシュの保存形式ごとの読み書き時間を測るベンチマーク
+
+pytest の収集対象ではない。リポジトリのルートで次のように実行する。
+
+    PYTHONPATH=.:src python tests/benchmark_cache.py [エントリ数]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.models.cache import Cache
+from src.modules.glyph_coverage import coverage_blocks, encode_coverage
+
+DEFAULT_ENTRY_COUNT = 10_000
+
+
+def make_entries(count: int) -> list[dict]:
+    """フォント情報とカバレッジを持つ、実際に近い大きさのエントリを作る"""
+    coverage = encode_coverage(coverage_blocks()["kana"] | coverage_blocks()["ascii"])
+    entries = []
+    for i in range(count):
+        font_names = [f"font_{i}_{j}" for j in range(3)]
+        entries.append(
+            {
+                "swf_path": f"mod_{i // 10}/interface/fonts_{i}.swf",
+                "modified_date": "2026/01/01 12:00:00",
+                "font_names": font_names,
+                "fonts": [
+                    {"font_id": j + 1, "name": name, "glyph_count": 190}
+                    for j, name in enumerate(font_names)
+                ],
+                "coverage": {name: coverage for name in font_names},
+                "hash": "",
+            }
+        )
+    return entries
+
+
+def measure(label: str, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def bench(cache_path: Path, entries: list[dict], swf_dir: Path):
+    print(f"{cache_path.suffix} ({len(entries)} entries)")
+    cache = Cache(cache_path)
+    cache.data = entries
+    measure("save (all rows)", cache.save)
+    measure("load", lambda: Cache(cache_path).data)
+
+    # 1件だけ更新して保存（スキャンで1ファイルだけ変わった場合）
+    swf_file = swf_dir / "mod_0" / "interface" / "fonts_0.swf"
+    cache = Cache(cache_path)
+    cache.data
+    cache.update(swf_file, ["font_0_0"], swf_dir)
+    measure("save (1 changed row)", cache.save)
+    measure("save (no changes)", cache.save)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENTRY_COUNT
+    entries = make_entries(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        swf_dir = tmp_dir / "swfs"
+        (swf_dir / "mod_0" / "interface").mkdir(parents=True)
+        (swf_dir / "mod_0" / "interface" / "fonts_0.swf").touch()
+        bench(tmp_dir / "cache.yml", [dict(e) for e in entries], swf_dir)
+        bench(tmp_dir / "cache.sqlite3", [dict(e) for e in entries], swf_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from pathlib import Path
 import yaml
 
 from src.models.cache import Cache
+from src.modules.glyph_coverage import text_to_coverage
 
 
 def test_init_and_load_nonexistent(tmp_path):
@@ -99,7 +100,10 @@ def test_update_existing_entry(tmp_path):
 
     assert len(c.data) == 1
     assert c.data[0]["font_names"] == ["new_font"]
-    assert c.data[0]["modified_date"] != "2026/01/01 00:00:00"
+    # 秒単位の更新日時は size/mtime_ns に置き換わる
+    assert "modified_date" not in c.data[0]
+    assert c.data[0]["size"] == swf_file.stat().st_size
+    assert c.data[0]["mtime_ns"] == swf_file.stat().st_mtime_ns
 
 
 def test_update_absolute_path_fallback(tmp_path):
@@ -144,3 +148,441 @@ def test_no_alias_in_saved_yaml(tmp_path):
     # Read raw YAML and check for alias markers (* or &)
     raw_yaml = cache_file.read_text(encoding="utf-8")
     assert "&" not in raw_yaml or "*" not in raw_yaml  # No anchors or aliases
+
+
+def test_update_stores_font_info(tmp_path):
+    """Cache should keep per-font metadata next to font_names"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_info.swf"
+    swf_file.touch()
+    fonts = [{"font_id": 1, "name": "info_font", "glyph_count": 10}]
+
+    c = Cache(tmp_path / "cache.yml")
+    c.update(swf_file, ["info_font"], swf_dir, fonts=fonts)
+    c.save()
+
+    c2 = Cache(tmp_path / "cache.yml")
+    assert c2.data[0]["fonts"] == fonts
+
+
+def test_coverage_query(tmp_path):
+    """Cache should persist glyph coverage and answer coverage queries"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_cov.swf"
+    swf_file.touch()
+
+    c = Cache(tmp_path / "cache.yml")
+    c.update(
+        swf_file,
+        ["cov_font"],
+        swf_dir,
+        coverage={"cov_font": text_to_coverage("あいうえお")},
+    )
+    c.save()
+
+    c2 = Cache(tmp_path / "cache.yml")
+    assert c2.get_coverage(swf_file, swf_dir, "cov_font") == text_to_coverage(
+        "あいうえお"
+    )
+    assert c2.missing_chars(swf_file, swf_dir, "cov_font", "あかい") == "か"
+    assert c2.get_coverage(swf_file, swf_dir, "unknown") is None
+
+
+def test_get_entry_uses_index(tmp_path):
+    """Cache should look entries up by normalized relative path"""
+    swf_dir = tmp_path / "swfs"
+    (swf_dir / "interface").mkdir(parents=True)
+    swf_file = swf_dir / "interface" / "fonts_a.swf"
+    swf_file.touch()
+
+    c = Cache(tmp_path / "cache.yml")
+    c.data = [
+        {"swf_path": "interface\\fonts_a.swf", "font_names": ["a"], "hash": ""},
+    ]
+
+    assert c.get_entry(swf_file, swf_dir)["font_names"] == ["a"]
+    c.update(swf_file, ["b"], swf_dir)
+    assert len(c.data) == 1
+    assert c.get_entry(swf_file, swf_dir)["font_names"] == ["b"]
+
+
+def test_get_entry_does_not_match_suffix(tmp_path):
+    """An entry must not answer for a different file sharing its suffix"""
+    swf_dir = tmp_path / "swfs"
+    other = swf_dir / "mod" / "interface" / "fonts_a.swf"
+    other.parent.mkdir(parents=True)
+    other.touch()
+
+    c = Cache(tmp_path / "cache.yml")
+    c.data = [{"swf_path": "interface/fonts_a.swf", "font_names": ["a"], "hash": ""}]
+
+    assert c.get_entry(other, swf_dir) is None
+
+
+def _entry(swf_path, font_names):
+    return {
+        "swf_path": swf_path,
+        "modified_date": "2026/01/01 12:00:00",
+        "font_names": font_names,
+        "fonts": [],
+        "coverage": {},
+        "hash": "",
+    }
+
+
+def test_sqlite_save_and_reload(tmp_path):
+    """SQLite backend should round-trip entries in order"""
+    cache_file = tmp_path / "cache.sqlite3"
+    initial_data = [_entry("b/fonts_b.swf", ["ｂ"]), _entry("a/fonts_a.swf", ["a"])]
+
+    c = Cache(cache_file)
+    c.data = initial_data
+    assert c.save()
+
+    c2 = Cache(cache_file)
+    assert c2.data == initial_data
+
+
+def test_sqlite_save_writes_only_changed_rows(tmp_path, monkeypatch):
+    """Only updated entries should be written on save"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_a.swf"
+    swf_file.touch()
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.data = [_entry(f"fonts_{i}.swf", ["x"]) for i in range(100)]
+    c.save()
+
+    c2 = Cache(cache_file)
+    written = []
+    original_save = c2.backend.save
+    monkeypatch.setattr(
+        c2.backend,
+        "save",
+        lambda items, full, removed=(): (
+            written.append((len(items), full)),
+            original_save(items, full, removed),
+        ),
+    )
+    assert c2.save()
+    assert written == []  # 変更が無ければ書き込まない
+
+    c2.update(swf_file, ["font_a"], swf_dir)
+    c2.save()
+    assert written == [(1, False)]
+    assert len(Cache(cache_file).data) == 101
+
+
+def test_migrates_legacy_yaml_cache(tmp_path):
+    """An existing cache.yml should be moved into the SQLite cache once"""
+    legacy_file = tmp_path / "cache.yml"
+    initial_data = [_entry("fonts_old.swf", ["old_font"])]
+    legacy_file.write_text(yaml.dump(initial_data), encoding="utf-8")
+
+    c = Cache(tmp_path / "cache.sqlite3", legacy_path=legacy_file)
+    assert c.data == initial_data
+    assert not legacy_file.exists()
+
+    c2 = Cache(tmp_path / "cache.sqlite3", legacy_path=legacy_file)
+    assert c2.data == initial_data
+
+
+def test_load_is_lazy(tmp_path):
+    """Nothing should be read until the entries are needed"""
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    assert c._data is None
+    assert c.get_entry(tmp_path / "none.swf") is None
+    assert c._data == []
+
+
+def test_update_unchanged_entry_is_not_dirty(tmp_path):
+    """Updating an entry with identical values should not schedule a write"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_same.swf"
+    swf_file.touch()
+
+    c = Cache(tmp_path / "cache.sqlite3")
+    c.update(swf_file, ["font_a"], swf_dir)
+    c.save()
+    c.update(swf_file, ["font_a"], swf_dir)
+
+    assert c._dirty == set()
+
+
+def test_update_is_journaled_until_save(tmp_path):
+    """Updates should survive a crash before save() via the journal"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_a.swf"
+    swf_file.touch()
+    cache_file = tmp_path / "cache.sqlite3"
+
+    c = Cache(cache_file)
+    c.update(swf_file, ["font_a"], swf_dir)
+    # save() せずに終了した場合を想定
+    assert c.journal_path.exists()
+    assert not cache_file.exists()
+
+    c2 = Cache(cache_file)
+    assert c2.get_entry(swf_file, swf_dir)["font_names"] == ["font_a"]
+
+    assert c2.save()
+    assert not c2.journal_path.exists()
+    assert Cache(cache_file).get_entry(swf_file, swf_dir)["font_names"] == ["font_a"]
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    """A partially written journal line should be ignored"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    for name in ("fonts_a.swf", "fonts_b.swf"):
+        (swf_dir / name).touch()
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(swf_dir / "fonts_a.swf", ["font_a"], swf_dir)
+    c.update(swf_dir / "fonts_b.swf", ["font_b"], swf_dir)
+    c._journal.close()
+    raw = c.journal_path.read_bytes()
+    c.journal_path.write_bytes(raw[:-10])
+
+    c2 = Cache(cache_file)
+    assert [e["font_names"] for e in c2.data] == [["font_a"]]
+
+
+def test_compact_if_needed_uses_threshold(tmp_path):
+    """Compaction should only run once enough changes are journaled"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    for i in range(3):
+        (swf_dir / f"fonts_{i}.swf").touch()
+        c.update(swf_dir / f"fonts_{i}.swf", [f"font_{i}"], swf_dir)
+
+    c.compact_if_needed(threshold=4)
+    assert c.journal_path.exists()
+    c.compact_if_needed(threshold=3)
+    assert not c.journal_path.exists()
+    assert len(Cache(cache_file).data) == 3
+
+
+def test_replay_does_not_grow_journal(tmp_path):
+    """Replaying the journal on load should not append to it"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    swf_file = swf_dir / "fonts_a.swf"
+    swf_file.touch()
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(swf_file, ["font_a"], swf_dir)
+    c._journal.close()
+    size = c.journal_path.stat().st_size
+
+    c2 = Cache(cache_file)
+    assert len(c2.data) == 1
+    assert c2.journal_path.stat().st_size == size
+    assert c2._journal_count == 1
+
+
+def test_journal_append_after_truncated_line(tmp_path):
+    """New records after a crash should not be glued to the partial line"""
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    for name in ("fonts_a.swf", "fonts_b.swf", "fonts_c.swf"):
+        (swf_dir / name).touch()
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(swf_dir / "fonts_a.swf", ["font_a"], swf_dir)
+    c.update(swf_dir / "fonts_b.swf", ["font_b"], swf_dir)
+    c._journal.close()
+    c.journal_path.write_bytes(c.journal_path.read_bytes()[:-10])
+
+    c2 = Cache(cache_file)
+    c2.update(swf_dir / "fonts_c.swf", ["font_c"], swf_dir)
+    c2._journal.close()
+
+    c3 = Cache(cache_file)
+    assert sorted(e["font_names"][0] for e in c3.data) == ["font_a", "font_c"]
+
+
+def _touch_swfs(swf_dir, names):
+    swf_dir.mkdir(parents=True, exist_ok=True)
+    paths = [swf_dir / name for name in names]
+    for path in paths:
+        path.touch()
+    return paths
+
+
+def test_prune_missing_removes_only_entries_of_scanned_root(tmp_path):
+    """Entries not seen by a full scan of their root should be deleted"""
+    root_a = tmp_path / "a"
+    root_b = tmp_path / "b"
+    kept, gone = _touch_swfs(root_a, ["kept.swf", "gone.swf"])
+    (other,) = _touch_swfs(root_b, ["other.swf"])
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(kept, ["font_a"], root_a)
+    c.update(gone, ["font_b"], root_a)
+    c.update(other, ["font_c"], root_b)
+    c.save()
+
+    assert c.prune_missing(root_a, [kept]) == 1
+    assert c.get_entry(gone, root_a) is None
+    assert c.get_entry(other, root_b) is not None
+
+    # 保存前に終了しても削除はジャーナルから復元される
+    c._journal.close()
+    assert sorted(e["swf_path"] for e in Cache(cache_file).data) == [
+        "kept.swf",
+        "other.swf",
+    ]
+    assert c.save()
+    assert sorted(e["swf_path"] for e in Cache(cache_file).data) == [
+        "kept.swf",
+        "other.swf",
+    ]
+
+
+def test_evict_inactive_removes_least_recently_used_roots(tmp_path):
+    """Entries of inactive roots should be capped, oldest root first"""
+    roots = [tmp_path / name for name in ("old", "recent", "active")]
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    for t, root in enumerate(roots):
+        for path in _touch_swfs(root, [f"{root.name}_x.swf", f"{root.name}_y.swf"]):
+            c.update(path, ["font"], root)
+        c._roots[c._root_key(root)] = float(t)
+
+    assert c.evict_inactive(roots[2], max_entries=2) == 2
+    assert {e["root"] for e in c.data} == {
+        c._root_key(roots[1]),
+        c._root_key(roots[2]),
+    }
+    assert c._root_key(roots[0]) not in c._roots
+
+    c.save()
+    reloaded = Cache(cache_file)
+    assert len(reloaded.data) == 4
+    assert set(reloaded._roots) == {c._root_key(roots[1]), c._root_key(roots[2])}
+
+
+def test_touch_root_skips_recent_roots(tmp_path):
+    """touch_root() should not dirty the roots table for a recently scanned root"""
+    root = tmp_path / "swfs"
+    c = Cache(tmp_path / "cache.sqlite3")
+    c.touch_root(root)
+    assert c._roots_dirty
+    c.save()
+
+    c.touch_root(root)
+    assert not c._roots_dirty
+
+    c._roots[c._root_key(root)] -= 2 * 60 * 60
+    c.touch_root(root)
+    assert c._roots_dirty
+
+
+def test_report_and_compact(tmp_path):
+    """report() should count entries and compact() should flush the journal"""
+    root = tmp_path / "swfs"
+    fonts, empty = _touch_swfs(root, ["fonts.swf", "empty.swf"])
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(fonts, ["font_a"], root)
+    c.update(empty, [], root, error="SwfFormatError: bad")
+
+    report = c.report(root)
+    assert (report["entries"], report["active"], report["roots"]) == (2, 2, 1)
+    assert (report["fontless"], report["errors"], report["journal"]) == (0, 1, 2)
+
+    assert c.compact(root) == 0
+    assert not c.journal_path.exists()
+    assert c.report(root)["journal"] == 0
+
+
+def test_sqlite_schema_1_keeps_entries(tmp_path):
+    """Upgrading from schema version 1 should keep the cached entries"""
+    import sqlite3
+
+    cache_file = tmp_path / "cache.sqlite3"
+    conn = sqlite3.connect(cache_file)
+    conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+    conn.execute(
+        "INSERT INTO entries VALUES (?, ?)",
+        ("a.swf", '{"swf_path": "a.swf", "font_names": ["font_a"]}'),
+    )
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    c = Cache(cache_file)
+    assert [e["font_names"] for e in c.data] == [["font_a"]]
+    assert c._roots == {}
+
+
+def test_same_relative_path_in_different_roots_is_partitioned(tmp_path):
+    """Each library root should keep its own entry for the same relative path"""
+    root_a = tmp_path / "stable"
+    root_b = tmp_path / "testing"
+    (swf_a,) = _touch_swfs(root_a, ["fonts.swf"])
+    (swf_b,) = _touch_swfs(root_b, ["fonts.swf"])
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.update(swf_a, ["font_a"], root_a)
+    c.update(swf_b, ["font_b"], root_b)
+    c.save()
+
+    reloaded = Cache(cache_file)
+    assert reloaded.get_entry(swf_a, root_a)["font_names"] == ["font_a"]
+    assert reloaded.get_entry(swf_b, root_b)["font_names"] == ["font_b"]
+    assert [e["font_names"] for e in reloaded.entries_for_root(root_b)] == [["font_b"]]
+
+
+def test_legacy_entry_moves_to_root_partition(tmp_path):
+    """An entry without root should be re-keyed under the root that uses it"""
+    root = tmp_path / "swfs"
+    (swf,) = _touch_swfs(root, ["fonts.swf"])
+    cache_file = tmp_path / "cache.sqlite3"
+    c = Cache(cache_file)
+    c.data = [{"swf_path": "fonts.swf", "font_names": ["font_a"]}]
+    c.save()
+
+    c = Cache(cache_file)
+    assert c.get_entry(swf, root)["font_names"] == ["font_a"]
+    c.refresh_stat(swf, root, swf.stat())
+    c.save()
+
+    reloaded = Cache(cache_file)
+    assert len(reloaded.data) == 1
+    assert reloaded.get_entry(swf, root)["root"] == c._root_key(root)
+
+
+def test_sqlite_schema_2_keys_are_partitioned_by_root(tmp_path):
+    """Upgrading from schema version 2 should re-key entries that record a root"""
+    import json
+    import sqlite3
+
+    root = tmp_path / "swfs"
+    cache_file = tmp_path / "cache.sqlite3"
+    root_key = Cache(cache_file)._root_key(root)
+    conn = sqlite3.connect(cache_file)
+    conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+    conn.execute("CREATE TABLE roots (root TEXT PRIMARY KEY, last_used REAL NOT NULL)")
+    entry = {"swf_path": "a.swf", "root": root_key, "font_names": ["x"]}
+    conn.execute("INSERT INTO entries VALUES (?, ?)", ("a.swf", json.dumps(entry)))
+    conn.execute("INSERT INTO roots VALUES (?, 1.0)", (root_key,))
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+
+    c = Cache(cache_file)
+    assert len(c.data) == 1
+    assert c._roots == {root_key: 1.0}
+    assert c.remove_paths(root, [root / "a.swf"]) == 1
+    c.save()
+    assert Cache(cache_file).data == []
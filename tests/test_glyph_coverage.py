@@ -0,0 +1,80 @@
+import struct
+
+from src.modules import glyph_coverage as target
+
+
+def test_codes_to_coverage_wide_codes():
+    code_table = b"".join(struct.pack("<H", ord(c)) for c in "あA漢")
+    coverage = target.codes_to_coverage(code_table, wide_codes=True)
+
+    assert list(target.iter_code_points(coverage)) == sorted(map(ord, "あA漢"))
+
+
+def test_codes_to_coverage_narrow_codes():
+    coverage = target.codes_to_coverage(b"ABC", wide_codes=False)
+
+    assert list(target.iter_code_points(coverage)) == [65, 66, 67]
+
+
+def test_codes_to_coverage_empty():
+    assert target.codes_to_coverage(b"") == 0
+
+
+def test_missing_chars_returns_unique_sorted_chars():
+    coverage = target.text_to_coverage("あいうABC")
+
+    assert target.missing_chars(coverage, "あかかいきA") == "かき"
+    assert target.missing_chars(coverage, "あA") == ""
+
+
+def test_covers():
+    coverage = target.text_to_coverage("漢字かな")
+
+    assert target.covers(coverage, "かな漢字")
+    assert not target.covers(coverage, "カナ")
+    assert target.covers(coverage, "")
+
+
+def test_encode_decode_round_trip():
+    coverage = target.text_to_coverage("亜唖娃阿ABCｱｲｳ")
+
+    encoded = target.encode_coverage(coverage)
+    assert isinstance(encoded, str)
+    assert target.decode_coverage(encoded) == coverage
+    assert target.decode_coverage(target.encode_coverage(0)) == 0
+    assert target.decode_coverage("") == 0
+
+
+def test_coverage_blocks_sizes():
+    blocks = target.coverage_blocks()
+
+    assert blocks["ascii"].bit_count() == 95
+    assert blocks["jis_level1"].bit_count() == 2965
+    assert blocks["jis_level2"].bit_count() == 3390
+    assert target.covers(blocks["kana"], "あをんアヲンー")
+
+
+def test_coverage_matrix_queries():
+    blocks = {
+        "abc": target.text_to_coverage("ABC"),
+        "kana": target.text_to_coverage("あいう"),
+    }
+    matrix = target.CoverageMatrix(
+        [
+            ("full", target.text_to_coverage("ABCあいう")),
+            ("latin", target.text_to_coverage("ABCD")),
+            ("half", target.text_to_coverage("Aあい")),
+        ],
+        blocks,
+    )
+
+    assert len(matrix) == 3
+    assert matrix.ratios("abc") == [1.0, 1.0, 1 / 3]
+    assert matrix.fonts_covering("kana", threshold=0.6) == ["full", "half"]
+    assert matrix.row("latin") == {"abc": 1.0, "kana": 0.0}
+    assert matrix.row("unknown") is None
+    assert [key for key, _ in matrix.rank_by_text("あいう")] == [
+        "full",
+        "half",
+        "latin",
+    ]
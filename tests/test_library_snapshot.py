@@ -0,0 +1,27 @@
+from src.models.library_snapshot import LibrarySnapshot
+from src.modules.glyph_coverage import text_to_coverage
+
+
+def test_save_and_load_round_trip(tmp_path):
+    snapshot = LibrarySnapshot(tmp_path / "snapshot.json")
+    entry = {
+        "swf_path": str(tmp_path / "lib" / "fonts_a.swf"),
+        "font_names": ["font_a"],
+        "fonts": [{"font_id": 1, "name": "font_a"}],
+        "coverage": {"font_a": text_to_coverage("あいうABC")},
+        "root": str(tmp_path / "lib"),
+    }
+
+    assert snapshot.load() == {}
+    assert snapshot.save({str(tmp_path / "lib"): [entry]})
+    assert snapshot.load() == {str(tmp_path / "lib"): [entry]}
+    assert not (tmp_path / "snapshot.json.tmp").exists()
+
+
+def test_broken_or_old_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "snapshot.json"
+    path.write_text("{broken", encoding="utf-8")
+    assert LibrarySnapshot(path).load() == {}
+
+    path.write_text('{"version": 0, "roots": {}}', encoding="utf-8")
+    assert LibrarySnapshot(path).load() == {}
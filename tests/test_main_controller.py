@@ -0,0 +1,703 @@
+import shutil
+import threading
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.gui import main_controller as main_controller_module
+from src.gui.main_controller import MainController, ScanProgress
+from src.models.cache import Cache
+from src.models.library_snapshot import LibrarySnapshot
+from src.modules.glyph_coverage import text_to_coverage
+
+FONTS_CORE_SWF = Path(__file__).parent.parent / "data" / "fonts_core.swf"
+
+
+def _mapping(map_name, font_name, swf_path, category="every"):
+    return {
+        "map_name": map_name,
+        "font_name": font_name,
+        "swf_path": swf_path,
+        "weight": "Normal",
+        "category": category,
+        "flag": "require",
+    }
+
+
+def _controller(tmp_path, mappings, validnamechars):
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir(exist_ok=True)
+    settings = SimpleNamespace(swf_dir=str(swf_dir))
+    preset = SimpleNamespace(mappings=mappings, validnamechars=validnamechars)
+    cache = Cache(tmp_path / "cache.yml")
+    return MainController(settings, preset, cache), swf_dir
+
+
+def test_find_uncovered_validnamechars_uses_cached_coverage(tmp_path):
+    controller, swf_dir = _controller(
+        tmp_path,
+        [
+            _mapping("$EverywhereFont", "font_a", "a/fonts_a.swf"),
+            _mapping("$ConsoleFont", "font_b", "a/fonts_a.swf", "console"),
+            _mapping("$DragonFont", "font_a", "a/fonts_a.swf", "special"),
+        ],
+        "あいうABC",
+    )
+    swf_file = swf_dir / "a" / "fonts_a.swf"
+    swf_file.parent.mkdir()
+    swf_file.touch()
+    controller.cache.update(
+        swf_file,
+        ["font_a", "font_b"],
+        swf_dir,
+        fonts=[{"font_id": 1, "name": "font_a"}, {"font_id": 2, "name": "font_b"}],
+        coverage={
+            "font_a": text_to_coverage("あいうABC"),
+            "font_b": text_to_coverage("ABC"),
+        },
+    )
+
+    assert controller.find_uncovered_validnamechars() == [
+        ("$ConsoleFont", "font_b", "あいう")
+    ]
+
+    # 置き換えられたSWFは古い収録文字を使わずに解析し直す
+    swf_file.write_bytes(b"not a swf")
+    assert controller.find_uncovered_validnamechars() == []
+    assert controller.cache.get_entry(swf_file, swf_dir)["font_names"] == []
+
+
+def test_find_uncovered_validnamechars_parses_on_cache_miss(tmp_path):
+    controller, swf_dir = _controller(
+        tmp_path,
+        [_mapping("$EverywhereFont", "Daedric", "system/fonts_core.swf")],
+        "ABCあ",
+    )
+    (swf_dir / "system").mkdir()
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "system" / "fonts_core.swf")
+
+    assert controller.find_uncovered_validnamechars() == [
+        ("$EverywhereFont", "Daedric", "あ")
+    ]
+    # 解析結果はキャッシュに反映される
+    assert controller.cache.get_coverage(
+        swf_dir.resolve() / "system" / "fonts_core.swf",
+        swf_dir.resolve(),
+        "Daedric",
+    )
+
+
+def test_find_uncovered_validnamechars_skips_unknown_fonts(tmp_path):
+    controller, _ = _controller(
+        tmp_path,
+        [_mapping("$EverywhereFont", "font_x", "missing/fonts_x.swf")],
+        "ABC",
+    )
+
+    assert controller.find_uncovered_validnamechars() == []
+
+
+def test_update_coverage_matrix_and_block_query(tmp_path):
+    controller, _ = _controller(tmp_path, [], "")
+    ascii_chars = "".join(map(chr, range(0x20, 0x7F)))
+    controller.update_coverage_matrix(
+        [
+            {
+                "swf_path": "/x/fonts_a.swf",
+                "font_names": ["font_a", "font_b"],
+                "coverage": {
+                    "font_a": text_to_coverage(ascii_chars),
+                    "font_b": text_to_coverage("ABC"),
+                },
+            }
+        ]
+    )
+
+    assert controller.fonts_covering_block("ascii", 0.99) == {
+        ("/x/fonts_a.swf", "font_a")
+    }
+    assert controller.rank_fonts_by_text("ABC")[0][1] == 1.0
+
+
+def test_scan_swf_directory_parallel_matches_serial(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(20):
+        sub_dir = swf_dir / f"mod_{i:02}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i:02}.swf")
+
+    results = {}
+    for workers in (1, 2):
+        settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=workers)
+        preset = SimpleNamespace(mappings=[], validnamechars="")
+        cache = Cache(tmp_path / f"cache_{workers}.yml")
+        controller = MainController(settings, preset, cache)
+        results[workers] = (controller.scan_swf_directory(swf_dir), cache.data)
+
+    serial, parallel = results[1], results[2]
+    assert len(serial[0]) == 20
+    assert parallel[0] == serial[0]
+    assert [e["swf_path"] for e in parallel[1]] == [e["swf_path"] for e in serial[1]]
+    assert [e["fonts"] for e in parallel[1]] == [e["fonts"] for e in serial[1]]
+
+
+def test_scan_swf_directory_reports_progress_and_cancels(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(5):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.yml"))
+    cancel_event = threading.Event()
+    progress = []
+
+    def on_progress(done, total, result):
+        progress.append((done, total))
+        if done == 2:
+            cancel_event.set()
+
+    results = controller.scan_swf_directory(
+        swf_dir, progress_callback=on_progress, cancel_event=cancel_event
+    )
+
+    assert progress == [(1, 5), (2, 5)]
+    assert len(results) == 2
+    # 中断までに解析した分だけがキャッシュに入る
+    assert len(controller.cache.data) == 2
+
+
+def test_iter_scan_yields_normalized_results_and_counts(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(3):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    (swf_dir / "empty.swf").write_bytes(b"")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.yml"))
+
+    progress = ScanProgress()
+    results = list(controller.iter_scan(swf_dir, progress=progress))
+
+    assert len(results) == 4
+    assert all(isinstance(r["swf_path"], str) for r in results)
+    assert sum(1 for r in results if r["font_names"]) == 3
+    assert (progress.total, progress.done, progress.parsed, progress.found) == (
+        4,
+        4,
+        4,
+        3,
+    )
+
+    # 2回目はキャッシュから返り、途中でやめても残りは解析しない
+    progress = ScanProgress()
+    scan = controller.iter_scan(swf_dir, progress=progress)
+    next(scan)
+    scan.close()
+    assert (progress.done, progress.cached, progress.parsed) == (1, 1, 0)
+
+
+def test_iter_scan_reuses_results_of_moved_swf(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    (swf_dir / "old").mkdir(parents=True)
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "old" / "fonts_core.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    first = list(controller.iter_scan(swf_dir))
+    assert controller.cache.data[0]["hash"]
+
+    (swf_dir / "new").mkdir()
+    (swf_dir / "old" / "fonts_core.swf").rename(swf_dir / "new" / "renamed.swf")
+    parsed = []
+    monkeypatch.setattr(
+        main_controller_module,
+        "parse_and_hash_swf_file",
+        lambda *args: parsed.append(args) or ([], "", ""),
+    )
+    progress = ScanProgress()
+    second = list(controller.iter_scan(swf_dir, progress=progress))
+
+    assert parsed == []
+    assert (progress.cached, progress.parsed) == (1, 0)
+    assert second[0]["font_names"] == first[0]["font_names"]
+    assert controller.cache.get_entry(swf_dir / "new" / "renamed.swf", swf_dir)
+
+
+def test_iter_scan_hashes_same_size_miss_only_once(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    (swf_dir / "a").mkdir(parents=True)
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "a" / "fonts_core.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+
+    # 同じサイズで中身の違うSWFは、移動の判定で計算したハッシュを解析でも使う
+    other = swf_dir / "b" / "other.swf"
+    other.parent.mkdir()
+    other.write_bytes(b"x" * FONTS_CORE_SWF.stat().st_size)
+    hashed = []
+    for module_globals in (
+        vars(main_controller_module),
+        main_controller_module.parse_and_hash_swf_file.__globals__,
+    ):
+        hash_file = module_globals["hash_file"]
+        monkeypatch.setitem(
+            module_globals,
+            "hash_file",
+            lambda path, *args, hash_file=hash_file: hashed.append(path.name)
+            or hash_file(path, *args),
+        )
+    progress = ScanProgress()
+    list(controller.iter_scan(swf_dir, progress=progress))
+
+    assert progress.parsed == 1
+    assert hashed == ["other.swf"]
+    entry = controller.cache.get_entry(other, swf_dir)
+    assert entry["hash"] == main_controller_module.hash_file(other)
+
+
+def test_iter_scan_caches_swfs_without_fonts(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    (swf_dir / "broken.swf").write_bytes(b"not a swf")
+    (swf_dir / "menu.swf").write_bytes(
+        b"FWS\x0a\x11\x00\x00\x00\x00\x00\x18\x01\x00\x40\x00\x00\x00"
+    )
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+
+    entries = {e["swf_path"]: e for e in controller.cache.data}
+    assert entries["menu.swf"]["font_names"] == []
+    assert "error" not in entries["menu.swf"]
+    assert entries["broken.swf"]["font_names"] == []
+    assert entries["broken.swf"]["error"].startswith("SwfFormatError")
+
+    # 2回目は解析しない
+    monkeypatch.setattr(
+        main_controller_module,
+        "parse_and_hash_swf_file",
+        lambda *args: pytest.fail("unchanged SWF was parsed again"),
+    )
+    progress = ScanProgress()
+    list(controller.iter_scan(swf_dir, progress=progress))
+    assert (progress.cached, progress.parsed) == (2, 0)
+
+
+def test_iter_scan_skips_content_hash_when_disabled(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "fonts_core.swf")
+    settings = SimpleNamespace(
+        swf_dir=str(swf_dir), scan_workers=1, hash_swf_contents=False
+    )
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    monkeypatch.setitem(
+        main_controller_module.parse_and_hash_swf_file.__globals__,
+        "hash_file",
+        lambda *args: pytest.fail("content hash was computed"),
+    )
+
+    results = list(controller.iter_scan(swf_dir))
+
+    assert results[0]["font_names"]
+    assert controller.cache.data[0]["hash"] == ""
+
+
+def test_iter_scan_does_not_cache_unreadable_swfs(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "fonts_core.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+
+    def locked(path):
+        raise PermissionError(f"locked: {path}")
+
+    with monkeypatch.context() as m:
+        m.setattr(main_controller_module.SwfPrefetcher, "_read", lambda _, p: locked(p))
+        m.setitem(
+            main_controller_module.parse_and_hash_swf_file.__globals__,
+            "open_swf",
+            locked,
+        )
+        results = list(controller.iter_scan(swf_dir))
+    assert results[0]["font_names"] == []
+    assert controller.cache.data == []
+
+    # ロックが外れたら次のスキャンで読み直す
+    progress = ScanProgress()
+    results = list(controller.iter_scan(swf_dir, progress=progress))
+    assert progress.parsed == 1
+    assert results[0]["font_names"]
+
+
+def test_find_uncovered_validnamechars_caches_swf_without_fonts(tmp_path, monkeypatch):
+    controller, swf_dir = _controller(
+        tmp_path,
+        [_mapping("$EverywhereFont", "font_a", "a/broken.swf")],
+        "ABC",
+    )
+    (swf_dir / "a").mkdir()
+    (swf_dir / "a" / "broken.swf").write_bytes(b"not a swf")
+
+    assert controller.find_uncovered_validnamechars() == []
+    entry = controller.cache.get_entry(swf_dir / "a" / "broken.swf", swf_dir)
+    assert entry["font_names"] == []
+    assert entry["error"]
+
+    # 2回目は解析しない
+    monkeypatch.setattr(
+        main_controller_module,
+        "parse_and_hash_swf_file",
+        lambda *args: pytest.fail("broken SWF was parsed again"),
+    )
+    assert controller.find_uncovered_validnamechars() == []
+
+
+def test_iter_scan_yields_cache_hits_during_walk(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    for i in range(3):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.yml"))
+    list(controller.iter_scan(swf_dir))
+
+    walked = []
+    iter_files = main_controller_module.SwfTreeScanner.iter_files
+    monkeypatch.setattr(
+        main_controller_module.SwfTreeScanner,
+        "iter_files",
+        lambda self: (walked.append(item) or item for item in iter_files(self)),
+    )
+    base_dir_calls = []
+    get_swf_base_dir = controller._get_swf_base_dir
+    monkeypatch.setattr(
+        controller,
+        "_get_swf_base_dir",
+        lambda: base_dir_calls.append(1) or get_swf_base_dir(),
+    )
+
+    scan = controller.iter_scan(swf_dir)
+    first = next(scan)
+    # 最初の結果は走査が終わる前に返る
+    assert len(walked) == 1
+    assert first["font_names"]
+    assert len(list(scan)) == 2
+    # 基準ディレクトリの解決はスキャンにつき1回
+    assert len(base_dir_calls) == 1
+
+
+def test_iter_scan_prunes_deleted_swfs(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(2):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+    assert len(controller.cache.data) == 2
+
+    # 中断したスキャンでは削除しない
+    shutil.rmtree(swf_dir / "mod_1")
+    cancel_event = threading.Event()
+    cancel_event.set()
+    list(controller.iter_scan(swf_dir, cancel_event=cancel_event))
+    assert len(controller.cache.data) == 2
+
+    list(controller.iter_scan(swf_dir))
+    assert [Path(e["swf_path"]).name for e in controller.cache.data] == ["fonts_0.swf"]
+
+
+def test_iter_scan_cancels_walk_on_cold_cache(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    for i in range(3):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(
+        controller,
+        "_prune_cache",
+        lambda *args: pytest.fail("cancelled scan pruned the cache"),
+    )
+    cancel_event = threading.Event()
+    cancel_event.set()
+    progress = ScanProgress()
+
+    assert list(controller.iter_scan(swf_dir, cancel_event, progress)) == []
+    assert (progress.total, progress.done) == (1, 0)
+
+
+def test_iter_scan_reports_diff_from_previous_scan(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(3):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+    assert len(controller.last_scan_diff.added) == 3
+
+    list(controller.iter_scan(swf_dir))
+    assert not controller.last_scan_diff
+
+    shutil.rmtree(swf_dir / "mod_0")
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "mod_1" / "fonts_new.swf")
+    list(controller.iter_scan(swf_dir))
+    diff = controller.last_scan_diff
+    assert [p.name for p in diff.added] == ["fonts_new.swf"]
+    assert [p.name for p in diff.removed] == ["fonts_0.swf"]
+    assert diff.changed == []
+
+
+def test_scan_changes_parses_only_affected_swfs(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    for i in range(3):
+        sub_dir = swf_dir / f"mod_{i}"
+        sub_dir.mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, sub_dir / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+    assert controller.scan_changes(swf_dir) == ([], [])
+
+    shutil.rmtree(swf_dir / "mod_0")
+    (swf_dir / "mod_3").mkdir()
+    (swf_dir / "mod_3" / "fonts_3.swf").write_bytes(b"not a swf")
+    parsed = []
+    parse = main_controller_module.parse_and_hash_swf_file
+    monkeypatch.setattr(
+        main_controller_module,
+        "parse_and_hash_swf_file",
+        lambda *args: parsed.append(args[0].name) or parse(*args),
+    )
+
+    stale, updated = controller.scan_changes(swf_dir)
+
+    assert parsed == ["fonts_3.swf"]
+    assert [Path(p).name for p in stale] == ["fonts_0.swf"]
+    assert [(Path(r["swf_path"]).name, r["font_names"]) for r in updated] == [
+        ("fonts_3.swf", [])
+    ]
+    assert sorted(Path(e["swf_path"]).name for e in controller.cache.data) == [
+        "fonts_1.swf",
+        "fonts_2.swf",
+        "fonts_3.swf",
+    ]
+    assert str(swf_dir / "mod_3") in controller.watch_paths(swf_dir)
+
+
+def test_scan_changes_walks_only_reported_paths(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for i in range(2):
+        (swf_dir / f"mod_{i}").mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, swf_dir / f"mod_{i}" / f"fonts_{i}.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    list(controller.iter_scan(swf_dir))
+
+    (swf_dir / "mod_0" / "fonts_0.swf").unlink()
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "mod_1" / "fonts_new.swf")
+    stale, updated = controller.scan_changes(swf_dir, [str(swf_dir / "mod_1")])
+    assert stale == []
+    assert [Path(r["swf_path"]).name for r in updated] == ["fonts_new.swf"]
+
+    # 後から報告された削除も拾う
+    stale, updated = controller.scan_changes(swf_dir, [str(swf_dir / "mod_0")])
+    assert [Path(p).name for p in stale] == ["fonts_0.swf"]
+    assert updated == []
+
+
+def test_iter_scan_parses_and_caches_swfs_inside_archives(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    swf_dir.mkdir()
+    archive = swf_dir / "font_mod.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(FONTS_CORE_SWF, "interface/fonts_core.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+
+    results = list(controller.iter_scan(swf_dir))
+
+    assert [Path(r["swf_path"]).relative_to(swf_dir).as_posix() for r in results] == [
+        "font_mod.zip/interface/fonts_core.swf"
+    ]
+    assert results[0]["font_names"]
+    member = zipfile.ZipFile(archive).getinfo("interface/fonts_core.swf")
+    assert controller.cache.data[0]["crc"] == member.CRC
+
+    # 2回目は展開も解析もせずキャッシュから返す
+    progress = ScanProgress()
+    list(controller.iter_scan(swf_dir, progress=progress))
+    assert (progress.cached, progress.parsed) == (1, 0)
+
+
+def test_iter_scan_roots_merges_roots_and_restores_without_walking(
+    tmp_path, monkeypatch
+):
+    roots = [tmp_path / "stable", tmp_path / "testing"]
+    for root in roots:
+        (root / "interface").mkdir(parents=True)
+        shutil.copy(FONTS_CORE_SWF, root / "interface" / "fonts_core.swf")
+    settings = SimpleNamespace(
+        swf_dir=str(roots[0]), swf_dirs=[str(r) for r in roots], scan_workers=1
+    )
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    cache = Cache(tmp_path / "cache.sqlite3")
+    controller = MainController(settings, preset, cache)
+
+    progress = ScanProgress()
+    results = list(controller.iter_scan_roots(progress=progress))
+
+    assert sorted((r["root"], r["swf_path"]) for r in results) == [
+        (str(root), str((root / "interface" / "fonts_core.swf").resolve()))
+        for root in roots
+    ]
+    assert (progress.total, progress.done) == (2, 2)
+    assert len(cache.data) == 2
+    assert controller.display_swf_path(results[0]["swf_path"]).endswith(
+        "interface/fonts_core.swf"
+    )
+
+    # 切り替えは前回の結果を使い、ディスクを走査しない
+    def fail_walk(self):
+        raise AssertionError("should not walk the disk")
+
+    monkeypatch.setattr(main_controller_module.SwfTreeScanner, "iter_files", fail_walk)
+    settings.swf_dir = str(roots[1])
+    assert len(controller.library_results()) == 2
+
+    # このセッションでスキャンしていないフォルダはキャッシュの記録から作る
+    fresh = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+    restored = fresh.library_results()
+    assert sorted(r["root"] for r in restored) == sorted(str(r) for r in roots)
+    assert all(r["font_names"] for r in restored)
+
+
+def test_iter_scan_preset_swfs_scans_mapped_swfs_before_the_library(tmp_path):
+    roots = [tmp_path / "stable", tmp_path / "testing"]
+    for root in roots:
+        for name in ("fonts_a.swf", "fonts_b.swf"):
+            (root / "interface").mkdir(parents=True, exist_ok=True)
+            shutil.copy(FONTS_CORE_SWF, root / "interface" / name)
+    mapped = [
+        "interface/fonts_b.swf",
+        str(roots[1] / "interface" / "fonts_a.swf"),
+        "missing.swf",
+    ]
+    settings = SimpleNamespace(
+        swf_dir=str(roots[0]), swf_dirs=[str(r) for r in roots], scan_workers=1
+    )
+    preset = SimpleNamespace(
+        mappings=[], validnamechars="", get_mapping_swf_paths=lambda: mapped
+    )
+    controller = MainController(settings, preset, Cache(tmp_path / "cache.sqlite3"))
+
+    progress = ScanProgress()
+    first = list(controller.iter_scan_preset_swfs(progress=progress))
+
+    expected = [
+        (str(roots[0]), str((roots[0] / "interface" / "fonts_b.swf").resolve())),
+        (str(roots[1]), str((roots[1] / "interface" / "fonts_a.swf").resolve())),
+    ]
+    assert [(r["root"], r["swf_path"]) for r in first] == expected
+    assert all(r["font_names"] for r in first)
+    assert (progress.total, progress.parsed) == (2, 2)
+
+    # 残りのスキャンは返し済みのSWFを返さず、キャッシュ済みとして扱う
+    progress = ScanProgress()
+    rest = list(
+        controller.iter_scan_roots(
+            progress=progress, skip_paths={r["swf_path"] for r in first}
+        )
+    )
+    assert len(rest) == 2
+    assert not {r["swf_path"] for r in rest} & {p for _, p in expected}
+    # 同じ内容のSWFなので、残りの2件も内容ハッシュからキャッシュを使う
+    assert (progress.done, progress.cached) == (4, 4)
+    assert len(controller.library_results()) == 4
+
+
+def test_library_snapshot_restores_results_and_reports_changes(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    for name in ("fonts_a.swf", "fonts_b.swf"):
+        (swf_dir / "interface").mkdir(parents=True, exist_ok=True)
+        shutil.copy(FONTS_CORE_SWF, swf_dir / "interface" / name)
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    snapshot = LibrarySnapshot(tmp_path / "snapshot.json")
+    controller = MainController(
+        settings, preset, Cache(tmp_path / "cache.sqlite3"), snapshot=snapshot
+    )
+    assert not controller.restore_library_snapshot()
+    list(controller.iter_scan_roots())
+    assert controller.save_library_snapshot()
+
+    # 起動時はディスクもキャッシュも見ずに前回の結果を使う
+    restored = MainController(settings, preset, None, snapshot=snapshot)
+    assert restored.restore_library_snapshot()
+    shown = restored.library_results()
+    assert shown == controller.library_results()
+
+    # 照合のスキャン後は、変わったSWFだけを差分として返す
+    (swf_dir / "interface" / "fonts_b.swf").unlink()
+    restored.cache = Cache(tmp_path / "cache.sqlite3")
+    list(restored.iter_scan_roots())
+    stale, updated = restored.library_changes(shown)
+    assert stale == [str((swf_dir / "interface" / "fonts_b.swf").resolve())]
+    assert updated == []
+
+
+def test_save_library_snapshot_skips_unchanged_results(tmp_path, monkeypatch):
+    swf_dir = tmp_path / "swfs"
+    (swf_dir / "interface").mkdir(parents=True)
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "interface" / "fonts_a.swf")
+    settings = SimpleNamespace(swf_dir=str(swf_dir), scan_workers=1)
+    preset = SimpleNamespace(mappings=[], validnamechars="")
+    snapshot = LibrarySnapshot(tmp_path / "snapshot.json")
+    controller = MainController(
+        settings, preset, Cache(tmp_path / "cache.sqlite3"), snapshot=snapshot
+    )
+    list(controller.iter_scan_roots())
+    assert controller.save_library_snapshot()
+
+    # 照合のスキャンで何も変わっていなければ書き直さない
+    restored = MainController(
+        settings, preset, Cache(tmp_path / "cache.sqlite3"), snapshot=snapshot
+    )
+    assert restored.restore_library_snapshot()
+    list(restored.iter_scan_roots())
+    saved = []
+    monkeypatch.setattr(snapshot, "save", lambda roots: saved.append(roots) or True)
+    assert restored.save_library_snapshot()
+    assert saved == []
+
+    shutil.copy(FONTS_CORE_SWF, swf_dir / "interface" / "fonts_b.swf")
+    list(restored.iter_scan_roots())
+    assert restored.save_library_snapshot()
+    assert len(saved) == 1
+    assert restored.save_library_snapshot()
+    assert len(saved) == 1
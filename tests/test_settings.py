@@ -171,3 +171,53 @@ def test_migrated_flag_is_false_when_no_legacy_transform_needed(tmp_path):
 
     s = Settings(settings_file)
     assert s.migrated is False
+
+
+def test_hash_swf_contents_defaults_to_true(tmp_path):
+    """hash_swf_contents should default to True and round-trip as bool"""
+    settings_file = tmp_path / "settings.yml"
+    s = Settings(settings_file)
+    assert s.hash_swf_contents is True
+
+    s.hash_swf_contents = False
+    s.save()
+    assert Settings(settings_file).hash_swf_contents is False
+
+
+def test_scan_rule_settings_are_normalized(tmp_path):
+    """scan_* settings should fall back to safe defaults on bad values"""
+    settings_file = tmp_path / "settings.yml"
+    settings_file.write_text(
+        yaml.dump(
+            {
+                "scan_include": "interface/*.swf",
+                "scan_exclude": ["*_backup", None],
+                "scan_max_depth": "x",
+                "scan_max_file_size": -1,
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    s = Settings(settings_file)
+    assert s.scan_include == ["interface/*.swf"]
+    assert s.scan_exclude == ["*_backup"]
+    assert s.scan_max_depth == 0
+    assert s.scan_max_file_size == 0
+    assert s.scan_skip_heavy_dirs is True
+
+
+def test_swf_dirs_always_include_active_swf_dir(tmp_path):
+    """Setting swf_dir should register it as a library root"""
+    settings_file = tmp_path / "settings.yml"
+    s = Settings(settings_file)
+    assert s.swf_dirs == []
+
+    s.swf_dir = "/lib/stable"
+    s.swf_dir = "/lib/testing"
+    s.swf_dir = "/lib/stable"
+    s.save()
+
+    reloaded = Settings(settings_file)
+    assert reloaded.swf_dir == "/lib/stable"
+    assert reloaded.swf_dirs == ["/lib/stable", "/lib/testing"]
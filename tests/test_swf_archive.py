@@ -0,0 +1,104 @@
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.modules import swf_archive as target
+from src.modules.generator import preset_generator
+from src.modules.swf_finder import SwfTreeScanner, hash_file
+
+FONTS_CORE_SWF = Path(__file__).parent.parent / "data" / "fonts_core.swf"
+
+
+def _write_zip(path: Path, members: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+def test_member_paths_are_opened_and_stated_without_extracting(tmp_path):
+    archive = tmp_path / "mod.zip"
+    _write_zip(archive, {"interface/fonts_a.swf": b"0123456789"})
+    member = archive / "interface" / "fonts_a.swf"
+
+    assert target.split_archive_path(member) == (archive, "interface/fonts_a.swf")
+    assert target.split_archive_path(tmp_path / "plain.swf") is None
+    with target.open_swf(member) as f:
+        assert f.read() == b"0123456789"
+    st = target.stat_swf(member)
+    assert st.st_size == 10
+    assert st.crc == zipfile.ZipFile(archive).getinfo("interface/fonts_a.swf").CRC
+    assert target.swf_exists(member)
+    assert not target.swf_exists(archive / "interface" / "missing.swf")
+    with pytest.raises(FileNotFoundError):
+        target.stat_swf(archive / "missing.swf")
+
+
+def test_hash_of_member_matches_extracted_file(tmp_path):
+    _write_zip(tmp_path / "mod.zip", {"fonts.swf": b"abc" * 1000})
+    (tmp_path / "fonts.swf").write_bytes(b"abc" * 1000)
+
+    assert hash_file(tmp_path / "mod.zip" / "fonts.swf") == hash_file(
+        tmp_path / "fonts.swf"
+    )
+
+
+def test_tree_scanner_lists_swfs_inside_archives(tmp_path):
+    _write_zip(
+        tmp_path / "mods" / "font_mod.zip",
+        {
+            "interface/fonts_b.swf": b"12",
+            "interface/fonts_a.swf": b"1",
+            "interface/readme.txt": b"x",
+        },
+    )
+    (tmp_path / "broken.zip").write_bytes(b"not a zip")
+    scanner = SwfTreeScanner(tmp_path)
+
+    found = list(scanner.iter_files())
+
+    archive = tmp_path / "mods" / "font_mod.zip"
+    assert [p for p, _ in found] == [
+        archive / "interface" / "fonts_a.swf",
+        archive / "interface" / "fonts_b.swf",
+    ]
+    assert [st.st_size for _, st in found] == [1, 2]
+    # 監視するのは実在するパスだけ
+    assert str(archive) in scanner.watch_paths()
+    assert all(Path(p).exists() for p in scanner.watch_paths())
+
+    # 中身が変わったメンバーだけが差分になる
+    _write_zip(
+        archive,
+        {"interface/fonts_a.swf": b"1", "interface/fonts_b.swf": b"34"},
+    )
+    list(scanner.iter_files())
+    assert scanner.diff.changed == [archive / "interface" / "fonts_b.swf"]
+
+
+def test_preset_generator_streams_archived_swf(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    _write_zip(
+        swf_dir / "font_mod.zip",
+        {"interface/fonts_core.swf": FONTS_CORE_SWF.read_bytes()},
+    )
+    preset = SimpleNamespace(
+        output_dir=tmp_path / "out",
+        swf_dir=str(swf_dir),
+        validnamechars="",
+        mappings=[
+            {
+                "map_name": "$ConsoleFont",
+                "font_name": "Arial",
+                "weight": "Normal",
+                "swf_path": "font_mod.zip/interface/fonts_core.swf",
+            }
+        ],
+    )
+
+    preset_generator(preset)
+
+    copied = tmp_path / "out" / "Interface" / "fonts_core.swf"
+    assert copied.read_bytes() == FONTS_CORE_SWF.read_bytes()
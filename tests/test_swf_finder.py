@@ -0,0 +1,130 @@
+from src.modules import swf_finder as target
+
+
+def test_iter_swf_files_returns_paths_with_stat(tmp_path):
+    (tmp_path / "b" / "interface").mkdir(parents=True)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "fonts_a.swf").write_bytes(b"12345")
+    (tmp_path / "b" / "interface" / "fonts_b.swf").write_bytes(b"1")
+    (tmp_path / "b" / "readme.txt").write_text("x")
+    (tmp_path / "fonts_root.swf").write_bytes(b"")
+
+    found = list(target.iter_swf_files(tmp_path))
+
+    assert [p.relative_to(tmp_path).as_posix() for p, _ in found] == [
+        "fonts_root.swf",
+        "a/fonts_a.swf",
+        "b/interface/fonts_b.swf",
+    ]
+    assert [st.st_size for _, st in found] == [0, 5, 1]
+
+
+def test_iter_swf_files_missing_dir(tmp_path):
+    assert list(target.iter_swf_files(tmp_path / "missing")) == []
+
+
+def test_hash_file_depends_only_on_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(target, "HASH_CHUNK_SIZE", 3)
+    (tmp_path / "a.swf").write_bytes(b"0123456789")
+    (tmp_path / "b.swf").write_bytes(b"0123456789")
+    (tmp_path / "c.swf").write_bytes(b"0123456780")
+
+    assert target.hash_file(tmp_path / "a.swf") == target.hash_file(tmp_path / "b.swf")
+    assert target.hash_file(tmp_path / "a.swf") != target.hash_file(tmp_path / "c.swf")
+
+
+def test_tree_scanner_reuses_unchanged_directory_listing(tmp_path, monkeypatch):
+    (tmp_path / "mod" / "textures").mkdir(parents=True)
+    (tmp_path / "mod" / "fonts.swf").write_bytes(b"1")
+    (tmp_path / "mod" / "textures" / "a.dds").write_bytes(b"x")
+    scanner = target.SwfTreeScanner(tmp_path)
+    assert [p.name for p, _ in scanner.iter_files()] == ["fonts.swf"]
+    assert [p.name for p in scanner.diff.added] == ["fonts.swf"]
+
+    # 一覧を取った直後の変更を見逃さないための猶予を無くす
+    monkeypatch.setattr(target, "DIR_MTIME_RACY_NS", -(10**18))
+    list(scanner.iter_files())
+    listed = []
+    scandir = target.os.scandir
+    monkeypatch.setattr(
+        target.os, "scandir", lambda path: listed.append(path) or scandir(path)
+    )
+
+    # SWFの上書きは一覧を取り直さなくても分かる
+    (tmp_path / "mod" / "fonts.swf").write_bytes(b"22")
+    found = list(scanner.iter_files())
+    assert listed == []
+    assert [st.st_size for _, st in found] == [2]
+    assert [p.name for p in scanner.diff.changed] == ["fonts.swf"]
+
+    # 深い階層への追加は、そのディレクトリだけ一覧を取り直す
+    (tmp_path / "mod" / "textures" / "late.swf").write_bytes(b"3")
+    found = list(scanner.iter_files())
+    assert listed == [str(tmp_path / "mod" / "textures")]
+    assert [p.name for p, _ in found] == ["fonts.swf", "late.swf"]
+    assert [p.name for p in scanner.diff.added] == ["late.swf"]
+
+
+def test_tree_scanner_rechecks_only_reported_paths(tmp_path, monkeypatch):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "fonts.swf").write_bytes(b"1")
+    scanner = target.SwfTreeScanner(tmp_path)
+    list(scanner.iter_files())
+    checked = []
+    stat = target.os.stat
+    monkeypatch.setattr(
+        target.os, "stat", lambda path: checked.append(str(path)) or stat(path)
+    )
+
+    # 報告されていないディレクトリとSWFは stat もし直さない
+    (tmp_path / "a" / "fonts.swf").write_bytes(b"22")
+    (tmp_path / "b" / "late.swf").write_bytes(b"3")
+    found = list(scanner.iter_files([str(tmp_path / "b")]))
+    assert [p.name for p, _ in found] == ["fonts.swf", "late.swf"]
+    assert all(not path.startswith(str(tmp_path / "a")) for path in checked)
+    assert [p.name for p in scanner.diff.added] == ["late.swf"]
+    assert scanner.diff.changed == []
+    assert len(list(scanner.iter_files([]))) == 0 and not scanner.diff
+
+    # 報告されたSWFだけは、ディレクトリが変わっていなくても調べ直す
+    found = list(scanner.iter_files([str(tmp_path / "a" / "fonts.swf")]))
+    assert found[0][0] == tmp_path / "a" / "fonts.swf"
+    assert len(found) == 1
+    assert scanner.diff.changed == [tmp_path / "a" / "fonts.swf"]
+
+
+def test_iter_swf_files_applies_scan_rules(tmp_path, monkeypatch):
+    for rel, size in [
+        ("a/interface/fonts_a.swf", 10),
+        ("a/interface/tiny.swf", 1),
+        ("a/interface/deep/fonts_deep.swf", 10),
+        ("a/Textures/fonts_tex.swf", 10),
+        ("b_backup/fonts_b.swf", 10),
+        ("c/fonts_c.swf", 10),
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+    rules = target.ScanRules(
+        include=["*/interface/*.swf", "fonts_c.swf"],
+        exclude=["*_backup"],
+        max_depth=2,
+        min_size=5,
+        skip_dir_names=["textures"],
+    )
+    listed = []
+    scandir = target.os.scandir
+    monkeypatch.setattr(
+        target.os, "scandir", lambda path: listed.append(path) or scandir(path)
+    )
+
+    found = list(target.iter_swf_files(tmp_path, rules))
+
+    assert [p.relative_to(tmp_path).as_posix() for p, _ in found] == [
+        "a/interface/fonts_a.swf",
+        "c/fonts_c.swf",
+    ]
+    # 除外したディレクトリの中には入らない
+    for skipped in ("a/Textures", "b_backup", "a/interface/deep"):
+        assert str(tmp_path / skipped) not in listed
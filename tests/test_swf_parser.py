@@ -0,0 +1,329 @@
+import io
+import lzma
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+from src.models.cache import Cache
+from src.modules import swf_parser as target
+from src.modules.glyph_coverage import encode_coverage, iter_code_points
+
+FONTS_CORE_SWF = Path(__file__).parent.parent / "data" / "fonts_core.swf"
+
+
+def _tag(tag_type: int, body: bytes, long: bool = False) -> bytes:
+    if long or len(body) >= 0x3F:
+        return struct.pack("<HI", (tag_type << 6) | 0x3F, len(body)) + body
+    return struct.pack("<H", (tag_type << 6) | len(body)) + body
+
+
+def _define_font3(
+    font_id: int, name: str, payload_size: int = 600, chars: str = ""
+) -> bytes:
+    name_bytes = name.encode("utf-8")
+    body = struct.pack("<HBBB", font_id, 0x84, 0, len(name_bytes)) + name_bytes
+    body += struct.pack("<H", len(chars))  # NumGlyphs
+    if chars:
+        # [OffsetTable][CodeTableOffset][GlyphShapeTable][CodeTable]
+        offset_table_size = len(chars) * 2 + 2
+        body += struct.pack("<H", offset_table_size) * len(chars)
+        body += struct.pack("<H", offset_table_size + payload_size)
+        body += b"\x00" * payload_size
+        body += b"".join(struct.pack("<H", ord(c)) for c in chars)
+    else:
+        body += b"\x00" * payload_size
+    return _tag(target.TAG_DEFINE_FONT3, body, long=True)
+
+
+def _swf(tags: bytes, signature: bytes = b"FWS", version: int = 10) -> bytes:
+    # RECT(nbits=0) + FrameRate 24.0 + FrameCount 1
+    header_rest = b"\x00" + struct.pack("<HH", 24 << 8, 1)
+    body = header_rest + tags + _tag(target.TAG_SHOW_FRAME, b"") + _tag(0, b"")
+    return signature + bytes([version]) + struct.pack("<I", 8 + len(body)) + body
+
+
+def _compress(data: bytes, signature: bytes) -> bytes:
+    if signature == b"CWS":
+        return b"CWS" + data[3:8] + zlib.compress(data[8:])
+    # ZWS: [CompressedLength:4][LZMAProperties:5][LZMA1 raw data]
+    lc, lp, pb, dict_size = 3, 0, 2, 1 << 16
+    filters = [
+        {"id": lzma.FILTER_LZMA1, "dict_size": dict_size, "lc": lc, "lp": lp, "pb": pb}
+    ]
+    compressed = lzma.compress(data[8:], format=lzma.FORMAT_RAW, filters=filters)
+    props = bytes([(pb * 5 + lp) * 9 + lc]) + struct.pack("<I", dict_size)
+    return b"ZWS" + data[3:8] + struct.pack("<I", len(compressed)) + props + compressed
+
+
+def _stream(data: bytes):
+    return target.SwfStream(io.BytesIO(data))
+
+
+def test_read_swf_header_fonts_core():
+    data = FONTS_CORE_SWF.read_bytes()
+    header = target.read_swf_header(data)
+
+    assert header.signature == "FWS"
+    assert header.version == 10
+    assert header.file_length == len(data)
+    assert header.frame_rate == 24.0
+    assert header.frame_count == 1
+
+
+def test_walker_matches_heuristic_on_fonts_core():
+    data = FONTS_CORE_SWF.read_bytes()
+
+    assert target.walk_font_names(_stream(data)) == target.scan_font_names_heuristic(
+        data
+    )
+
+
+def test_swf_parser_fonts_core_names():
+    font_names = target.swf_parser(FONTS_CORE_SWF, cache=[])
+
+    assert font_names == [
+        "Controller  Buttons",
+        "Controller  Buttons inverted",
+        "Daedric",
+        "Dragon_script",
+        "Dwemer",
+        "Falmer",
+        "Mage Script",
+        "SkyrimBooks_Unreadable",
+        "SkyrimSymbols",
+    ]
+
+
+def test_iter_swf_tags_jumps_by_tag_length():
+    data = _swf(_define_font3(1, "font_a") + _tag(2, b"\x01" * 10))
+    stream = _stream(data)
+    header = stream.read_header()
+
+    tags = [t for t, _, _ in target.iter_swf_tags(stream, header)]
+    # FrameCount=1 なので最終フレームの ShowFrame で打ち切られる
+    assert tags == [target.TAG_DEFINE_FONT3, 2, target.TAG_SHOW_FRAME]
+
+
+def test_read_swf_header_rejects_unknown_signature():
+    with pytest.raises(target.SwfFormatError):
+        target.read_swf_header(b"XYZ" + b"\x00" * 20)
+
+
+def test_swf_parser_falls_back_to_heuristic_when_tag_overruns(tmp_path):
+    data = _swf(_define_font3(1, "broken_font"))
+    # 末尾に壊れた長いタグを付け足してタグ構造を破綻させる
+    data = data[:-2] + struct.pack("<HI", (2 << 6) | 0x3F, 0xFFFFFF)
+    swf_path = tmp_path / "fonts_broken.swf"
+    swf_path.write_bytes(data)
+
+    assert target.swf_parser(swf_path, cache=[]) == ["broken_font"]
+
+
+@pytest.mark.parametrize("signature", [b"CWS", b"ZWS"])
+def test_swf_parser_compressed(tmp_path, signature):
+    data = FONTS_CORE_SWF.read_bytes()
+    swf_path = tmp_path / "fonts_core_compressed.swf"
+    swf_path.write_bytes(_compress(data, signature))
+
+    assert target.swf_parser(swf_path, cache=[]) == target.swf_parser(
+        FONTS_CORE_SWF, cache=[]
+    )
+
+
+@pytest.mark.parametrize("signature", [b"CWS", b"ZWS"])
+def test_stream_stops_after_last_frame(signature):
+    data = _swf(_define_font3(1, "font_a", payload_size=500_000))
+    # 最終フレーム以降に範囲外を指す壊れたタグがあっても読まない
+    data = data[:-2] + struct.pack("<HI", (2 << 6) | 0x3F, 0xFFFFFF)
+    data = _compress(data, signature)
+
+    assert target.walk_font_names(_stream(data)) == {"font_a"}
+
+
+def test_stream_skip_keeps_buffer_bounded():
+    tags = _define_font3(1, "font_a", payload_size=2_000_000)
+    stream = _stream(_compress(_swf(tags), b"CWS"))
+    header = stream.read_header()
+
+    for tag_type, _, length in target.iter_swf_tags(stream, header):
+        assert len(stream._buffer) <= target.READ_CHUNK_SIZE
+
+
+class _CountingReader(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def test_uncompressed_stream_seeks_past_glyph_payload():
+    tags = _define_font3(1, "font_a", payload_size=2_000_000)
+    tags += _define_font3(2, "font_b", payload_size=2_000_000)
+    reader = _CountingReader(_swf(tags))
+
+    assert target.walk_font_names(target.SwfStream(reader)) == {"font_a", "font_b"}
+    # タグヘッダーとフォント名の先頭分しか読み込まない
+    assert reader.bytes_read < 2_000
+
+
+def test_walk_fonts_fonts_core_metadata():
+    fonts = target.walk_fonts(_stream(FONTS_CORE_SWF.read_bytes()))
+
+    assert len(fonts) == 9
+    by_name = {f.name: f for f in fonts}
+    books = by_name["SkyrimBooks_Unreadable"]
+    assert books.font_id == 9
+    assert books.tag_type == target.TAG_DEFINE_FONT3
+    assert books.wide_codes is True
+    assert books.bold is False
+    assert books.italic is False
+    assert books.glyph_count == 32
+    assert books.tag_length == 155635
+    assert by_name["Falmer"].glyph_count == 48
+
+
+def test_walk_fonts_reads_define_font_name():
+    tags = _define_font3(3, "font_a")
+    tags += _tag(
+        target.TAG_DEFINE_FONT_NAME,
+        struct.pack("<H", 3) + "Font A 表示名\0(c) Someone\0".encode("utf-8"),
+    )
+    fonts = target.walk_fonts(_stream(_swf(tags)))
+
+    assert len(fonts) == 1
+    assert fonts[0].display_name == "Font A 表示名"
+    assert fonts[0].copyright == "(c) Someone"
+
+
+def test_walk_fonts_define_font_with_font_info2():
+    # DefineFont: [FontID][OffsetTable(2 glyphs)]
+    tags = _tag(target.TAG_DEFINE_FONT, struct.pack("<HHH", 4, 4, 6) + b"\0" * 4)
+    # DefineFontInfo2: [FontID][NameLen][Name][Flags][Language][CodeTable]
+    tags += _tag(
+        target.TAG_DEFINE_FONT_INFO2,
+        struct.pack("<HB", 4, 6) + b"legacy" + bytes([0x03, 2]) + b"\0" * 4,
+    )
+    fonts = target.walk_fonts(_stream(_swf(tags)))
+
+    assert len(fonts) == 1
+    assert fonts[0].name == "legacy"
+    assert fonts[0].glyph_count == 2
+    assert fonts[0].bold is True
+    assert fonts[0].wide_codes is True
+    assert fonts[0].language_code == 2
+
+
+def test_font_info_round_trip_dict():
+    info = target.FontInfo(font_id=1, name="a", bold=True, glyph_count=10)
+
+    assert target.FontInfo.from_dict(info.to_dict()) == info
+
+
+def test_parse_swf_fonts_uses_cached_font_info(tmp_path):
+    swf_path = tmp_path / "fonts_cached.swf"
+    swf_path.write_bytes(b"not a swf")
+    mtime = target.datetime.fromtimestamp(swf_path.stat().st_mtime).strftime(
+        target.TIME_FORMAT
+    )
+    cached = target.FontInfo(
+        font_id=1, name="cached_font", glyph_count=5, coverage=0b1110
+    )
+    cache = [
+        {
+            "swf_path": str(swf_path),
+            "modified_date": mtime,
+            "font_names": ["cached_font"],
+            "fonts": [cached.to_dict()],
+            "coverage": {"cached_font": encode_coverage(0b1110)},
+        }
+    ]
+
+    assert target.parse_swf_fonts(swf_path, cache=cache) == [cached]
+
+
+def test_walk_fonts_decodes_code_table_coverage():
+    chars = "あいうアイウ漢字ABC"
+    tags = _define_font3(1, "font_jp", payload_size=60_000, chars=chars)
+    fonts = target.walk_fonts(_stream(_swf(tags)))
+
+    assert fonts[0].glyph_count == len(chars)
+    assert "".join(map(chr, iter_code_points(fonts[0].coverage))) == "".join(
+        sorted(chars)
+    )
+
+
+def test_walk_fonts_fonts_core_coverage_matches_glyph_count():
+    fonts = target.walk_fonts(_stream(FONTS_CORE_SWF.read_bytes()))
+
+    for info in fonts:
+        assert info.coverage.bit_count() == info.glyph_count
+
+
+def test_find_cached_fonts_ignores_other_file_with_same_suffix(tmp_path):
+    swf_dir = tmp_path / "swfs"
+    swf_path = swf_dir / "mod" / "fonts_a.swf"
+    swf_path.parent.mkdir(parents=True)
+    swf_path.write_bytes(b"not a swf")
+    mtime = target.datetime.fromtimestamp(swf_path.stat().st_mtime).strftime(
+        target.TIME_FORMAT
+    )
+    cache = Cache(tmp_path / "cache.yml")
+    cache.data = [
+        {
+            "swf_path": "fonts_a.swf",
+            "modified_date": mtime,
+            "font_names": ["wrong_font"],
+            "fonts": [{"name": "wrong_font"}],
+            "coverage": {},
+        }
+    ]
+
+    assert target.find_cached_fonts(swf_path, cache, swf_dir=swf_dir) is None
+
+
+def _cached_entry(swf_path, **stat_fields):
+    return {
+        "swf_path": swf_path.name,
+        **stat_fields,
+        "font_names": ["cached_font"],
+        "fonts": [{"name": "cached_font"}],
+        "coverage": {},
+    }
+
+
+def test_find_cached_fonts_validates_size_and_mtime_ns(tmp_path):
+    swf_path = tmp_path / "fonts_a.swf"
+    swf_path.write_bytes(b"not a swf")
+    st = swf_path.stat()
+    cache = Cache(tmp_path / "cache.sqlite3")
+    cache.data = [_cached_entry(swf_path, size=st.st_size, mtime_ns=st.st_mtime_ns)]
+
+    assert target.find_cached_fonts(swf_path, cache, swf_dir=tmp_path, st=st)
+
+    cache.data = [_cached_entry(swf_path, size=st.st_size + 1, mtime_ns=st.st_mtime_ns)]
+    assert target.find_cached_fonts(swf_path, cache, swf_dir=tmp_path, st=st) is None
+
+    cache.data = [_cached_entry(swf_path, size=st.st_size, mtime_ns=st.st_mtime_ns + 1)]
+    assert target.find_cached_fonts(swf_path, cache, swf_dir=tmp_path, st=st) is None
+
+
+def test_legacy_modified_date_entry_is_accepted_then_upgraded(tmp_path):
+    swf_path = tmp_path / "fonts_a.swf"
+    swf_path.write_bytes(b"not a swf")
+    st = swf_path.stat()
+    mtime = target.datetime.fromtimestamp(st.st_mtime).strftime(target.TIME_FORMAT)
+    cache = Cache(tmp_path / "cache.sqlite3")
+    cache.data = [_cached_entry(swf_path, modified_date=mtime)]
+
+    assert target.find_cached_fonts(swf_path, cache, swf_dir=tmp_path, st=st)
+
+    cache.refresh_stat(swf_path, tmp_path, st)
+    entry = cache.get_entry(swf_path, tmp_path)
+    assert "modified_date" not in entry
+    assert (entry["size"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns)
@@ -0,0 +1,62 @@
+import zipfile
+from pathlib import Path
+
+from src.modules import swf_prefetch as target
+from src.modules.swf_finder import hash_file
+from src.modules.swf_parser import parse_and_hash_swf_file, parse_and_hash_swf_files
+
+FONTS_CORE_SWF = Path(__file__).parent.parent / "data" / "fonts_core.swf"
+
+
+def test_prefetched_file_reads_past_head_from_disk(tmp_path):
+    path = tmp_path / "a.swf"
+    path.write_bytes(b"0123456789")
+    _, f = next(iter(target.SwfPrefetcher([path], head_size=4)))
+
+    assert f.head == b"0123" and not f.complete
+    with f:
+        assert f.read(2) == b"01"
+        assert f.read(4) == b"2345"
+        assert f.seek(8) == 8
+        assert f.read() == b"89"
+        assert f.seek(-3, 2) == 7
+        assert f.read(10) == b"789"
+        f.seek(1)
+        assert f.read(2) == b"12"
+
+
+def test_prefetcher_keeps_order_and_reports_unreadable_files(tmp_path):
+    paths = []
+    for i in range(5):
+        paths.append(tmp_path / f"{i}.swf")
+        paths[-1].write_bytes(bytes([i]) * 3)
+    paths.insert(2, tmp_path / "missing.swf")
+    archive = tmp_path / "mod.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("fonts.swf", b"zipped")
+    paths.append(archive / "fonts.swf")
+
+    results = list(target.SwfPrefetcher(paths, max_bytes=8, head_size=4))
+
+    assert [p for p, _ in results] == paths
+    assert results[2][1] is None
+    assert [results[i][1].read() for i in (0, 1, 3)] == [
+        b"\x00" * 3,
+        b"\x01" * 3,
+        b"\x02" * 3,
+    ]
+    with results[-1][1] as member:
+        assert member.head == b"zipp" and member.read() == b"zipped"
+
+
+def test_parse_with_prefetched_head_matches_plain_parse(tmp_path):
+    plain = parse_and_hash_swf_file(FONTS_CORE_SWF)
+    _, prefetched = next(iter(target.SwfPrefetcher([FONTS_CORE_SWF], head_size=64)))
+
+    assert parse_and_hash_swf_file(FONTS_CORE_SWF, False, True, prefetched) == plain
+    assert plain[1] == hash_file(FONTS_CORE_SWF)
+    broken = tmp_path / "broken.swf"
+    broken.write_bytes(b"not a swf")
+    results = parse_and_hash_swf_files([FONTS_CORE_SWF, broken])
+    assert results[0] == plain
+    assert results[1][0] == [] and results[1][2].startswith("SwfFormatError")